@@ -0,0 +1,223 @@
+"""
+Benchmarks for the S-box evaluation kernels.
+
+Times ``compute_ddt``, ``walsh_spectrum`` / ``compute_walsh_hadamard``, symbol flattening and
+``evaluate_s_box`` end-to-end on seeded random boxes: 4, 6, 8, 10 and 11-bit permutations and the
+q-ary / mixed-radix sizes from the README. Every case records the best and median wall time per box,
+the throughput in boxes/sec and the peak memory (tracemalloc, measured in a separate untimed run).
+
+Run from the repository root:
+
+    python -m benchmarks.benchmark_evaluation --output benchmarks/results.json
+    python -m benchmarks.benchmark_evaluation --compare benchmarks/results.json
+
+``--compare`` prints the median-time ratio of every case against an earlier results file, so a
+regression between commits shows up as a ratio above 1. The bitwise cases also time
+``evaluate_s_box(connectivity_tables=True)``; its median over the plain evaluation is checked against
+``--max-connectivity-overhead`` and the run exits non-zero when a case goes over that budget.
+"""
+
+from pathlib import Path
+from typing import Callable
+import argparse
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.evaluate_q_ary_s_box import infer_radices
+from src.evaluate_s_box import compute_ddt, compute_walsh_hadamard, evaluate_s_box, flatten_s_box, walsh_spectrum
+from src.s_box import values_to_table
+
+BIT_SIZES = (4, 6, 8, 10, 11)
+# Input length 3 over the README's symbol counts; the last few are the mixed-radix "bonus" shapes
+Q_ARY_SIZES = (125, 216, 343, 512, 729, 1000, 1331)
+MIXED_RADICES = ((5, 5, 6), (5, 6, 7), (6, 7, 7))
+# The dict-building compute_walsh_hadamard holds 4^n Python ints; past 8 bits it measures the allocator
+MAX_WALSH_DICT_BITS = 8
+# Median time of evaluate_s_box with connectivity_tables=True over the plain evaluation of the same box
+MAX_CONNECTIVITY_OVERHEAD = 3.0
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _measure(function: Callable[[], object], min_time: float, min_runs: int) -> dict:
+    """Wall time of repeated calls until both min_time and min_runs are reached, then one traced call."""
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < min_runs or time.perf_counter() - started < min_time:
+        call_started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - call_started)
+
+    tracemalloc.start()
+    function()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(durations)
+    return {
+        "runs": len(durations),
+        "seconds_best": min(durations),
+        "seconds_median": median,
+        "boxes_per_second": 1 / median if median else math.inf,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def _bitwise_cases(rng: np.random.Generator, bit_sizes: tuple[int, ...]):
+    for n_bits in bit_sizes:
+        values = rng.permutation(2**n_bits)
+        table = values_to_table(values)
+        case = f"{n_bits}-bit"
+        yield case, "flatten_s_box", lambda table=table: flatten_s_box(table)
+        yield case, "compute_ddt", lambda values=values, n=n_bits: compute_ddt(values, n, n)
+        yield case, "walsh_spectrum", lambda values=values, n=n_bits: walsh_spectrum(values, n, n)
+        if n_bits <= MAX_WALSH_DICT_BITS:
+            yield case, "compute_walsh_hadamard", lambda values=values, n=n_bits: compute_walsh_hadamard(values, n, n)
+        yield case, "evaluate_s_box", lambda table=table, n=n_bits: evaluate_s_box(table, n, n, 2**n)
+        yield case, "evaluate_s_box+connectivity", lambda table=table, n=n_bits: evaluate_s_box(
+            table, n, n, 2**n, connectivity_tables=True
+        )
+
+
+def _q_ary_cases(rng: np.random.Generator, sizes: tuple[int, ...], mixed: tuple[tuple[int, ...], ...]):
+    shapes = [(size, infer_radices(size, 3)) for size in sizes] + [(math.prod(radices), radices) for radices in mixed]
+    for size, radices in shapes:
+        values = rng.permutation(size)
+        table = values_to_table(values, radices)
+        case = f"{size} ({'x'.join(map(str, radices))})"
+        yield case, "flatten_s_box", lambda table=table: flatten_s_box(table)
+        yield case, "evaluate_s_box", lambda table=table, size=size, radices=radices: evaluate_s_box(
+            table, 3, 3, size, radices=radices
+        )
+
+
+def run_benchmarks(
+    bit_sizes: tuple[int, ...] = BIT_SIZES,
+    q_ary_sizes: tuple[int, ...] = Q_ARY_SIZES,
+    mixed_radices: tuple[tuple[int, ...], ...] = MIXED_RADICES,
+    min_time: float = 0.2,
+    min_runs: int = 3,
+    seed: int = 0,
+) -> dict:
+    """
+    Time every kernel on every box size.
+
+    :param bit_sizes: bit widths of the bitwise permutations
+    :param q_ary_sizes: q^3 symbol counts of the q-ary permutations
+    :param mixed_radices: radices of the mixed-radix permutations
+    :param min_time: keep repeating a case for at least this many seconds
+    :param min_runs: and at least this many times
+    :param seed: seed for the random boxes, so every run times the same boxes
+    :return: JSON-ready dict with the environment and one entry per (case, kernel)
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    cases = list(_bitwise_cases(rng, bit_sizes)) + list(_q_ary_cases(rng, q_ary_sizes, mixed_radices))
+    for case, kernel, function in cases:
+        results.append({"case": case, "kernel": kernel, **_measure(function, min_time, min_runs)})
+    return {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """One line per case present in both runs: median time now, before, and the ratio."""
+    before = {(result["case"], result["kernel"]): result for result in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        previous = before.get((result["case"], result["kernel"]))
+        if previous is None:
+            continue
+        ratio = result["seconds_median"] / previous["seconds_median"]
+        lines.append(
+            f"{result['case']:>16} {result['kernel']:<28} {result['seconds_median'] * 1e3:10.3f} ms"
+            f" {previous['seconds_median'] * 1e3:10.3f} ms  x{ratio:.2f}"
+        )
+    return lines
+
+
+def connectivity_overhead(report: dict, budget: float = MAX_CONNECTIVITY_OVERHEAD) -> tuple[list[str], bool]:
+    """
+    Median time of ``evaluate_s_box+connectivity`` over ``evaluate_s_box`` for every case that ran both.
+
+    :param report: output of ``run_benchmarks``
+    :param budget: largest acceptable ratio
+    :return: (one line per case, whether every case stayed within the budget)
+    """
+    medians = {(result["case"], result["kernel"]): result["seconds_median"] for result in report["results"]}
+    lines = []
+    within_budget = True
+    for (case, kernel), connected in medians.items():
+        plain = medians.get((case, "evaluate_s_box"))
+        if kernel != "evaluate_s_box+connectivity" or not plain:
+            continue
+        ratio = connected / plain
+        within_budget &= ratio <= budget
+        lines.append(f"{case:>16} x{ratio:.2f}{'' if ratio <= budget else f'  over the x{budget:.2f} budget'}")
+    return lines, within_budget
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="compare against an earlier results file")
+    parser.add_argument("--bits", type=int, nargs="*", default=list(BIT_SIZES), help="bitwise sizes to run")
+    parser.add_argument("--q-ary", type=int, nargs="*", default=list(Q_ARY_SIZES), help="q^3 sizes to run")
+    parser.add_argument("--no-mixed", action="store_true", help="skip the mixed-radix boxes")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend on each case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-connectivity-overhead",
+        type=float,
+        default=MAX_CONNECTIVITY_OVERHEAD,
+        help="fail when connectivity_tables=True costs more than this multiple of a plain evaluation",
+    )
+    arguments = parser.parse_args()
+
+    report = run_benchmarks(
+        tuple(arguments.bits),
+        tuple(arguments.q_ary),
+        () if arguments.no_mixed else MIXED_RADICES,
+        min_time=arguments.min_time,
+        seed=arguments.seed,
+    )
+    for result in report["results"]:
+        print(
+            f"{result['case']:>16} {result['kernel']:<28} {result['seconds_median'] * 1e3:10.3f} ms"
+            f" {result['boxes_per_second']:12.1f} boxes/s {result['peak_bytes'] / 2**20:9.2f} MiB"
+        )
+    if arguments.compare is not None:
+        print(f"\nmedian now vs {arguments.compare}:")
+        print("\n".join(compare(report, json.loads(arguments.compare.read_text()))))
+    if arguments.output is not None:
+        arguments.output.parent.mkdir(parents=True, exist_ok=True)
+        arguments.output.write_text(json.dumps(report, indent=2))
+    overhead_lines, within_budget = connectivity_overhead(report, arguments.max_connectivity_overhead)
+    if overhead_lines:
+        print("\nconnectivity_tables=True over a plain evaluation:")
+        print("\n".join(overhead_lines))
+    if not within_budget:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-from src.utils import get_s_box_for
-
-
 def main() -> None:
+    # Imported here so loading this script doesn't pull in ollama; see src/cli.py for the batch command line
+    from src.utils import get_s_box_for
+
     input_length = 3
     output_length = 3
     num_unique_symbols = 5 * 5 * 5
@@ -10,3 +10,7 @@ def main() -> None:
 
     output = get_s_box_for(input_length, output_length, num_unique_symbols, model_id=model_id)
     print(f"{output=}")
+
+
+if __name__ == "__main__":
+    main()
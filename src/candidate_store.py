@@ -0,0 +1,387 @@
+"""
+Persistent, columnar store of generated S-box candidates.
+
+Each box shape (symbol count, input and output length) gets its own directory of flat files:
+
+  * ``values.npy``: one packed integer row per candidate (uint16, or uint32 past 16-bit outputs),
+    memory-mapped and grown by doubling
+  * ``metrics.npy``: the metric columns of ``METRIC_DTYPE``, one record per row
+  * ``provenance.jsonl`` with ``provenance_offsets.npy``: model, prompt, seed and any extra fields,
+    one JSON line per row, reachable by byte offset
+  * ``run_<column>_<start>_<stop>.npy``: for each of ``INDEXED_COLUMNS``, sorted runs of (key, row)
+    records covering rows [start, stop), so a top-k query reads k records per run and never scans
+    the store
+  * ``meta.json``: the shape and the row count; written last, so a crash mid-flush leaves the previous
+    count (rows and runs past it are ignored)
+
+Rows are buffered in memory and written by ``flush`` (every ``flush_every`` rows, before queries and
+on ``close``). Each flush writes its rows' keys as a new sorted run, like an LSM tree, instead of
+rewriting one big index. After the flush is committed, the newest run is merged into the one before
+it while it is at least as large, like carries in a binary counter, so there are O(log n) runs and every row is
+merged O(log n) times. Queries merge the runs' first k records.
+"""
+
+from pathlib import Path
+from typing import Any, Iterable
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from src.evaluate_s_box import evaluate_flat_s_box, flatten_s_box, resolve_radices, s_box_cost
+from src.s_box import SBox
+
+METRIC_DTYPE = np.dtype(
+    [
+        ("max_ddt_entry", np.int32),
+        ("max_linear_correlation", np.float64),
+        ("cost", np.float64),
+        ("algebraic_degree", np.int16),
+        ("is_bent", np.bool_),
+        ("uniformity_exceeded", np.bool_),
+    ]
+)
+# Metrics that could not be computed are stored as these and read back as None
+_MISSING = {"max_ddt_entry": -1, "max_linear_correlation": np.nan, "cost": np.inf, "algebraic_degree": -1}
+INDEXED_COLUMNS = ("cost", "max_ddt_entry", "max_linear_correlation")
+# Sorted run records; keys that could not be computed are +inf, so they sort last
+_RUN_DTYPE = np.dtype([("key", "<f8"), ("row", "<i8")])
+
+
+def _save_atomically(path: Path, array: np.ndarray) -> None:
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as temporary_file:
+        np.save(temporary_file, array)
+    os.replace(temporary, path)
+
+
+class _ShapeStore:
+    """The files of one box shape; see the module docstring."""
+
+    def __init__(self, directory: Path, input_length: int, output_length: int, num_unique_symbols: int, size: int):
+        self.directory = directory
+        self.input_length = input_length
+        self.output_length = output_length
+        self.num_unique_symbols = num_unique_symbols
+        self.size = size
+        self.count = 0
+        self.provenance_bytes = 0
+        # Outputs are below 2^output_length (bitwise) or num_unique_symbols (q-ary)
+        self.dtype = np.dtype(np.uint16 if max(2**output_length, num_unique_symbols) <= 2**16 else np.uint32)
+        self.pending_values: list[np.ndarray] = []
+        self.pending_metrics: list[tuple] = []
+        self.pending_provenance: list[dict] = []
+
+        directory.mkdir(parents=True, exist_ok=True)
+        meta_path = directory / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if (meta["input_length"], meta["output_length"], meta["size"]) != (input_length, output_length, size):
+                raise ValueError(f"{directory} holds {meta['size']}-entry boxes, not {size}")
+            self.count = meta["count"]
+            self.provenance_bytes = meta["provenance_bytes"]
+
+    def _open(self, name: str, dtype: np.dtype, shape: tuple[int, ...]) -> np.memmap:
+        """Open ``name`` for writing with room for at least shape[0] rows, doubling the file when it is full."""
+        path = self.directory / name
+        if path.exists():
+            existing = np.load(path, mmap_mode="r+")
+            if existing.shape[0] >= shape[0]:
+                return existing
+            capacity = max(shape[0], 2 * existing.shape[0])
+            grown = np.lib.format.open_memmap(
+                path.with_name(name + ".tmp"), mode="w+", dtype=dtype, shape=(capacity,) + shape[1:]
+            )
+            grown[: self.count] = existing[: self.count]
+            grown.flush()
+            del existing, grown
+            os.replace(path.with_name(name + ".tmp"), path)
+            return np.load(path, mmap_mode="r+")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(max(shape[0], 1024),) + shape[1:])
+
+    def flush(self) -> None:
+        if not self.pending_values:
+            return
+        new_count = self.count + len(self.pending_values)
+        rows = np.arange(self.count, new_count, dtype=np.int64)
+        new_values = np.stack(self.pending_values).astype(self.dtype)
+        new_metrics = np.array(self.pending_metrics, dtype=METRIC_DTYPE)
+
+        values = self._open("values.npy", self.dtype, (new_count, self.size))
+        values[self.count : new_count] = new_values
+        values.flush()
+        metrics = self._open("metrics.npy", METRIC_DTYPE, (new_count,))
+        metrics[self.count : new_count] = new_metrics
+        metrics.flush()
+
+        offsets = self._open("provenance_offsets.npy", np.dtype(np.int64), (new_count,))
+        with open(self.directory / "provenance.jsonl", "a+b") as provenance_file:
+            # Drop anything an interrupted flush appended past the last committed row
+            provenance_file.truncate(self.provenance_bytes)
+            position = self.provenance_bytes
+            for row, provenance in zip(rows, self.pending_provenance):
+                line = json.dumps(provenance).encode() + b"\n"
+                provenance_file.write(line)
+                offsets[row] = position
+                position += len(line)
+        offsets.flush()
+
+        for column in INDEXED_COLUMNS:
+            keys = new_metrics[column].astype(np.float64)
+            if column == "max_ddt_entry":
+                keys[keys < 0] = np.inf
+            keys[np.isnan(keys)] = np.inf
+            run = np.empty(len(keys), dtype=_RUN_DTYPE)
+            run["key"], run["row"] = keys, rows
+            # Stable, so equal keys stay in row (insertion) order
+            _save_atomically(self._run_path(column, self.count, new_count), run[np.argsort(keys, kind="stable")])
+
+        self.count = new_count
+        self.provenance_bytes = position
+        meta = {
+            "input_length": self.input_length,
+            "output_length": self.output_length,
+            "num_unique_symbols": self.num_unique_symbols,
+            "size": self.size,
+            "count": self.count,
+            "provenance_bytes": position,
+        }
+        temporary = self.directory / "meta.json.tmp"
+        temporary.write_text(json.dumps(meta))
+        os.replace(temporary, self.directory / "meta.json")
+        self.pending_values, self.pending_metrics, self.pending_provenance = [], [], []
+
+        for column in INDEXED_COLUMNS:
+            self._compact(column)
+
+    def _run_path(self, column: str, start: int, stop: int) -> Path:
+        return self.directory / f"run_{column}_{start}_{stop}.npy"
+
+    def _run_files(self, column: str) -> list[tuple[int, int, Path]]:
+        runs = []
+        for path in self.directory.glob(f"run_{column}_*.npy"):
+            start, stop = path.stem.rsplit("_", 2)[1:]
+            runs.append((int(start), int(stop), path))
+        return runs
+
+    def runs(self, column: str) -> list[tuple[int, int, Path]]:
+        """
+        The (start, stop, path) runs of ``column`` that cover the committed rows once each, oldest first.
+
+        Runs past the committed count come from an interrupted flush, and runs inside a longer one from an
+        interrupted compaction; both are skipped.
+        """
+        longest: dict[int, tuple[int, int, Path]] = {}
+        for run in self._run_files(column):
+            if run[1] <= self.count and (run[0] not in longest or run[1] > longest[run[0]][1]):
+                longest[run[0]] = run
+        covering, position = [], 0
+        while position < self.count:
+            if position not in longest:
+                raise RuntimeError(f"{self.directory}: no {column} run starts at row {position}")
+            covering.append(longest[position])
+            position = longest[position][1]
+        return covering
+
+    def _compact(self, column: str) -> None:
+        """Merge the newest run into the one before it while it is at least as large."""
+        covering = self.runs(column)
+        while len(covering) >= 2:
+            (start, middle, older_path), (_, stop, newer_path) = covering[-2:]
+            if stop - middle < middle - start:
+                break
+            older = np.load(older_path)
+            newer = np.load(newer_path)
+            # Older rows go first among equal keys, keeping ties in insertion order
+            merged = np.insert(older, np.searchsorted(older["key"], newer["key"], side="right"), newer)
+            _save_atomically(self._run_path(column, start, stop), merged)
+            older_path.unlink()
+            newer_path.unlink()
+            covering[-2:] = [(start, stop, self._run_path(column, start, stop))]
+        # Leftovers of interrupted flushes and compactions
+        kept = {path for _, _, path in covering}
+        for _, _, path in self._run_files(column):
+            if path not in kept:
+                path.unlink()
+
+
+class CandidateStore:
+    """
+    Appends candidates with their metrics and provenance, and answers top-k queries from sorted indexes.
+
+    Use as a context manager (or call ``close``) so buffered rows are written out. One process should
+    write a store at a time; any number may read it.
+    """
+
+    def __init__(self, directory: str | Path, flush_every: int = 1024):
+        """
+        :param directory: root directory; one subdirectory per box shape is created inside it
+        :param flush_every: write buffered rows once this many are pending
+        """
+        self.directory = Path(directory)
+        self.flush_every = flush_every
+        self._shapes: dict[tuple[int, int, int], _ShapeStore] = {}
+
+    def __enter__(self) -> "CandidateStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _shape(
+        self, input_length: int, output_length: int, num_unique_symbols: int, size: int | None = None
+    ) -> _ShapeStore:
+        key = (input_length, output_length, num_unique_symbols)
+        if key not in self._shapes:
+            if size is None:
+                meta_path = self._shape_directory(*key) / "meta.json"
+                if not meta_path.exists():
+                    raise KeyError(f"No {input_length}->{output_length}, {num_unique_symbols}-symbol candidates stored")
+                size = json.loads(meta_path.read_text())["size"]
+            self._shapes[key] = _ShapeStore(self._shape_directory(*key), *key, size)
+        return self._shapes[key]
+
+    def _shape_directory(self, input_length: int, output_length: int, num_unique_symbols: int) -> Path:
+        return self.directory / f"{num_unique_symbols}_{input_length}x{output_length}"
+
+    def add(
+        self,
+        s_box: "list[list[str]] | SBox | np.ndarray",
+        input_length: int,
+        output_length: int,
+        num_unique_symbols: int,
+        metrics: dict | None = None,
+        model: str | None = None,
+        prompt: str | None = None,
+        seed: int | None = None,
+        **provenance: Any,
+    ) -> int:
+        """
+        Append one candidate and return its row number within its shape.
+
+        :param s_box: table, parsed SBox or flat integer outputs
+        :param metrics: its ``evaluate_s_box`` metrics; evaluated here (with ``algebraic=True``) when omitted
+        :param model: model that produced it
+        :param prompt: prompt it answered
+        :param seed: random seed of the generation
+        :param provenance: any other JSON-serializable fields to keep with it
+        """
+        values = s_box if isinstance(s_box, np.ndarray) else flatten_s_box(s_box)
+        values = np.asarray(values, dtype=np.int64)
+        if metrics is None:
+            radices = resolve_radices(len(values), input_length, num_unique_symbols)
+            metrics = evaluate_flat_s_box(values, input_length, output_length, radices=radices, algebraic=True)
+        shape = self._shape(input_length, output_length, num_unique_symbols, len(values))
+        if len(values) != shape.size:
+            raise ValueError(f"Expected {shape.size} outputs, got {len(values)}")
+
+        if len(values) and (values.min() < 0 or values.max() > np.iinfo(shape.dtype).max):
+            raise ValueError(f"Outputs must lie in [0, {np.iinfo(shape.dtype).max}]")
+        shape.pending_values.append(values)
+        shape.pending_metrics.append(self._metric_record(metrics))
+        shape.pending_provenance.append(
+            {"model": model, "prompt": prompt, "seed": seed, "created_at": time.time(), **provenance}
+        )
+        row = shape.count + len(shape.pending_values) - 1
+        if len(shape.pending_values) >= self.flush_every:
+            shape.flush()
+        return row
+
+    def add_many(
+        self,
+        s_boxes: Iterable["list[list[str]] | SBox | np.ndarray"],
+        input_length: int,
+        output_length: int,
+        num_unique_symbols: int,
+        metrics: Iterable[dict | None] | None = None,
+        **provenance: Any,
+    ) -> list[int]:
+        """``add`` for every box, with the same provenance; ``metrics`` lines up with ``s_boxes`` when given."""
+        s_boxes = list(s_boxes)
+        metrics = list(metrics) if metrics is not None else [None] * len(s_boxes)
+        return [
+            self.add(s_box, input_length, output_length, num_unique_symbols, box_metrics, **provenance)
+            for s_box, box_metrics in zip(s_boxes, metrics)
+        ]
+
+    @staticmethod
+    def _metric_record(metrics: dict) -> tuple:
+        record = []
+        for name in METRIC_DTYPE.names:
+            if name == "cost":
+                scored = metrics.get("max_ddt_entry") is not None and metrics.get("max_linear_correlation") is not None
+                value = s_box_cost(metrics) if scored else None
+            else:
+                value = metrics.get(name)
+            record.append(_MISSING.get(name, False) if value is None else value)
+        return tuple(record)
+
+    def count(self, input_length: int, output_length: int, num_unique_symbols: int) -> int:
+        """Number of stored candidates of this shape, including buffered ones."""
+        try:
+            shape = self._shape(input_length, output_length, num_unique_symbols)
+        except KeyError:
+            return 0
+        return shape.count + len(shape.pending_values)
+
+    def top_k(
+        self, input_length: int, output_length: int, num_unique_symbols: int, k: int = 50, by: str = "cost"
+    ) -> list[dict]:
+        """
+        The k best candidates of a shape by one indexed column (lowest first, ties in insertion order).
+
+        Candidates that could not be scored on that column are never returned.
+
+        :param by: one of ``INDEXED_COLUMNS``
+        :return: one dict per candidate: ``row``, ``values`` (flat outputs), the metric columns (None when
+            missing) and ``provenance``
+        """
+        if by not in INDEXED_COLUMNS:
+            raise ValueError(f"Not an indexed column: {by!r}; choose from {INDEXED_COLUMNS}")
+        try:
+            shape = self._shape(input_length, output_length, num_unique_symbols)
+        except KeyError:
+            return []
+        shape.flush()
+        if not shape.count:
+            return []
+        # k-way merge of the runs' heads: the best k overall are among the first k of each run
+        heads = np.concatenate([np.load(path, mmap_mode="r")[:k] for _, _, path in shape.runs(by)])
+        heads = heads[heads["key"] < np.inf]
+        rows = heads["row"][np.lexsort((heads["row"], heads["key"]))[:k]]
+        return self.get_rows(input_length, output_length, num_unique_symbols, rows.tolist())
+
+    def get_rows(self, input_length: int, output_length: int, num_unique_symbols: int, rows: list[int]) -> list[dict]:
+        """Read back stored candidates by row number."""
+        shape = self._shape(input_length, output_length, num_unique_symbols)
+        shape.flush()
+        values = np.load(shape.directory / "values.npy", mmap_mode="r")
+        metrics = np.load(shape.directory / "metrics.npy", mmap_mode="r")
+        offsets = np.load(shape.directory / "provenance_offsets.npy", mmap_mode="r")
+        results = []
+        with open(shape.directory / "provenance.jsonl", "rb") as provenance_file:
+            for row in rows:
+                if not 0 <= row < shape.count:
+                    raise IndexError(f"Row {row} out of range for {shape.count} candidates")
+                provenance_file.seek(int(offsets[row]))
+                record = metrics[row]
+                result = {"row": row, "values": np.array(values[row], dtype=np.int64)}
+                for name in METRIC_DTYPE.names:
+                    value = record[name].item()
+                    missing = _MISSING.get(name)
+                    if missing is not None and (value == missing or (isinstance(value, float) and math.isnan(value))):
+                        value = None
+                    result[name] = value
+                result["provenance"] = json.loads(provenance_file.readline())
+                results.append(result)
+        return results
+
+    def flush(self) -> None:
+        for shape in self._shapes.values():
+            shape.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._shapes.clear()
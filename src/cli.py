@@ -0,0 +1,422 @@
+"""
+The ``ai-s-box`` command line: evaluate, generate and search S-boxes in bulk.
+
+    python -m src evaluate data/
+    cat candidates.txt | python -m src evaluate - --input-length 3 --symbols 125 --workers 4
+    python -m src generate --input-length 3 --symbols 125 --count 20 --store candidates/
+    python -m src search --input-length 3 --symbols 125 --algebraic --top-k 4
+
+Every subcommand prints one JSON object per box on stdout. Only the standard library is imported up
+front: the evaluators (and numpy) load when a subcommand runs, and ollama only for ``generate``, so an
+evaluate-only invocation costs little more than importing numpy.
+"""
+
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+import argparse
+import json
+import sys
+
+# Boxes read ahead for one evaluate_s_boxes_in_parallel call with --workers
+_PARALLEL_BATCH = 1024
+
+
+def _add_shape_arguments(parser: argparse.ArgumentParser, required: bool) -> None:
+    parser.add_argument(
+        "--input-length", type=int, required=required, help="characters in the input (bits for 2^n-symbol boxes)"
+    )
+    parser.add_argument(
+        "--output-length",
+        type=int,
+        help="characters in the output (inferred from the largest output of each bitwise box, else the input length)",
+    )
+    parser.add_argument("--symbols", type=int, required=required, help="number of entries in the box, e.g. 125")
+    parser.add_argument(
+        "--radices", type=_parse_radices, help="radix of each character of mixed-radix boxes, e.g. 5,5,6 for 150"
+    )
+
+
+def _parse_radices(text: str) -> tuple[int, ...]:
+    try:
+        radices = tuple(int(radix) for radix in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {text!r}")
+    if any(radix < 2 for radix in radices):
+        raise argparse.ArgumentTypeError("every radix must be at least 2")
+    return radices
+
+
+def _add_store_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--store", type=Path, help="also append every scored box to this CandidateStore directory")
+
+
+def _shape_for(arguments: argparse.Namespace, size: int, largest: int | None = None) -> tuple[int, int, int]:
+    """
+    (input_length, output_length, num_unique_symbols) from the flags, inferred from the box when omitted.
+
+    :param size: number of entries in the box
+    :param largest: largest output in the box; a bitwise box without --output-length gets as many output
+        bits as it needs, as ``walsh_spectrum`` does. Without it the output length is the input length
+    """
+    input_length = arguments.input_length
+    if input_length is None and arguments.radices is not None:
+        input_length = len(arguments.radices)
+    elif input_length is None:
+        # 2^n entries are read as an n-bit box, anything else as the README's 3-character q-ary boxes
+        input_length = size.bit_length() - 1 if size and not size & (size - 1) else 3
+    output_length = arguments.output_length
+    if output_length is None and largest is not None and arguments.radices is None and size == 2**input_length:
+        output_length = max(1, largest.bit_length())
+    elif output_length is None:
+        output_length = input_length
+    num_unique_symbols = arguments.symbols if arguments.symbols is not None else size
+    return input_length, output_length, num_unique_symbols
+
+
+def _print_record(record: dict, output: TextIO) -> None:
+    output.write(json.dumps(record) + "\n")
+    output.flush()
+
+
+def _iter_paths(paths: Iterable[str], pattern: str, stdin: TextIO) -> Iterator[tuple[str, Any, str | None]]:
+    """Yield (source, table or None, error) for every box in the files, directories and stdin ("-") given."""
+    from src.s_box_io import iter_s_box_files, read_s_box_tsv
+
+    for path in paths:
+        if path == "-":
+            yield from _iter_stream(stdin)
+        elif Path(path).is_dir():
+            for file_path, table in iter_s_box_files(path, pattern):
+                yield str(file_path), table, None
+        else:
+            yield path, read_s_box_tsv(path), None
+
+
+def _iter_stream(stream: TextIO) -> Iterator[tuple[str, Any, str | None]]:
+    """
+    Read boxes from a text stream, one at a time: tables (in any format ``parse_s_box`` reads) separated
+    by blank lines. Nothing beyond the current box is held in memory.
+    """
+    from src.s_box_parser import parse_s_box
+
+    block: list[str] = []
+    index = 0
+
+    def flush() -> Iterator[tuple[str, Any, str | None]]:
+        nonlocal index
+        table, error = parse_s_box("".join(block), allow_duplicates=True)
+        block.clear()
+        index += 1
+        yield f"<stdin>:{index}", table, error
+
+    for line in stream:
+        if line.strip():
+            block.append(line)
+        elif block:
+            yield from flush()
+    if block:
+        yield from flush()
+
+
+def _record(source: str, shape: tuple[int, int, int], metrics: dict) -> dict:
+    input_length, output_length, num_unique_symbols = shape
+    return {
+        "source": source,
+        "input_length": input_length,
+        "output_length": output_length,
+        "num_unique_symbols": num_unique_symbols,
+        **metrics,
+    }
+
+
+def _evaluate_entry(entry: tuple[str, Any, str | None], options: dict) -> tuple[dict, Any]:
+    """Score one (source, table, parse error) entry; returns the output record and the flattened box."""
+    from src.evaluate_s_box import evaluate_flat_s_box, flatten_s_box, resolve_radices
+
+    source, table, error = entry
+    if table is None:
+        return {"source": source, "error": error}, None
+    try:
+        values = flatten_s_box(table)
+    except ValueError as exception:
+        return {"source": source, "error": str(exception)}, None
+    shape = _shape_for(options["shape"], len(values), int(values.max()) if len(values) else None)
+    radices = resolve_radices(len(values), shape[0], shape[2], options["shape"].radices)
+    try:
+        metrics = evaluate_flat_s_box(
+            values, shape[0], shape[1], options["max_uniformity"], radices, **options["flags"]
+        )
+    except (ValueError, IndexError) as exception:
+        return {"source": source, "error": str(exception)}, None
+    return _record(source, shape, metrics), values
+
+
+def _batches(entries: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _evaluate_in_parallel(entries: Iterator, options: dict, workers: int) -> Iterator[tuple[dict, Any]]:
+    """
+    ``_evaluate_entry`` for every entry, in order, on ``evaluate_s_boxes_in_parallel``'s shared-memory pool.
+
+    Entries are read ``_PARALLEL_BATCH`` at a time, so a stream on stdin is never held in memory whole.
+    """
+    from src.evaluate_pool import evaluate_s_boxes_in_parallel
+    from src.s_box import SBox
+
+    for batch in _batches(entries, _PARALLEL_BATCH):
+        results: list[tuple[dict, Any] | None] = [None] * len(batch)
+        groups: dict[tuple[int, int, int], list[tuple[int, SBox]]] = {}
+        for position, (source, table, error) in enumerate(batch):
+            if table is None:
+                results[position] = {"source": source, "error": error}, None
+                continue
+            try:
+                s_box = SBox(table)
+            except ValueError as exception:
+                results[position] = {"source": source, "error": str(exception)}, None
+                continue
+            shape = _shape_for(options["shape"], len(s_box), int(s_box.values.max()) if len(s_box) else None)
+            groups.setdefault(shape, []).append((position, s_box))
+
+        for shape, members in groups.items():
+            try:
+                scored = list(
+                    evaluate_s_boxes_in_parallel(
+                        [s_box for _, s_box in members],
+                        shape[0],
+                        shape[1],
+                        shape[2],
+                        max_workers=workers,
+                        max_allowed_uniformity=options["max_uniformity"],
+                        radices=options["shape"].radices,
+                        **options["flags"],
+                    )
+                )
+            except (ValueError, IndexError):
+                # A malformed box aborts its whole group; rescore it box by box for per-box error records
+                for position, _ in members:
+                    results[position] = _evaluate_entry(batch[position], options)
+                continue
+            for index, metrics in scored:
+                position, s_box = members[index]
+                results[position] = _record(batch[position][0], shape, metrics), s_box.values
+        for result in results:
+            assert result is not None
+            yield result
+
+
+def _store_record(store: Any, values: Any, record: dict, **provenance) -> None:
+    store.add(
+        values,
+        record["input_length"],
+        record["output_length"],
+        record["num_unique_symbols"],
+        metrics=record,
+        **provenance,
+    )
+
+
+def run_evaluate(arguments: argparse.Namespace, stdin: TextIO, stdout: TextIO) -> int:
+    from contextlib import nullcontext
+
+    from src.candidate_store import CandidateStore
+
+    options = {
+        "shape": argparse.Namespace(
+            input_length=arguments.input_length,
+            output_length=arguments.output_length,
+            symbols=arguments.symbols,
+            radices=arguments.radices,
+        ),
+        "max_uniformity": arguments.max_uniformity,
+        "flags": {
+            "connectivity_tables": arguments.connectivity,
+            "streaming": arguments.streaming,
+            "avalanche": arguments.avalanche,
+            "algebraic": arguments.degree,
+        },
+    }
+    entries = _iter_paths(arguments.paths, arguments.pattern, stdin)
+    if arguments.workers > 1:
+        results = _evaluate_in_parallel(entries, options, arguments.workers)
+    else:
+        results = (_evaluate_entry(entry, options) for entry in entries)
+    failures = 0
+    with CandidateStore(arguments.store) if arguments.store else nullcontext() as store:
+        for record, values in results:
+            failures += "error" in record
+            if store is not None and values is not None:
+                _store_record(store, values, record, source=record["source"])
+            _print_record(record, stdout)
+    return 1 if failures else 0
+
+
+def run_generate(arguments: argparse.Namespace, stdin: TextIO, stdout: TextIO) -> int:
+    import asyncio
+    from contextlib import nullcontext
+
+    from src.candidate_store import CandidateStore
+    from src.s_box_parser import parse_s_box
+    from src.utils import agenerate_s_boxes, create_multi_box_user_prompt, generate_s_boxes_per_response
+
+    shape = _shape_for(arguments, arguments.symbols)
+    input_length, output_length, num_unique_symbols = shape
+    prompt = create_multi_box_user_prompt(*shape, arguments.boxes_per_response)
+    entries = []
+
+    async def collect() -> None:
+        responses = agenerate_s_boxes(
+            shape, n=arguments.count, concurrency=arguments.concurrency, model=arguments.model, host=arguments.host
+        )
+        async for response_text in responses:
+            table, error = parse_s_box(
+                response_text, expected_cells=num_unique_symbols, allow_duplicates=output_length < input_length
+            )
+            entries.append((f"{arguments.model}:{len(entries) + 1}", table, error))
+
+    if arguments.boxes_per_response > 1:
+        tables, report = generate_s_boxes_per_response(
+            *shape,
+            boxes_per_response=arguments.boxes_per_response,
+            responses=-(-arguments.count // arguments.boxes_per_response),
+            model_id=arguments.model,
+            keep_alive=arguments.keep_alive,
+            expected_cells=num_unique_symbols,
+            allow_duplicates=output_length < input_length,
+            host=arguments.host,
+        )
+        entries = [(f"{arguments.model}:{index + 1}", table, None) for index, table in enumerate(tables)]
+        sys.stderr.write(json.dumps(report) + "\n")
+    else:
+        asyncio.run(collect())
+
+    # Score every box at the requested shape rather than one inferred from what the model returned
+    options = {
+        "shape": argparse.Namespace(
+            input_length=input_length,
+            output_length=output_length,
+            symbols=num_unique_symbols,
+            radices=arguments.radices,
+        ),
+        "max_uniformity": None,
+        "flags": {},
+    }
+    failures = 0
+    with CandidateStore(arguments.store) if arguments.store else nullcontext() as store:
+        for entry in entries:
+            record, values = _evaluate_entry(entry, options)
+            failures += "error" in record
+            if values is not None:
+                record["table"] = entry[1]
+                if store is not None:
+                    _store_record(store, values, record, model=arguments.model, prompt=prompt)
+            _print_record(record, stdout)
+    return 1 if failures == len(entries) else 0
+
+
+def run_search(arguments: argparse.Namespace, stdin: TextIO, stdout: TextIO) -> int:
+    from contextlib import nullcontext
+
+    from src.candidate_store import CandidateStore
+    from src.evaluate_s_box import flatten_s_box
+    from src.search_s_box import search_s_box_for
+
+    input_length, output_length, num_unique_symbols = _shape_for(arguments, arguments.symbols)
+    seeds = [table for _, table, _ in _iter_paths(arguments.seeds, "*.tsv", stdin) if table is not None]
+    if arguments.algebraic:
+        from src.finite_field import generate_field_s_boxes_for
+
+        field_boxes = generate_field_s_boxes_for(
+            input_length, output_length, num_unique_symbols, count=arguments.restarts, random_seed=arguments.random_seed
+        )
+        seeds.extend(table for table, _ in field_boxes)
+
+    results = search_s_box_for(
+        input_length,
+        output_length,
+        num_unique_symbols,
+        seeds=seeds or None,
+        restarts=arguments.restarts,
+        iterations=arguments.iterations,
+        top_k=arguments.top_k,
+        max_workers=arguments.workers,
+        random_seed=arguments.random_seed,
+        radices=arguments.radices,
+    )
+    with CandidateStore(arguments.store) if arguments.store else nullcontext() as store:
+        for table, metrics in results:
+            record = {
+                "input_length": input_length,
+                "output_length": output_length,
+                "num_unique_symbols": num_unique_symbols,
+                **metrics,
+                "table": table,
+            }
+            if store is not None:
+                _store_record(store, flatten_s_box(table), record, source="search", seed=arguments.random_seed)
+            _print_record(record, stdout)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ai-s-box", description="Evaluate, generate and search S-boxes.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    evaluate = subcommands.add_parser("evaluate", help="score S-box files, directories or a stream on stdin")
+    evaluate.add_argument("paths", nargs="+", help='S-box files, directories of them, or "-" for boxes on stdin')
+    evaluate.add_argument("--pattern", default="*.tsv", help="file pattern inside directories")
+    evaluate.add_argument("--workers", type=int, default=1, help="evaluation processes")
+    evaluate.add_argument("--max-uniformity", type=int, help="reject early once a DDT entry exceeds this")
+    evaluate.add_argument("--connectivity", action="store_true", help="also report BCT / DLCT uniformity")
+    evaluate.add_argument("--avalanche", action="store_true", help="also report SAC, BIC and autocorrelation")
+    evaluate.add_argument("--degree", action="store_true", help="also report algebraic and min component degree")
+    evaluate.add_argument("--streaming", action="store_true", help="O(2^n) memory, plus value histograms")
+    _add_shape_arguments(evaluate, required=False)
+    _add_store_argument(evaluate)
+    evaluate.set_defaults(handler=run_evaluate)
+
+    generate = subcommands.add_parser("generate", help="ask an ollama model for S-boxes and score them")
+    _add_shape_arguments(generate, required=True)
+    generate.add_argument("--count", type=int, default=1, help="number of boxes to request")
+    generate.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    generate.add_argument("--model", default="mistral", help="ollama model name")
+    generate.add_argument("--host", help="ollama server URL")
+    generate.add_argument(
+        "--boxes-per-response", type=int, default=1, help="boxes asked for per response; >1 prints a cost report"
+    )
+    generate.add_argument("--keep-alive", default="10m", help="keep the model loaded this long between responses")
+    _add_store_argument(generate)
+    generate.set_defaults(handler=run_generate)
+
+    search = subcommands.add_parser("search", help="local search for good S-boxes")
+    _add_shape_arguments(search, required=True)
+    search.add_argument("--seeds", nargs="*", default=[], help='seed box files, directories, or "-" for stdin')
+    search.add_argument("--algebraic", action="store_true", help="also seed from finite-field power maps")
+    search.add_argument("--restarts", type=int, default=4, help="independent searches")
+    search.add_argument("--iterations", type=int, default=5000, help="swaps tried per restart")
+    search.add_argument("--top-k", type=int, default=1, help="number of boxes to print")
+    search.add_argument("--workers", type=int, help="worker processes (defaults to the CPU count)")
+    search.add_argument("--random-seed", type=int, default=0)
+    _add_store_argument(search)
+    search.set_defaults(handler=run_search)
+    return parser
+
+
+def main(argv: list[str] | None = None, stdin: TextIO | None = None, stdout: TextIO | None = None) -> int:
+    """
+    Run the command line; returns the exit status.
+
+    ``evaluate`` exits with 1 when any box could not be scored, ``generate`` when none could. With
+    ``--boxes-per-response``, ``generate`` also writes the token / timing report of
+    ``generate_s_boxes_per_response`` to stderr.
+    """
+    arguments = build_parser().parse_args(argv)
+    return arguments.handler(arguments, stdin or sys.stdin, stdout or sys.stdout)
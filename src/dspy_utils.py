@@ -14,7 +14,8 @@ from typing import Any
 from dspy.teleprompt import BootstrapFewShot
 import dspy
 
-from src.evaluate_s_box import evaluate_s_box
+from src.s_box_metric import SBoxMetric
+from src.sandbox_pool import SandboxPool
 
 
 class CryptographicSBoxQA(dspy.Signature):
@@ -44,9 +45,30 @@ class CryptographicSBoxModule(dspy.Module):
         return dspy.Prediction(context=context, answer=prediction.answer)
 
 
-def build_s_box_teleprompter(train_set: Any) -> Any:  # ToDo: Determine actual types & tighten signature
-    # Set up a basic teleprompter, which will compile our AI program.
-    teleprompter = BootstrapFewShot(metric=evaluate_s_box)
+# ToDo: Determine actual types & tighten signature
+def build_s_box_teleprompter(
+    train_set: Any,
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    metric: SBoxMetric | None = None,
+) -> Any:
+    """
+    Compile ``CryptographicSBoxModule`` with ``BootstrapFewShot``.
+
+    The examples only carry a ``question``, so the metric takes the box shape from these arguments. Its
+    answers are python3 functions, so they run in a ``SandboxPool`` before their tables are scored. When
+    no metric is given, one is created (with its process and sandbox pools) and closed after compiling;
+    a metric passed in is left open, e.g. to reuse with dspy.Evaluate(num_threads=...) afterwards.
+    """
+    if metric is not None:
+        return BootstrapFewShot(metric=metric).compile(CryptographicSBoxModule(), trainset=train_set)
 
-    compiled_s_box_program = teleprompter.compile(CryptographicSBoxModule(), trainset=train_set)  # Compile!
+    with (
+        SandboxPool() as sandbox,
+        SBoxMetric(input_length, output_length, num_unique_symbols, sandbox=sandbox) as default_metric,
+    ):
+        # Set up a basic teleprompter, which will compile our AI program.
+        teleprompter = BootstrapFewShot(metric=default_metric)
+        compiled_s_box_program = teleprompter.compile(CryptographicSBoxModule(), trainset=train_set)  # Compile!
     return compiled_s_box_program
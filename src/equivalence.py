@@ -0,0 +1,154 @@
+"""
+Equivalence-aware identification of S-boxes, to skip re-scoring boxes already seen.
+
+Two levels are provided:
+
+  * ``translation_canonical_form``: an exact canonical representative under input and output XOR
+    masks, S'(x) = S(x ^ a) ^ b. For boxes that take every n_out-bit output (bijective and balanced
+    ones), every metric ``evaluate_s_box`` reports is invariant under these masks, so boxes with the
+    same canonical form can share one evaluation (see ``has_mask_invariant_metrics``). Finding it is
+    usually a few O(2^n) passes: candidate masks are pruned one output position at a time.
+  * ``invariant_fingerprint``: a hash of affine-equivalence invariants, namely the DDT and |Walsh| value
+    spectra and the degree distribution of the component functions. Affine equivalent boxes
+    (A(S(B(x) ^ a)) ^ b for invertible linear A, B) always share it. Boxes that are not equivalent
+    rarely do, which makes it a good count of truly distinct candidates. It costs about one
+    evaluation.
+
+A full linear-equivalence canonical form (lexicographically smallest A S B over GL(n)^2) is not
+computed; it costs far more than scoring the box.
+"""
+
+import hashlib
+
+import numpy as np
+
+from src.evaluate_s_box import (
+    _component_degrees,
+    _fast_mobius,
+    compute_ddt_and_uniformity,
+    flatten_s_box,
+    walsh_spectrum,
+)
+from src.s_box import SBox
+
+
+def translation_canonical_form(sbox) -> np.ndarray:
+    """
+    Lexicographically smallest S(x ^ a) ^ S(a) over all input masks a.
+
+    Any output mask b is absorbed by making the first entry 0, so S(x ^ a) ^ b for all a, b share the
+    result. The candidate masks are narrowed column by column: only those reaching the smallest value
+    at position x survive to x + 1.
+
+    :param sbox: flat sequence (or SBox) of integer outputs, sbox[x] for x in [0, 2^n)
+    :return: the canonical table as an int64 array
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = len(values)
+    if size & (size - 1):
+        raise ValueError(f"XOR masks need a power-of-two domain, got {size} entries")
+    candidates = np.arange(size, dtype=np.int64)
+    for x in range(1, size):
+        if len(candidates) == 1:
+            break
+        column = values[candidates ^ x] ^ values[candidates]
+        candidates = candidates[column == column.min()]
+    mask = int(candidates[0])
+    return values[np.arange(size, dtype=np.int64) ^ mask] ^ values[mask]
+
+
+def has_mask_invariant_metrics(sbox, n_out: int) -> bool:
+    """
+    True if ``evaluate_s_box`` scores every S(x ^ a) ^ b the same as S: the box takes every n_out-bit value.
+
+    ``walsh_spectrum`` only keeps output masks up to the largest output seen, and an output mask b can
+    move that maximum, so boxes that miss some outputs can score differently after masking (a 4-bit box
+    with 3-bit outputs and the same box ^ 8, for one).
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size_out = 2**n_out
+    if len(values) == 0 or values.min() < 0 or values.max() >= size_out:
+        return False
+    return bool((np.bincount(values, minlength=size_out) > 0).all())
+
+
+def equivalence_key(sbox) -> str:
+    """SHA-256 of the translation canonical form; equal for boxes that differ only by XOR masks."""
+    return hashlib.sha256(np.ascontiguousarray(translation_canonical_form(sbox), dtype="<u4").tobytes()).hexdigest()
+
+
+def invariant_fingerprint(sbox, n_in: int, n_out: int) -> str:
+    """
+    SHA-256 of affine-equivalence invariants of an n_in->n_out bit S-box.
+
+    Hashes the histogram of DDT entries over dx != 0, the histogram of |W(alpha, beta)| over beta != 0 and
+    the histogram of component degrees over beta != 0. Each of these multisets is unchanged by
+    invertible affine maps on either side, as long as every one of the 2^n_out output masks is counted:
+    the Walsh columns are not cut at the largest output, which an output map moves.
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = 2**n_in
+    ddt, _ = compute_ddt_and_uniformity(values, n_in, n_out)
+    walsh = walsh_spectrum(values, n_in, n_out, all_output_masks=True)
+    degrees = _component_degrees(_fast_mobius(values.copy()), n_in, n_out)[1:]
+
+    digest = hashlib.sha256(f"{n_in},{n_out};".encode())
+    for histogram in (
+        np.bincount(ddt[1:].ravel(), minlength=size + 1),
+        np.bincount(np.abs(walsh[:, 1:]).ravel(), minlength=size + 1),
+        np.bincount(degrees, minlength=n_in + 1),
+    ):
+        digest.update(np.ascontiguousarray(histogram, dtype="<u8").tobytes())
+        digest.update(b";")
+    return digest.hexdigest()
+
+
+class CandidateDeduplicator:
+    """
+    Tracks which candidates of one generation run are new up to equivalence.
+
+    ``add`` returns True the first time a translation-equivalence class is seen. With
+    ``fingerprints=True`` it also counts the affine-invariant classes (``fingerprint_classes``), which
+    is the better estimate of how many truly distinct boxes a run produced.
+    """
+
+    def __init__(self, n_in: int, n_out: int, fingerprints: bool = False):
+        """
+        :param n_in: number of bits in the input
+        :param n_out: number of bits in the output
+        :param fingerprints: also compute ``invariant_fingerprint`` for every new class
+        """
+        self.n_in = n_in
+        self.n_out = n_out
+        self.fingerprints = fingerprints
+        self.seen = 0
+        self._keys: set[str] = set()
+        self._fingerprints: set[str] = set()
+
+    def add(self, s_box: "list[list[str]] | SBox | np.ndarray") -> bool:
+        """Record a candidate (table, SBox or flat outputs); True if no equivalent box was added before."""
+        values = s_box if isinstance(s_box, np.ndarray) else flatten_s_box(s_box)
+        self.seen += 1
+        key = equivalence_key(values)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        if self.fingerprints:
+            self._fingerprints.add(invariant_fingerprint(values, self.n_in, self.n_out))
+        return True
+
+    @property
+    def distinct(self) -> int:
+        return len(self._keys)
+
+    @property
+    def fingerprint_classes(self) -> int | None:
+        return len(self._fingerprints) if self.fingerprints else None
+
+    def report(self) -> dict:
+        return {
+            "seen": self.seen,
+            "distinct": self.distinct,
+            "duplicates": self.seen - self.distinct,
+            "fingerprint_classes": self.fingerprint_classes,
+        }
@@ -0,0 +1,187 @@
+"""
+Multi-process evaluation of large candidate sets.
+
+Candidates are flattened once in the parent and packed back to back into one shared-memory integer
+buffer (plus an offsets buffer), so workers read their slice in place instead of unpickling nested
+string lists. Work is handed out in guided chunks: big chunks while plenty of candidates remain,
+shrinking towards ``min_chunk_size`` near the end so no worker sits idle while another finishes a
+large tail. Results stream back in completion order.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Iterable, Iterator
+import math
+import os
+
+import numpy as np
+
+from src.evaluate_s_box import evaluate_flat_s_box, flatten_s_box, resolve_radices
+from src.s_box import SBox
+from src.s_box_io import iter_s_box_files
+
+# Per-worker views of the shared candidate buffers, set up once by _attach_candidates
+_worker_memory: list[shared_memory.SharedMemory] = []
+_worker_values: np.ndarray | None = None
+_worker_offsets: np.ndarray | None = None
+
+
+def _attach_candidates(values_name: str, values_dtype: str, values_count: int, offsets_name: str, count: int) -> None:
+    global _worker_values, _worker_offsets
+    values_memory = shared_memory.SharedMemory(name=values_name)
+    offsets_memory = shared_memory.SharedMemory(name=offsets_name)
+    _worker_memory.extend([values_memory, offsets_memory])
+    _worker_values = np.ndarray((values_count,), dtype=values_dtype, buffer=values_memory.buf)
+    _worker_offsets = np.ndarray((count + 1,), dtype=np.int64, buffer=offsets_memory.buf)
+
+
+def _evaluate_chunk(
+    start: int,
+    stop: int,
+    num_input_length: int,
+    num_output_length: int,
+    num_unique_symbols: int | None,
+    max_allowed_uniformity: int | None,
+    radices: tuple[int, ...] | None,
+    evaluate_options: dict,
+) -> list[tuple[int, dict]]:
+    assert _worker_values is not None and _worker_offsets is not None
+    results = []
+    for index in range(start, stop):
+        flat_s_box = _worker_values[_worker_offsets[index] : _worker_offsets[index + 1]]
+        box_radices = radices
+        if num_unique_symbols is not None:
+            # Per box, like evaluate_s_box: q^k-entry boxes are scored as q-ary ones
+            box_radices = resolve_radices(len(flat_s_box), num_input_length, num_unique_symbols, radices)
+        metrics = evaluate_flat_s_box(
+            flat_s_box, num_input_length, num_output_length, max_allowed_uniformity, box_radices, **evaluate_options
+        )
+        results.append((index, metrics))
+    return results
+
+
+def _pack_into_shared_memory(array: np.ndarray) -> shared_memory.SharedMemory:
+    # SharedMemory refuses zero-sized blocks
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory
+
+
+def evaluate_s_boxes_in_parallel(
+    s_boxes: Iterable["list[list[str]] | SBox"],
+    num_input_length: int,
+    num_output_length: int,
+    num_unique_symbols: int | None = None,
+    max_workers: int | None = None,
+    min_chunk_size: int = 1,
+    max_allowed_uniformity: int | None = None,
+    radices: tuple[int, ...] | None = None,
+    encoding: str | None = None,
+    alphabet: str | None = None,
+    **evaluate_options: bool,
+) -> Iterator[tuple[int, dict]]:
+    """
+    Evaluate many S-boxes across a process pool, yielding (index, metrics) as each chunk completes.
+
+    :param s_boxes: 2D tables of output symbols or parsed SBoxes, as accepted by ``evaluate_s_box``
+    :param num_input_length: number of bits in the input
+    :param num_output_length: number of bits in the output
+    :param num_unique_symbols: total unique symbols possible in the output alphabet; boxes that aren't
+        2^num_input_length long but have this many entries get their radices inferred, as in ``evaluate_s_box``
+    :param max_workers: number of worker processes (defaults to the CPU count)
+    :param min_chunk_size: smallest number of candidates handed to a worker at once
+    :param max_allowed_uniformity: forwarded to ``evaluate_flat_s_box`` for early rejection
+    :param radices: forwarded to ``evaluate_flat_s_box`` to score q-ary / mixed-radix boxes
+    :param encoding: symbol encoding of the tables (see ``SBox``); detected per table when omitted
+    :param alphabet: digits of a positional alphabet, for the "alphabet" encoding
+    :param evaluate_options: ``connectivity_tables``, ``streaming``, ``avalanche`` and ``algebraic``, forwarded to
+        ``evaluate_flat_s_box``
+    :return: iterator of (index into s_boxes, metrics dict), in completion order
+    """
+    flat_s_boxes = [flatten_s_box(s_box, encoding, alphabet) for s_box in s_boxes]
+    count = len(flat_s_boxes)
+    if count == 0:
+        return
+
+    lengths = np.fromiter((len(flat_s_box) for flat_s_box in flat_s_boxes), dtype=np.int64, count=count)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    values = np.concatenate(flat_s_boxes).astype(np.int64)
+    # Keep the shared buffer compact: uint16 covers every box up to 16-bit outputs
+    values = values.astype(np.min_scalar_type(int(values.max()) if len(values) else 0))
+    del flat_s_boxes
+
+    max_workers = max_workers or os.cpu_count() or 1
+    values_memory = _pack_into_shared_memory(values)
+    offsets_memory = _pack_into_shared_memory(offsets)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_candidates,
+            initargs=(values_memory.name, values.dtype.str, len(values), offsets_memory.name, count),
+        ) as executor:
+            next_start = 0
+            pending: set[Future] = set()
+
+            def submit_next_chunk() -> None:
+                nonlocal next_start
+                remaining = count - next_start
+                # Guided scheduling: a quarter of each worker's fair share of what's left
+                chunk_size = max(min_chunk_size, math.ceil(remaining / (4 * max_workers)))
+                stop = min(count, next_start + chunk_size)
+                pending.add(
+                    executor.submit(
+                        _evaluate_chunk,
+                        next_start,
+                        stop,
+                        num_input_length,
+                        num_output_length,
+                        num_unique_symbols,
+                        max_allowed_uniformity,
+                        radices,
+                        evaluate_options,
+                    )
+                )
+                next_start = stop
+
+            # Two chunks in flight per worker, so a worker never waits on the parent for its next one
+            while next_start < count and len(pending) < 2 * max_workers:
+                submit_next_chunk()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if next_start < count:
+                        submit_next_chunk()
+                    yield from future.result()
+    finally:
+        for memory in (values_memory, offsets_memory):
+            memory.close()
+            memory.unlink()
+
+
+def evaluate_directory_in_parallel(
+    directory: str | Path,
+    num_input_length: int,
+    num_output_length: int,
+    num_unique_symbols: int | None = None,
+    pattern: str = "*.tsv",
+    max_workers: int | None = None,
+    max_allowed_uniformity: int | None = None,
+    radices: tuple[int, ...] | None = None,
+) -> Iterator[tuple[Path, dict]]:
+    """Evaluate every S-box file in ``directory``, yielding (path, metrics) in completion order."""
+    paths, s_boxes = [], []
+    for path, s_box in iter_s_box_files(directory, pattern):
+        paths.append(path)
+        s_boxes.append(s_box)
+
+    for index, metrics in evaluate_s_boxes_in_parallel(
+        s_boxes,
+        num_input_length,
+        num_output_length,
+        num_unique_symbols,
+        max_workers=max_workers,
+        max_allowed_uniformity=max_allowed_uniformity,
+        radices=radices,
+    ):
+        yield paths[index], metrics
@@ -0,0 +1,271 @@
+"""
+Metrics for S-boxes over Z_q^k and mixed-radix domains such as Z_5 x Z_5 x Z_6.
+
+An input index x in [0, r_1 * ... * r_k) is read as its mixed-radix digits (x_1, ..., x_k), with the
+last digit varying fastest (the same order as ``numpy.unravel_index``), and outputs are read the same
+way over the output radices. Differences are taken digit-wise modulo each radix, and the linear
+table uses the additive characters chi_u(x) = exp(2*pi*i * sum(u_j * x_j / r_j)).
+"""
+
+from typing import Iterator
+import math
+
+import numpy as np
+
+
+def infer_radices(domain_size: int, num_characters: int) -> tuple[int, ...] | None:
+    """Return (q,) * num_characters if domain_size == q ** num_characters for an integer q >= 2, else None."""
+    if num_characters < 1 or domain_size < 2:
+        return None
+    q = round(domain_size ** (1 / num_characters))
+    for candidate in (q - 1, q, q + 1):
+        if candidate >= 2 and candidate**num_characters == domain_size:
+            return (candidate,) * num_characters
+    return None
+
+
+def _digits(values: np.ndarray, radices: tuple[int, ...]) -> np.ndarray:
+    """Mixed-radix digits of each value, shape (len(values), len(radices))."""
+    return np.stack(np.unravel_index(values, radices), axis=-1).astype(np.int64)
+
+
+def _strides(radices: tuple[int, ...]) -> np.ndarray:
+    return np.array([math.prod(radices[axis + 1 :]) for axis in range(len(radices))], dtype=np.int64)
+
+
+def _check_domain(values: np.ndarray, radices: tuple[int, ...], output_radices: tuple[int, ...]) -> None:
+    if len(values) != math.prod(radices):
+        raise ValueError(f"Expected {math.prod(radices)} outputs for radices {radices}, got {len(values)}")
+    if len(values) and (values.min() < 0 or values.max() >= math.prod(output_radices)):
+        raise ValueError(f"S-box outputs must lie in [0, {math.prod(output_radices)})")
+
+
+def _modular_ddt_blocks(
+    values: np.ndarray, radices: tuple[int, ...], output_radices: tuple[int, ...]
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield (first row, block) for consecutive blocks of about 64k cells of the modular DDT."""
+    size = math.prod(radices)
+    out_size = math.prod(output_radices)
+    input_digits = _digits(np.arange(size), radices)
+    output_digits = _digits(values, output_radices)
+    input_strides = _strides(radices)
+    output_strides = _strides(output_radices)
+    block_rows = max(1, 2**16 // size)
+
+    for block_start in range(0, size, block_rows):
+        block_stop = min(block_start + block_rows, size)
+        rows = block_stop - block_start
+        # shifted[a, x] = index of x + a
+        shifted = np.zeros((rows, size), dtype=np.int64)
+        for axis, radix in enumerate(radices):
+            column = (input_digits[block_start:block_stop, axis, None] + input_digits[None, :, axis]) % radix
+            shifted += column * input_strides[axis]
+        # cells[a, x] = a * N_out + index of S(x + a) - S(x)
+        cells = (np.arange(rows, dtype=np.int64) * out_size)[:, None].repeat(size, axis=1)
+        for axis, radix in enumerate(output_radices):
+            cells += ((output_digits[shifted, axis] - output_digits[None, :, axis]) % radix) * output_strides[axis]
+        yield block_start, np.bincount(cells.ravel(), minlength=rows * out_size).reshape(rows, out_size)
+
+
+def compute_modular_ddt_and_uniformity(
+    sbox,
+    radices: tuple[int, ...],
+    output_radices: tuple[int, ...] | None = None,
+    max_allowed_uniformity: int | None = None,
+) -> tuple[np.ndarray, int]:
+    """
+    Compute the modular-difference distribution table and its differential uniformity in one pass.
+
+    ``ddt[a, b]`` counts the inputs x with S(x + a) - S(x) = b, digit-wise modulo the radices. Rows are
+    produced a block of input differences at a time with a single ``bincount`` per block, like
+    ``compute_ddt_and_uniformity`` in the binary case, including the optional early exit.
+
+    :param sbox: flat sequence of integer outputs, sbox[x] for x in [0, prod(radices))
+    :param radices: radix of each input digit, e.g. (5, 5, 5) or (5, 5, 6)
+    :param output_radices: radix of each output digit (defaults to ``radices``)
+    :param max_allowed_uniformity: stop as soon as a row holds an entry above this value
+    :return: (ddt, max_ddt_entry) with ddt a dense (N_in, N_out) uint16/uint32 matrix
+    """
+    output_radices = output_radices or radices
+    values = np.asarray(sbox, dtype=np.int64)
+    _check_domain(values, radices, output_radices)
+    size = math.prod(radices)
+    out_size = math.prod(output_radices)
+    dtype = np.uint16 if size <= np.iinfo(np.uint16).max else np.uint32
+
+    ddt = np.zeros((size, out_size), dtype=dtype)
+    max_ddt_entry = 0
+    for block_start, block in _modular_ddt_blocks(values, radices, output_radices):
+        ddt[block_start : block_start + len(block)] = block
+
+        nontrivial = block[1:] if block_start == 0 else block
+        if nontrivial.size:
+            max_ddt_entry = max(max_ddt_entry, int(nontrivial.max()))
+        if max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity:
+            break
+
+    return ddt, max_ddt_entry
+
+
+def modular_differential_spectrum(
+    sbox,
+    radices: tuple[int, ...],
+    output_radices: tuple[int, ...] | None = None,
+    max_allowed_uniformity: int | None = None,
+) -> tuple[np.ndarray, int]:
+    """
+    Value histogram of the modular DDT rows a != 0, without holding the table.
+
+    The q-ary counterpart of ``differential_spectrum``: ``histogram[v]`` counts the cells with
+    ddt[a, b] = v and a != 0, and the rows are dropped block by block.
+
+    :return: (histogram, max_ddt_entry), the same max_ddt_entry as ``compute_modular_ddt_and_uniformity``
+    """
+    output_radices = output_radices or radices
+    values = np.asarray(sbox, dtype=np.int64)
+    _check_domain(values, radices, output_radices)
+    size = math.prod(radices)
+    histogram = np.zeros(size + 1, dtype=np.int64)
+    max_ddt_entry = 0
+    for block_start, block in _modular_ddt_blocks(values, radices, output_radices):
+        nontrivial = block[1:] if block_start == 0 else block
+        if nontrivial.size:
+            histogram += np.bincount(nontrivial.ravel(), minlength=size + 1)
+            max_ddt_entry = max(max_ddt_entry, int(nontrivial.max()))
+        if max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity:
+            break
+    return histogram, max_ddt_entry
+
+
+def _character_lat_blocks(
+    values: np.ndarray, radices: tuple[int, ...], output_radices: tuple[int, ...], max_chunk_cells: int
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Yield (first output mask, (N_in, k) block) for consecutive column blocks of the character LAT."""
+    size = math.prod(radices)
+    out_size = math.prod(output_radices)
+
+    # Work in units of 1/L turns so every phase is an exact integer before the lookup
+    turns = math.lcm(*output_radices)
+    roots = np.exp(2j * np.pi * np.arange(turns) / turns)
+    output_digits = _digits(values, output_radices)
+    mask_digits = _digits(np.arange(out_size), output_radices)
+    weights = np.array([turns // radix for radix in output_radices], dtype=np.int64)
+
+    chunk = max(1, max_chunk_cells // size)
+    axes = tuple(range(1, len(radices) + 1))
+    for start in range(0, out_size, chunk):
+        masks = mask_digits[start : start + chunk]
+        # phase[v, x] = <v, S(x)> in 1/L turns
+        phase = ((masks * weights) @ output_digits.T) % turns
+        characters = roots[phase].reshape(len(masks), *radices)
+        yield start, np.fft.fftn(characters, axes=axes).reshape(len(masks), size).T
+
+
+def compute_character_lat(
+    sbox, radices: tuple[int, ...], output_radices: tuple[int, ...] | None = None, max_chunk_cells: int = 2**22
+) -> np.ndarray:
+    """
+    Compute the character-sum linear table of a q-ary / mixed-radix S-box.
+
+    ``lat[u, v] = sum over x of chi_v(S(x)) * conj(chi_u(x))``. For each output mask v, the column is
+    one multidimensional FFT (one axis per input radix) of chi_v(S(x)), so the whole table costs
+    O(N_out * N_in * log N_in) instead of the O(N_out * N_in^2) direct sum.
+
+    :return: complex (N_in, N_out) matrix
+    """
+    output_radices = output_radices or radices
+    values = np.asarray(sbox, dtype=np.int64)
+    _check_domain(values, radices, output_radices)
+    lat = np.empty((math.prod(radices), math.prod(output_radices)), dtype=np.complex128)
+    for start, block in _character_lat_blocks(values, radices, output_radices, max_chunk_cells):
+        lat[:, start : start + block.shape[1]] = block
+    return lat
+
+
+def max_character_magnitude(
+    sbox, radices: tuple[int, ...], output_radices: tuple[int, ...] | None = None, max_chunk_cells: int = 2**16
+) -> float:
+    """
+    Max |lat[u, v]| over v != 0, one block of output masks at a time (O(N_in) memory for the default
+    ``max_chunk_cells``). Matches the max ``evaluate_q_ary_s_box`` takes over ``compute_character_lat``.
+    """
+    output_radices = output_radices or radices
+    values = np.asarray(sbox, dtype=np.int64)
+    _check_domain(values, radices, output_radices)
+    max_magnitude = 0.0
+    for start, block in _character_lat_blocks(values, radices, output_radices, max_chunk_cells):
+        nontrivial = block[:, 1:] if start == 0 else block
+        if nontrivial.size:
+            max_magnitude = max(max_magnitude, float(np.abs(nontrivial).max()))
+    return max_magnitude
+
+
+def evaluate_q_ary_s_box(
+    sbox,
+    radices: tuple[int, ...],
+    output_radices: tuple[int, ...] | None = None,
+    max_allowed_uniformity: int | None = None,
+    streaming: bool = False,
+) -> dict:
+    """
+    Evaluate a flattened S-box over a Z_q^k or mixed-radix domain.
+
+    Reports the same metrics as ``evaluate_flat_s_box`` does for bitwise boxes, with XOR differences
+    replaced by modular differences and the Walsh-Hadamard transform replaced by character sums:
+
+      * ``max_ddt_entry``: max modular DDT entry over nonzero input differences
+      * ``max_linear_correlation``: max |lat[u, v]| over nonzero output masks v, divided by N_in
+      * ``is_bent``: every |lat[u, v]| with v != 0 equals sqrt(N_in) (the generalized bent bound)
+
+    With ``streaming=True`` neither table is kept: the scores are the same, and ``differential_spectrum``
+    (see ``modular_differential_spectrum``) is reported as well.
+    """
+    output_radices = output_radices or radices
+    values = np.asarray(sbox, dtype=np.int64)
+    domain_size = len(values)
+    expected_domain_size = math.prod(radices)
+    domain_consistency = domain_size == expected_domain_size
+    max_output_value = int(values.max()) if domain_size else 0
+    range_consistency = max_output_value < math.prod(output_radices)
+
+    differential_histogram = None
+    max_ddt_entry = 0
+    uniformity_exceeded = False
+    if domain_consistency and range_consistency:
+        if streaming:
+            differential_histogram, max_ddt_entry = modular_differential_spectrum(
+                values, radices, output_radices, max_allowed_uniformity
+            )
+        else:
+            _, max_ddt_entry = compute_modular_ddt_and_uniformity(
+                values, radices, output_radices, max_allowed_uniformity
+            )
+        uniformity_exceeded = max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity
+
+    max_linear_correlation = None
+    bent_flag = False
+    if domain_consistency and range_consistency and not uniformity_exceeded:
+        if streaming:
+            max_magnitude = max_character_magnitude(values, radices, output_radices)
+        else:
+            lat = compute_character_lat(values, radices, output_radices)
+            max_magnitude = float(np.abs(lat[:, 1:]).max()) if lat.shape[1] > 1 else 0.0
+        max_linear_correlation = max_magnitude / domain_size
+        bent_flag = math.prod(output_radices) > 1 and abs(max_magnitude - math.sqrt(domain_size)) < 1e-6
+
+    results = {
+        "domain_size": domain_size,
+        "expected_domain_size": expected_domain_size,
+        "domain_consistency": domain_consistency,
+        "range_consistency": range_consistency,
+        "max_ddt_entry": max_ddt_entry if domain_consistency and range_consistency else None,
+        "uniformity_exceeded": uniformity_exceeded,
+        "max_linear_correlation": max_linear_correlation,
+        "is_bent": bent_flag,
+        "radices": radices,
+    }
+    if streaming:
+        results["differential_spectrum"] = (
+            differential_histogram.tolist() if differential_histogram is not None else None
+        )
+    return results
@@ -1,54 +1,578 @@
-def compute_ddt(sbox, n_bits, num_output_length: int):
-    """Compute XOR-based difference distribution table for a bitwise S-box."""
+from functools import lru_cache
+from typing import Iterator
+import itertools
+import math
+
+import numpy as np
+
+from src.evaluate_q_ary_s_box import evaluate_q_ary_s_box, infer_radices
+from src.instrumentation import count, phase
+from src.s_box import SBox
+
+# Version of the metrics dict ``evaluate_s_box`` returns. Persistent caches key on it, so bump it whenever
+# a metric is added, removed or computed differently, or entries written before the change are served forever.
+EVALUATOR_VERSION = 2
+
+
+@lru_cache(maxsize=4)
+def _pair_representative_table(n_bits: int) -> np.ndarray:
+    halves = np.arange(2 ** (n_bits - 1), dtype=np.int64)[None, :]
+    top_bits = np.array([0] + [d.bit_length() - 1 for d in range(1, 2**n_bits)], dtype=np.int64)[:, None]
+    table = ((halves >> top_bits) << (top_bits + 1)) | (halves & ((1 << top_bits) - 1))
+    table.flags.writeable = False
+    return table
+
+
+def _pair_representatives(n_bits: int, start: int, stop: int) -> np.ndarray:
+    """
+    For each d in [start, stop) (rows), the y < y ^ d of every pair {y, y ^ d}: the indices of
+    [0, 2^(n_bits - 1)) with a zero bit inserted at d's top bit. Cached up to 10 bits, built per block above.
+    """
+    if n_bits <= 10:
+        return _pair_representative_table(n_bits)[start:stop]
+    halves = np.arange(2 ** (n_bits - 1), dtype=np.int64)[None, :]
+    top_bits = np.array([d.bit_length() - 1 for d in range(start, stop)], dtype=np.int64)[:, None]
+    return ((halves >> top_bits) << (top_bits + 1)) | (halves & ((1 << top_bits) - 1))
+
+
+def _inverse_permutation(values: np.ndarray) -> np.ndarray | None:
+    """S^-1 as an array, or None if ``values`` isn't a permutation of [0, len(values))."""
+    size = len(values)
+    if size == 0 or values.min() < 0 or values.max() >= size:
+        return None
+    inverse = np.full(size, -1, dtype=np.int64)
+    inverse[values] = np.arange(size, dtype=np.int64)
+    return inverse if (inverse >= 0).all() else None
+
+
+def compute_ddt_and_uniformity(
+    sbox, n_bits: int, num_output_length: int, max_allowed_uniformity: int | None = None
+) -> tuple[np.ndarray, int]:
+    """
+    Compute the XOR-based difference distribution table and its differential uniformity in one pass.
+
+    Rows are built a block at a time (see ``_ddt_blocks``): ``sbox ^ sbox[x ^ dx]`` over one input x
+    of every pair gives the output differences of the block, and a single ``bincount`` over (row offset
+    + dy) accumulates the whole block. The largest entry of the non-trivial rows (dx != 0) is tracked
+    as the rows are produced.
+
+    :param sbox: flat sequence of integer outputs, sbox[x] for x in [0, 2^n_bits)
+    :param n_bits: number of bits in the input
+    :param num_output_length: number of bits in the output
+    :param max_allowed_uniformity: if given, stop as soon as a row holds an entry above this value.
+        The rows after the offending block are left at zero.
+    :return: (ddt, max_ddt_entry), with ddt a dense uint16 (uint32 for n_bits >= 16) matrix
+    """
+    values = np.asarray(sbox, dtype=np.int64)
     size = 2**n_bits
     # range size could be up to 2^m
     # We'll index DDT as DDT[input_diff][output_diff].
     # We'll find the maximum possible output_diff by checking the S-box outputs.
-    max_sbox_out = max(sbox)
-    # but to be safe, let's assume up to 2^num_output_length
-    out_size = 2**num_output_length
+    max_sbox_out = int(values.max())
+    # XOR never leaves the smallest power of two that covers the outputs, so size the columns
+    # for 2^num_output_length or for the observed outputs, whichever is larger
+    out_size = 2 ** max(num_output_length, max_sbox_out.bit_length())
+    dtype = np.uint16 if size <= np.iinfo(np.uint16).max else np.uint32
 
-    ddt = [[0] * out_size for _ in range(size)]
+    ddt = np.zeros((size, out_size), dtype=dtype)
+    ddt[0, 0] = size
+    max_ddt_entry = 0
 
-    for x in range(size):
-        y = sbox[x]
-        for dx in range(size):
-            x2 = x ^ dx
-            y2 = sbox[x2]
-            dy = y ^ y2
-            ddt[dx][dy] += 1
+    for block_start, _, _, block in _ddt_blocks(values, n_bits, out_size):
+        ddt[block_start : block_start + len(block)] = block
 
+        # For differential uniformity, we look at the max count of nonzero input difference dx != 0
+        max_ddt_entry = max(max_ddt_entry, int(block.max()))
+        if max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity:
+            break
+
+    return ddt, max_ddt_entry
+
+
+def _ddt_blocks(
+    values: np.ndarray, n_bits: int, out_size: int
+) -> Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    The DDT rows dx != 0 a block at a time: (first dx, representatives, cells, counts).
+
+    Both inputs of a pair {x, x ^ dx} have the same output difference, so every row is counted over one
+    representative x < x ^ dx per pair (see ``_pair_representatives``) and doubled, which halves the
+    gathers. ``cells[row, i]`` is S(x) ^ S(x ^ dx) for x = ``representatives[row, i]``, offset by
+    row * out_size: the flat index into ``counts`` (rows x out_size) it was counted in. A block spans
+    at most 2^16 cells of the table, so the scratch arrays stay small.
+    """
+    size = 2**n_bits
+    block_rows = max(1, 2**16 // out_size)
+    for block_start in range(1, size, block_rows):
+        block_stop = min(block_start + block_rows, size)
+        dxs = np.arange(block_start, block_stop, dtype=np.int64)
+        representatives = _pair_representatives(n_bits, block_start, block_stop)
+        cells = values[representatives] ^ values[representatives ^ dxs[:, None]]
+        cells += (np.arange(len(dxs), dtype=np.int64) * out_size)[:, None]
+        block = 2 * np.bincount(cells.ravel(), minlength=len(dxs) * out_size).reshape(len(dxs), out_size)
+        yield block_start, representatives, cells, block
+
+
+def compute_ddt(sbox, n_bits, num_output_length: int, max_allowed_uniformity: int | None = None):
+    """Compute XOR-based difference distribution table for a bitwise S-box."""
+    ddt, _ = compute_ddt_and_uniformity(sbox, n_bits, num_output_length, max_allowed_uniformity)
     return ddt
 
 
-def compute_walsh_hadamard(sbox, n_in, n_out):
-    """Compute the Walsh-Hadamard transform for an n_in->n_out bit S-box."""
+def differential_spectrum(
+    sbox, n_bits: int, num_output_length: int, max_allowed_uniformity: int | None = None
+) -> tuple[np.ndarray, int]:
+    """
+    Value histogram of the DDT rows dx != 0, without holding the table.
+
+    ``histogram[v]`` counts the cells DDT[dx, dy] = v with dx != 0 (columns sized as in
+    ``compute_ddt_and_uniformity``). Rows are produced and dropped a block of about 64k cells at a
+    time, with x ^ dx built per block, so memory stays O(2^n) whatever the box size.
+
+    :param max_allowed_uniformity: stop as soon as a row holds an entry above this value; the histogram
+        then only covers the rows visited
+    :return: (histogram, max_ddt_entry), the same max_ddt_entry as ``compute_ddt_and_uniformity``
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = 2**n_bits
+    out_size = 2 ** max(num_output_length, int(values.max()).bit_length())
+    xs = np.arange(size, dtype=np.int64)
+    block_rows = max(1, 2**16 // max(size, out_size))
+    histogram = np.zeros(size + 1, dtype=np.int64)
+    max_ddt_entry = 0
+
+    for block_start in range(1, size, block_rows):
+        dxs = np.arange(block_start, min(block_start + block_rows, size), dtype=np.int64)
+        dys = values[:size] ^ values[dxs[:, None] ^ xs]
+        cells = dys + (np.arange(len(dxs), dtype=np.int64) * out_size)[:, None]
+        block = np.bincount(cells.ravel(), minlength=len(dxs) * out_size)
+        histogram += np.bincount(block, minlength=size + 1)
+        max_ddt_entry = max(max_ddt_entry, int(block.max()))
+        if max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity:
+            break
+
+    return histogram, max_ddt_entry
+
+
+def _parity(values: np.ndarray) -> np.ndarray:
+    """Return the GF(2) parity (popcount mod 2) of every non-negative integer in ``values``."""
+    folded = np.array(values, dtype=np.int64)
+    shift = 32
+    while shift:
+        folded ^= folded >> shift
+        shift //= 2
+    return folded & 1
+
+
+@lru_cache(maxsize=8)
+def _sign_table(size: int) -> np.ndarray:
+    """Read-only (-1)^popcount(v) for v in [0, size), as int32."""
+    table = (1 - 2 * _parity(np.arange(size, dtype=np.int64))).astype(np.int32)
+    table.flags.writeable = False
+    return table
+
+
+def _fast_walsh_hadamard(data: np.ndarray) -> np.ndarray:
+    """
+    In-place butterfly Walsh-Hadamard transform along axis -2 of a C-contiguous array.
+
+    ``data`` has shape (..., 2^n, columns); every column is transformed independently, so a whole
+    spectrum (one column per output mask) or a stack of spectra is handled in n vectorized passes.
+    """
+    length = data.shape[-2]
+    leading = data.shape[:-2]
+    columns = data.shape[-1]
+    # Each pass reads one buffer and writes the other, so no butterfly half needs a temporary copy.
+    source = data
+    target = np.empty_like(data)
+    half = 1
+    while half < length:
+        source_view = source.reshape(*leading, length // (2 * half), 2, half, columns)
+        target_view = target.reshape(*leading, length // (2 * half), 2, half, columns)
+        np.add(source_view[..., 0, :, :], source_view[..., 1, :, :], out=target_view[..., 0, :, :])
+        np.subtract(source_view[..., 0, :, :], source_view[..., 1, :, :], out=target_view[..., 1, :, :])
+        source, target = target, source
+        half *= 2
+    if source is not data:
+        data[...] = source
+    return data
+
+
+def walsh_spectrum(sbox, n_in: int, n_out: int, all_output_masks: bool = False) -> np.ndarray:
+    """
+    Compute the Walsh-Hadamard spectrum of an n_in->n_out bit S-box as a dense 2D array.
+
+    ``spectrum[alpha, beta]`` is the same value that ``compute_walsh_hadamard`` stores under
+    ``(alpha, beta)``. Each output mask beta is one fast transform of the sign vector
+    (-1)^<beta,S(x)>, so the whole table costs O(2^m * n * 2^n) instead of O(4^n * 2^m).
+
+    :param all_output_masks: keep every beta in [0, 2^n_out) even when the box never reaches the top
+        outputs; by default the columns stop at the largest output seen
+    """
+    values = np.asarray(sbox, dtype=np.int64)
     size_in = 2**n_in
     size_out = 2**n_out
 
     # We only compute up to the max output observed if it's smaller
-    actual_max_out = max(sbox)
-    if actual_max_out < size_out - 1:
+    actual_max_out = int(values.max())
+    if actual_max_out < size_out - 1 and not all_output_masks:
         size_out = actual_max_out + 1
 
-    # The WHT can be large, so be mindful of performance for big n_in
-    # This is a naive implementation.
-    wht = {}
-    for alpha in range(size_in):
-        for beta in range(size_out):
-            total = 0
-            for x in range(size_in):
-                # dot product in GF(2) for alpha, x
-                ax = bin(alpha & x).count("1") % 2
-                # dot product in GF(2) for beta, sbox[x]
-                bs = bin(beta & sbox[x]).count("1") % 2
-                # exponent
-                exponent = ax ^ bs
-                # (-1)^exponent is +1 if exponent=0, -1 if exponent=1
-                total += 1 if exponent == 0 else -1
-            wht[(alpha, beta)] = total
-
-    return wht
+    betas = np.arange(size_out, dtype=np.int64)
+    # (-1)^<beta,S(x)> for every x (rows) and every beta (columns), looked up by the value of S(x) & beta
+    signs = _sign_table(size_out)[values[:size_in, None] & betas[None, :]]
+    return _fast_walsh_hadamard(signs)
+
+
+def compute_walsh_hadamard(sbox, n_in, n_out):
+    """Compute the Walsh-Hadamard transform for an n_in->n_out bit S-box."""
+    spectrum = walsh_spectrum(sbox, n_in, n_out)
+    size_in, size_out = spectrum.shape
+    return dict(zip(itertools.product(range(size_in), range(size_out)), spectrum.ravel().tolist()))
+
+
+def _walsh_column_blocks(values: np.ndarray, n_in: int, n_out: int) -> Iterator[np.ndarray]:
+    """
+    The columns beta >= 1 of ``walsh_spectrum``, a block of about 64k cells at a time.
+
+    Each block is (2^n_in, k) and is only valid until the next one is produced.
+    """
+    size_in = 2**n_in
+    size_out = min(2**n_out, int(values.max()) + 1)
+    block_columns = max(1, 2**16 // size_in)
+    signs = _sign_table(size_out)
+    for block_start in range(1, size_out, block_columns):
+        betas = np.arange(block_start, min(block_start + block_columns, size_out), dtype=np.int64)
+        yield _fast_walsh_hadamard(signs[values[:size_in, None] & betas[None, :]])
+
+
+def linear_spectrum(sbox, n_in: int, n_out: int) -> tuple[np.ndarray, int]:
+    """
+    Value histogram of |W(alpha, beta)| over beta != 0, without holding the spectrum.
+
+    ``histogram[w]`` counts the entries of ``walsh_spectrum`` with |W| = w outside the beta = 0 column,
+    computed one block of output masks at a time, so memory stays O(2^n_in).
+
+    :return: (histogram, max |W|), the max being the numerator of ``max_linear_correlation``
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size_in = 2**n_in
+    histogram = np.zeros(size_in + 1, dtype=np.int64)
+    for block in _walsh_column_blocks(values, n_in, n_out):
+        histogram += np.bincount(np.abs(block).ravel(), minlength=size_in + 1)
+    nonzero = np.flatnonzero(histogram)
+    return histogram, int(nonzero[-1]) if len(nonzero) else 0
+
+
+def _boomerang_cross_cells(values: np.ndarray, size: int, keys: np.ndarray, xs: np.ndarray, max_pairs: int) -> list:
+    """
+    Cells (row * size + nabla) of one block of BCT rows hit by the cross pairs of its large DDT groups.
+
+    The pairs {x, x ^ dx} of the groups of four or more outputs are given by one representative x each
+    and its DDT cell, ``keys`` = row * size + gamma with gamma = S(x) ^ S(x ^ dx). Two pairs {x, x ^ dx}
+    and {z, z ^ dx} of the same group send x -> z, x ^ dx -> z ^ dx and back at nabla = S(x) ^ S(z),
+    and x -> z ^ dx, x ^ dx -> z and back at nabla ^ gamma, so every returned cell stands for four
+    hits. Sorting puts the pairs of a group next to each other; each is paired with those 1, 2, ...
+    places further on, up to the largest group's max_pairs.
+    """
+    # A block spans at most 2^16 cells, which numpy radix-sorts as uint16
+    order = np.argsort(keys.astype(np.uint16) if keys.max(initial=0) < 2**16 else keys, kind="stable")
+    sorted_keys = keys[order]
+    sorted_outputs = values[xs[order]]
+    cells = []
+    for distance in range(1, max_pairs):
+        same_group = np.flatnonzero(sorted_keys[distance:] == sorted_keys[:-distance])
+        if len(same_group) == 0:
+            break
+        group_keys = sorted_keys[same_group]
+        gammas = group_keys & (size - 1)
+        rows = group_keys ^ gammas
+        nablas = sorted_outputs[same_group] ^ sorted_outputs[same_group + distance]
+        cells += [rows | nablas, rows | (nablas ^ gammas)]
+    return cells
+
+
+def compute_ddt_and_bct(
+    sbox, n_bits: int, max_allowed_uniformity: int | None = None
+) -> tuple[np.ndarray, int, np.ndarray, int]:
+    """
+    Compute the DDT and the Boomerang Connectivity Table of a bijective n-bit S-box in one pass.
+
+    BCT[dx, nabla] counts the x with S^-1(S(x) ^ nabla) ^ S^-1(S(x ^ dx) ^ nabla) = dx. With
+    z = S^-1(S(x) ^ nabla) that reads S(z) ^ S(z ^ dx) = S(x) ^ S(x ^ dx): x and z lie in the same DDT
+    group of row dx, so row dx of the BCT counts the output differences S(x) ^ S(z) within its groups.
+    The pairs (x, x) and (x, x ^ dx) alone give size * [dx = 0] + DDT[dx, nabla]; only the groups of
+    four or more outputs have cross pairs to enumerate (see ``_boomerang_cross_cells``). The DDT pass
+    already holds every S(x) ^ S(x ^ dx) next to its row's counts, so finding those groups costs one
+    gather per block on top of the DDT instead of a second pass over the table.
+
+    :param sbox: flat sequence of integer outputs, a permutation of [0, 2^n_bits)
+    :param n_bits: number of bits in the input and output
+    :param max_allowed_uniformity: as in ``compute_ddt_and_uniformity``; the rows after the offending
+        block are left at zero in both tables
+    :return: (ddt, max_ddt_entry, bct, boomerang_uniformity), the last the max BCT entry over dx != 0
+        and nabla != 0
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = 2**n_bits
+    if len(values) != size or _inverse_permutation(values) is None:
+        raise ValueError(f"The BCT is only defined for permutations of [0, {size})")
+
+    dtype = np.uint16 if size <= np.iinfo(np.uint16).max else np.uint32
+    ddt = np.zeros((size, size), dtype=dtype)
+    ddt[0, 0] = size
+    bct = np.zeros((size, size), dtype=dtype)
+    max_ddt_entry = 0
+    for block_start, representatives, cells, block in _ddt_blocks(values, n_bits, size):
+        block_stop = block_start + len(block)
+        ddt[block_start:block_stop] = block
+        block_max = int(block.max())
+        max_ddt_entry = max(max_ddt_entry, block_max)
+        if max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity:
+            break
+
+        if block_max >= 4:
+            large = np.flatnonzero(np.take(block, cells) >= 4)
+            cross = _boomerang_cross_cells(
+                values, size, cells.ravel()[large], representatives.ravel()[large], block_max // 2
+            )
+            if cross:
+                np.add.at(block.reshape(-1), np.concatenate(cross), 4)
+        bct[block_start:block_stop] = block
+
+    bct[0, :] = size
+    bct[:, 0] = size
+    boomerang_uniformity = int(bct[1:, 1:].max()) if size > 1 else 0
+    return ddt, max_ddt_entry, bct, boomerang_uniformity
+
+
+def compute_bct_and_uniformity(sbox, n_bits: int) -> tuple[np.ndarray, int]:
+    """
+    Compute the Boomerang Connectivity Table of a bijective n-bit S-box and its boomerang uniformity.
+
+    See ``compute_ddt_and_bct``, which builds it alongside the DDT.
+
+    :param sbox: flat sequence of integer outputs, a permutation of [0, 2^n_bits)
+    :param n_bits: number of bits in the input and output
+    :return: (bct, boomerang_uniformity), the max entry over dx != 0 and nabla != 0
+    """
+    _, _, bct, boomerang_uniformity = compute_ddt_and_bct(sbox, n_bits)
+    return bct, boomerang_uniformity
+
+
+def compute_boomerang_uniformity(sbox, n_bits: int, inverse: np.ndarray | None = None) -> int:
+    """
+    Boomerang uniformity of a bijective n-bit S-box, one BCT column at a time.
+
+    With g(x) = S^-1(S(x) ^ nabla) ^ x, the BCT condition reads g(x) = g(x ^ dx), so column nabla
+    counts, for every dx, the inputs whose g-group also holds x ^ dx. Sorting g puts each group's
+    members next to each other; the groups are DDT-sized, so a column costs O(2^n) memory instead of
+    the 2^n x 2^n table ``compute_bct_and_uniformity`` returns. Same result as that function.
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = 2**n_bits
+    if inverse is None:
+        inverse = _inverse_permutation(values)
+    if inverse is None or len(values) != size:
+        raise ValueError(f"The BCT is only defined for permutations of [0, {size})")
+
+    xs = np.arange(size, dtype=np.int64)
+    uniformity = 0
+    for nabla in range(1, size):
+        g = inverse[values ^ nabla] ^ xs
+        order = np.argsort(g, kind="stable")
+        sorted_g = g[order]
+        column = np.zeros(size, dtype=np.int64)
+        for distance in range(1, size):
+            same_group = np.flatnonzero(sorted_g[distance:] == sorted_g[:-distance])
+            if len(same_group) == 0:
+                break
+            # x and x ^ dx both count for the unordered pair
+            column += 2 * np.bincount(order[same_group] ^ order[same_group + distance], minlength=size)
+        uniformity = max(uniformity, int(column[1:].max(initial=0)))
+    return uniformity
+
+
+def compute_autocorrelation(sbox, n_in: int, n_out: int, spectrum: np.ndarray | None = None) -> np.ndarray:
+    """
+    Compute the autocorrelation table from the Walsh spectrum.
+
+    r[dx, beta] = sum over x of (-1)^<beta, S(x) ^ S(x ^ dx)>. By Wiener-Khinchin it is the
+    Walsh-Hadamard transform of the squared Walsh spectrum divided by 2^n_in, so the table costs one
+    more fast transform over the spectrum ``walsh_spectrum`` already produced (pass it as ``spectrum``
+    to skip recomputing it) instead of a quadratic pass over (x, dx). Columns follow ``walsh_spectrum``,
+    so they stop at the largest observed output.
+    """
+    if spectrum is None:
+        spectrum = walsh_spectrum(sbox, n_in, n_out)
+    # By Parseval every column of W^2 sums to 2^(2 n_in), which bounds every partial sum of the
+    # transform; that fits int32 up to 15 bits
+    squared = np.square(spectrum, dtype=np.int32 if n_in <= 15 else np.int64)
+    return _fast_walsh_hadamard(squared) >> n_in
+
+
+def compute_dlct(sbox, n_in: int, n_out: int, spectrum: np.ndarray | None = None) -> np.ndarray:
+    """
+    Compute the Differential-Linear Connectivity Table from the Walsh spectrum.
+
+    DLCT[dx, beta] = #{x : <beta, S(x) ^ S(x ^ dx)> = 0} - 2^(n_in - 1) is half the autocorrelation
+    (see ``compute_autocorrelation``), which is always even.
+    """
+    return compute_autocorrelation(sbox, n_in, n_out, spectrum) >> 1
+
+
+def autocorrelation_indicators(sbox, n_in: int, n_out: int, spectrum: np.ndarray | None = None) -> tuple[int, int]:
+    """
+    The absolute indicator, max |r[dx, beta]| over dx != 0 and beta != 0, and the sum-of-squares
+    indicator, max over beta != 0 of sum over dx of r[dx, beta]^2.
+
+    Both come from the Walsh spectrum: the first through ``compute_autocorrelation``, the second by
+    Parseval as sum over alpha of W(alpha, beta)^4 / 2^n_in. Without ``spectrum`` the columns are
+    produced a block at a time, in O(2^n_in) memory.
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    blocks = [spectrum[:, 1:]] if spectrum is not None else _walsh_column_blocks(values, n_in, n_out)
+    absolute_indicator = 0
+    sum_of_squares_indicator = 0
+    for block in blocks:
+        squared = np.square(block, dtype=np.int64)
+        sum_of_squares_indicator = max(sum_of_squares_indicator, int((squared**2).sum(axis=0).max(initial=0)) >> n_in)
+        autocorrelation = _fast_walsh_hadamard(squared) >> n_in
+        absolute_indicator = max(absolute_indicator, int(np.abs(autocorrelation[1:]).max(initial=0)))
+    return absolute_indicator, sum_of_squares_indicator
+
+
+def avalanche_profile(sbox, n_in: int, n_out: int) -> dict:
+    """
+    Strict avalanche and bit independence of an n_in->n_out bit S-box.
+
+    The derivatives S(x) ^ S(x ^ e_i) of every input bit i are split into an (n_in, 2^n_in, n_out)
+    bit-plane array d. Then:
+
+      * ``sac_matrix[i][j]``: the probability that flipping input bit i flips output bit j (ideally 1/2),
+        the mean of d over x
+      * ``sac_max_deviation``: max |sac_matrix - 1/2|
+      * ``bic_max_correlation``: max |correlation| between the avalanche variables d[i, :, j] and
+        d[i, :, k] over i and j < k, from one batched bit-plane product (constant variables count as 0)
+      * ``bic_sac_max_deviation``: max |P(output bits j and k flip differently) - 1/2|, from the popcount
+        parity of the derivative masked to bits j and k
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = 2**n_in
+    xs = np.arange(size, dtype=np.int64)
+    derivatives = values[xs[None, :] ^ (1 << np.arange(n_in, dtype=np.int64))[:, None]] ^ values[None, :size]
+    planes = ((derivatives[..., None] >> np.arange(n_out, dtype=np.int64)) & 1).astype(np.float64)
+
+    flips = planes.mean(axis=1)
+    both = planes.transpose(0, 2, 1) @ planes / size
+    deviations = np.sqrt(flips * (1 - flips))
+    covariance = both - flips[:, :, None] * flips[:, None, :]
+    scale = deviations[:, :, None] * deviations[:, None, :]
+    correlation = np.divide(covariance, scale, out=np.zeros_like(covariance), where=scale > 0)
+    upper = np.triu_indices(n_out, 1)
+
+    pair_masks = (1 << upper[0]) | (1 << upper[1])
+    pair_flips = (np.bitwise_count(derivatives[..., None] & pair_masks) & 1).mean(axis=1)
+    return {
+        "sac_matrix": flips.tolist(),
+        "sac_max_deviation": float(np.abs(flips - 0.5).max(initial=0)),
+        "bic_max_correlation": float(np.abs(correlation[:, upper[0], upper[1]]).max(initial=0)),
+        "bic_sac_max_deviation": float(np.abs(pair_flips - 0.5).max(initial=0)),
+    }
+
+
+def compute_differential_linear_uniformity(sbox, n_in: int, n_out: int) -> int:
+    """
+    Max |DLCT[dx, beta]| over dx != 0 and beta != 0, one block of output masks at a time.
+
+    ``compute_dlct`` transforms the whole squared spectrum; the columns are independent, so the same
+    max comes out of the blocks of ``_walsh_column_blocks`` in O(2^n_in) memory.
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    uniformity = 0
+    for block in _walsh_column_blocks(values, n_in, n_out):
+        squared = np.square(block, dtype=np.int32 if n_in <= 10 else np.int64)
+        dlct = _fast_walsh_hadamard(squared) >> (n_in + 1)
+        uniformity = max(uniformity, int(np.abs(dlct[1:]).max(initial=0)))
+    return uniformity
+
+
+def _fast_mobius(data: np.ndarray) -> np.ndarray:
+    """
+    In-place binary Möbius transform along the last axis (length 2^n) of a C-contiguous integer array.
+
+    The XOR butterfly turns a truth table into its algebraic normal form. It works bitwise, so an
+    array of packed outputs transforms every coordinate function at once: bit i of ``data[u]``
+    becomes the coefficient of the monomial x^u in coordinate i.
+    """
+    length = data.shape[-1]
+    leading = data.shape[:-1]
+    half = 1
+    while half < length:
+        view = data.reshape(*leading, length // (2 * half), 2, half)
+        view[..., 1, :] ^= view[..., 0, :]
+        half *= 2
+    return data
+
+
+def _component_degrees(anf: np.ndarray, n_in: int, n_out: int) -> np.ndarray:
+    """
+    Degree of every component function <beta, S> from the packed coordinate ANFs ``anf`` (..., 2^n_in).
+
+    The coefficient of x^u in component beta is the parity of ``beta & anf[u]``. Monomials are visited
+    from the highest degree down and a component's degree is the first layer that hits it, so a
+    typical box is settled by the top one or two layers instead of the whole 2^n_in x 2^n_out table.
+    Returns (..., 2^n_out) degrees; beta = 0 gets 0.
+    """
+    betas = np.arange(2**n_out, dtype=np.int64)
+    parity_table = _parity(betas)
+    weights = np.bitwise_count(np.arange(2**n_in, dtype=np.int64))
+    degrees = np.zeros(anf.shape[:-1] + (len(betas),), dtype=np.int64)
+    unsettled = np.ones(degrees.shape, dtype=bool)
+    unsettled[..., 0] = False
+    for degree in range(n_in, 0, -1):
+        if not unsettled.any():
+            break
+        layer = anf[..., weights == degree]
+        hit = parity_table[layer[..., :, None] & betas].any(axis=-2) & unsettled
+        degrees[hit] = degree
+        unsettled &= ~hit
+    return degrees
+
+
+def algebraic_profile(sbox, n_in: int, n_out: int) -> dict:
+    """
+    Algebraic degree and ANF statistics of an n_in->n_out bit S-box.
+
+    One Möbius transform of the packed outputs gives the ANF of every coordinate function (output bit
+    i, least significant first). A component function <beta, S> is the XOR of its coordinates, so its
+    ANF needs no further transform (see ``_component_degrees``).
+
+    :param sbox: flat sequence (or SBox) of integer outputs, sbox[x] for x in [0, 2^n_in)
+    :param n_in: number of bits in the input
+    :param n_out: number of bits in the output
+    :return: dict with ``algebraic_degree`` (max coordinate degree), ``min_component_degree`` (over
+        beta != 0) and per-coordinate ``coordinate_degrees`` and ``anf_terms``
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    size = 2**n_in
+    if len(values) != size:
+        raise ValueError(f"Expected {size} outputs, got {len(values)}")
+    if len(values) and (values.min() < 0 or values.max() >= 2**n_out):
+        raise ValueError(f"S-box outputs must lie in [0, {2**n_out})")
+
+    anf = _fast_mobius(values.copy())
+    degrees = _component_degrees(anf, n_in, n_out)
+    # Coordinate i is the component beta = 2^i, so its degree is already in the component pass
+    coordinate_degrees = degrees[1 << np.arange(n_out)]
+    component_degrees = degrees[1:]
+
+    return {
+        "algebraic_degree": int(coordinate_degrees.max(initial=0)),
+        "min_component_degree": int(component_degrees.min()) if len(component_degrees) else 0,
+        "coordinate_degrees": coordinate_degrees.tolist(),
+        "anf_terms": ((anf[:, None] >> np.arange(n_out)) & 1).sum(axis=0).tolist(),
+    }
 
 
 def is_bent(n_in, n_out, max_corr):
@@ -67,64 +591,121 @@ def is_bent(n_in, n_out, max_corr):
 
 
 def evaluate_s_box(
-    s_box: list[list[str]], num_input_length: int, num_output_length: int, num_unique_symbols: int
+    s_box: "list[list[str]] | SBox",
+    num_input_length: int,
+    num_output_length: int,
+    num_unique_symbols: int,
+    max_allowed_uniformity: int | None = None,
+    radices: tuple[int, ...] | None = None,
+    connectivity_tables: bool = False,
+    streaming: bool = False,
+    avalanche: bool = False,
+    encoding: str | None = None,
+    alphabet: str | None = None,
+    algebraic: bool = False,
 ) -> dict:
     """
     Evaluate and score an S-box based on:
       1) Difference Distribution Table (DDT) & differential uniformity
       2) Walsh–Hadamard Transform (WHT) & linear correlation
       3) Bent function check (if n->n/2 bits)
+      4) Optionally, algebraic degree of the coordinate and component functions (see ``algebraic_profile``)
+
+    Boxes over Z_q^k or mixed-radix domains (the README targets, e.g. 125 = 5^3 symbols) are scored by
+    ``evaluate_q_ary_s_box`` instead. That happens when ``radices`` is given, or when the box isn't 2^n
+    long but has num_unique_symbols = q^num_input_length entries, in which case radices is (q,) * num_input_length.
 
-    :param s_box: 2D array of output symbols. Dimensions depend on how the S-box was generated.
+    :param s_box: 2D array of output symbols (or an already-parsed SBox). Dimensions depend on how the S-box
+        was generated.
     :param num_input_length: number of bits in the input
     :param num_output_length: number of bits in the output
     :param num_unique_symbols: total unique symbols possible in the output alphabet
+    :param max_allowed_uniformity: reject early (and skip the WHT) once a DDT entry exceeds this value.
+        ``max_ddt_entry`` is then a lower bound and ``uniformity_exceeded`` is True.
+    :param radices: radix of each input (and output) character for q-ary / mixed-radix boxes, e.g. (5, 5, 6)
+    :param connectivity_tables: also report ``boomerang_uniformity`` (max BCT entry, bijective n->n boxes only)
+        and ``differential_linear_uniformity`` (max |DLCT| entry) for bitwise boxes
+    :param streaming: never hold a full DDT, Walsh, BCT or DLCT table; rows and columns are produced and
+        dropped a block at a time, so memory is O(2^n) per evaluation. The scores are identical, and the
+        value histograms ``differential_spectrum`` (see ``differential_spectrum``) and, for bitwise boxes,
+        ``linear_spectrum`` (see ``linear_spectrum``) are reported too
+    :param avalanche: also report ``sac_max_deviation``, ``bic_max_correlation`` and ``bic_sac_max_deviation``
+        (see ``avalanche_profile``) and the ``absolute_indicator`` and ``sum_of_squares_indicator`` of the
+        autocorrelation (see ``autocorrelation_indicators``) for bitwise boxes
+    :param encoding: symbol encoding of the table (see ``SBox``); detected when omitted
+    :param alphabet: digits of a positional alphabet, e.g. "vwxyz" for 3-letter symbols of a 125-entry box
+    :param algebraic: also report ``algebraic_degree`` and ``min_component_degree`` (see ``algebraic_profile``)
+        for bitwise boxes
     :return: A dictionary of evaluation metrics
     """
+    with phase("parse"):
+        sbox_list = flatten_s_box(s_box, encoding, alphabet)
+    count("cells_parsed", len(sbox_list))
+    radices = resolve_radices(len(sbox_list), num_input_length, num_unique_symbols, radices)
+    return evaluate_flat_s_box(
+        sbox_list,
+        num_input_length,
+        num_output_length,
+        max_allowed_uniformity,
+        radices,
+        connectivity_tables,
+        streaming,
+        avalanche,
+        algebraic,
+    )
 
-    # -------------------------------------------------------------------------
-    # 1. Flatten the S-box into a single list sbox_list, where
-    #    sbox_list[x] = integer output for input x.
-    #
-    #    We'll assume the 2D array is row-major so that:
-    #       input = row * (number_of_columns) + column
-    #    is the index of that output.
-    #
-    #    If your S-box is arranged differently (like DES), you may need to
-    #    adapt the flattening logic accordingly.
-    # -------------------------------------------------------------------------
-    flat_sbox = []
-    row_count = len(s_box)
-    col_count = len(s_box[0])
-
-    # A dictionary to store 'seen_symbol -> assigned_int'
-    symbol_to_int = {}
-    next_id = 0
-
-    for row in range(row_count):
-        for col in range(col_count):
-            symbol = s_box[row][col]
-
-            # Try to parse as hex
-            # e.g. '9f', '7c', ...
-            try:
-                value = int(symbol, 16)
-            except ValueError:
-                # If that fails, try binary
-                # e.g. '0010', '1110', ...
-                try:
-                    value = int(symbol, 2)
-                except ValueError:
-                    # Otherwise, map any arbitrary string/emoji
-                    if symbol not in symbol_to_int:
-                        symbol_to_int[symbol] = next_id
-                        next_id += 1
-                    value = symbol_to_int[symbol]
-
-            flat_sbox.append(value)
-
-    domain_size = row_count * col_count  # total number of inputs found
-    sbox_list = flat_sbox
+
+def resolve_radices(
+    domain_size: int, num_input_length: int, num_unique_symbols: int, radices: tuple[int, ...] | None = None
+) -> tuple[int, ...] | None:
+    """Pick the q-ary radices ``evaluate_s_box`` uses for a box of domain_size entries (None means bitwise)."""
+    if radices is None and domain_size != 2**num_input_length and domain_size == num_unique_symbols:
+        radices = infer_radices(num_unique_symbols, num_input_length)
+    return radices
+
+
+def flatten_s_box(
+    s_box: "list[list[str]] | SBox", encoding: str | None = None, alphabet: str | None = None
+) -> np.ndarray:
+    """
+    Flatten a 2D table of output symbols into the integer outputs sbox_list[x] for each input x.
+
+    The table is read row-major (input = row * number_of_columns + column), and its encoding (binary,
+    decimal, hex or an arbitrary symbol alphabet) is detected once for the whole table by ``SBox``.
+    If your S-box is arranged differently (like DES), you may need to adapt the flattening accordingly.
+
+    :param encoding: symbol encoding of a table (one of ``src.s_box.ENCODINGS``); detected when omitted
+    :param alphabet: digits of a positional alphabet, for the "alphabet" encoding
+    """
+    if isinstance(s_box, SBox):
+        return s_box.values
+    return SBox(s_box, encoding=encoding, alphabet=alphabet).values
+
+
+def evaluate_flat_s_box(
+    sbox_list,
+    num_input_length: int,
+    num_output_length: int,
+    max_allowed_uniformity: int | None = None,
+    radices: tuple[int, ...] | None = None,
+    connectivity_tables: bool = False,
+    streaming: bool = False,
+    avalanche: bool = False,
+    algebraic: bool = False,
+) -> dict:
+    """
+    Evaluate an already-flattened S-box (sbox_list[x] = integer output for input x).
+
+    This is the part of ``evaluate_s_box`` after symbol parsing; see that function for the metrics.
+    """
+    count("boxes_evaluated")
+    if radices is not None:
+        with phase("q_ary", domain_size=len(sbox_list)):
+            return evaluate_q_ary_s_box(
+                sbox_list, radices, max_allowed_uniformity=max_allowed_uniformity, streaming=streaming
+            )
+
+    domain_size = len(sbox_list)  # total number of inputs found
 
     # Quick check: does domain_size match 2^(num_input_length)?
     # This is the standard assumption for an n-bit S-box.
@@ -132,7 +713,7 @@ def evaluate_s_box(
     domain_consistency = domain_size == expected_domain_size
 
     # Also figure out the largest integer in sbox_list to gauge the range
-    max_output_value = max(sbox_list) if sbox_list else 0
+    max_output_value = int(np.max(sbox_list)) if len(sbox_list) else 0
     # Potential range size is max_output_value+1, but let's see if it is 2^(num_output_length)
     expected_range_size = 2**num_output_length
     range_consistency = max_output_value < expected_range_size
@@ -142,14 +723,35 @@ def evaluate_s_box(
     #    We'll only do standard XOR-based DDT if domain_size == 2^num_input_length.
     # -------------------------------------------------------------------------
     ddt = None
+    differential_histogram = None
     max_ddt_entry = 0
+    uniformity_exceeded = False
+    fused_boomerang_uniformity = None
+    # The BCT of a bijective n->n box comes out of the DDT pass (see compute_ddt_and_bct)
+    fuse_bct = (
+        connectivity_tables
+        and not streaming
+        and domain_consistency
+        and num_input_length == num_output_length
+        and _inverse_permutation(np.asarray(sbox_list, dtype=np.int64)) is not None
+    )
     if domain_consistency:
-        ddt = compute_ddt(sbox_list, num_input_length, num_output_length)
-        # For differential uniformity, we often look at the max count
-        # of nonzero input difference dx != 0.
-        max_ddt_entry = max(
-            ddt[dx][dy] for dx in range(1, len(ddt)) for dy in range(len(ddt[dx]))  # skip dx=0 in some definitions
-        )
+        # The max count over nonzero input differences dx != 0 comes out of the same pass
+        with phase("ddt", n_in=num_input_length):
+            if streaming:
+                differential_histogram, max_ddt_entry = differential_spectrum(
+                    sbox_list, num_input_length, num_output_length, max_allowed_uniformity
+                )
+            elif fuse_bct:
+                ddt, max_ddt_entry, _, fused_boomerang_uniformity = compute_ddt_and_bct(
+                    sbox_list, num_input_length, max_allowed_uniformity
+                )
+            else:
+                ddt, max_ddt_entry = compute_ddt_and_uniformity(
+                    sbox_list, num_input_length, num_output_length, max_allowed_uniformity
+                )
+        count("ddt_entries", ddt.size if ddt is not None else int(differential_histogram.sum()))
+        uniformity_exceeded = max_allowed_uniformity is not None and max_ddt_entry > max_allowed_uniformity
     else:
         # If we cannot do standard XOR-based, we skip or do a fallback.
         pass
@@ -164,11 +766,21 @@ def evaluate_s_box(
     #    linear approximation. Normalized by domain_size, that is your max correlation.
     # -------------------------------------------------------------------------
     wht = None
+    linear_histogram = None
     max_linear_correlation = None
-    if domain_consistency and range_consistency:
-        wht = compute_walsh_hadamard(sbox_list, num_input_length, num_output_length)
-        # max absolute correlation:
-        max_correlation = max(abs(v) for v in wht.values()) if wht else 0
+    if domain_consistency and range_consistency and not uniformity_exceeded:
+        with phase("wht", n_in=num_input_length):
+            if streaming:
+                linear_histogram, max_correlation = linear_spectrum(sbox_list, num_input_length, num_output_length)
+            else:
+                wht = walsh_spectrum(sbox_list, num_input_length, num_output_length)
+        if wht is not None:
+            count("walsh_entries", wht.size)
+            # max absolute correlation over the non-trivial output masks (beta=0 is the constant
+            # component, whose W(0, 0) = 2^n would otherwise always win):
+            max_correlation = int(np.abs(wht[:, 1:]).max()) if wht.shape[1] > 1 else 0
+        else:
+            count("walsh_entries", int(linear_histogram.sum()))
         # Normalized by the domain size:
         max_linear_correlation = max_correlation / (2**num_input_length)
     else:
@@ -197,9 +809,182 @@ def evaluate_s_box(
         "expected_domain_size": expected_domain_size,
         "domain_consistency": domain_consistency,
         "range_consistency": range_consistency,
-        "max_ddt_entry": max_ddt_entry if ddt else None,
+        "max_ddt_entry": max_ddt_entry if domain_consistency else None,
+        "uniformity_exceeded": uniformity_exceeded,
         "max_linear_correlation": max_linear_correlation,
         "is_bent": bent_flag,
     }
+    if streaming:
+        results["differential_spectrum"] = (
+            differential_histogram.tolist() if differential_histogram is not None else None
+        )
+        results["linear_spectrum"] = linear_histogram.tolist() if linear_histogram is not None else None
+
+    # -------------------------------------------------------------------------
+    # 6. Algebraic degree, from the ANF of the coordinate and component functions
+    # -------------------------------------------------------------------------
+    if algebraic:
+        profile = {}
+        if max_linear_correlation is not None:
+            with phase("algebraic", n_in=num_input_length):
+                profile = algebraic_profile(sbox_list, num_input_length, num_output_length)
+        results["algebraic_degree"] = profile.get("algebraic_degree")
+        results["min_component_degree"] = profile.get("min_component_degree")
+
+    # -------------------------------------------------------------------------
+    # 7. Boomerang and differential-linear connectivity, built from the DDT and WHT above
+    # -------------------------------------------------------------------------
+    if connectivity_tables:
+        boomerang_uniformity = None
+        differential_linear_uniformity = None
+        if max_linear_correlation is not None:
+            inverse = None
+            if num_input_length == num_output_length:
+                inverse = _inverse_permutation(np.asarray(sbox_list, dtype=np.int64))
+            if inverse is not None:
+                if streaming:
+                    with phase("bct", n_in=num_input_length):
+                        boomerang_uniformity = compute_boomerang_uniformity(sbox_list, num_input_length, inverse)
+                else:
+                    # Built alongside the DDT in section 2
+                    boomerang_uniformity = fused_boomerang_uniformity
+            with phase("dlct", n_in=num_input_length):
+                if streaming:
+                    differential_linear_uniformity = compute_differential_linear_uniformity(
+                        sbox_list, num_input_length, num_output_length
+                    )
+                else:
+                    dlct = compute_dlct(sbox_list, num_input_length, num_output_length, wht)
+                    corner = dlct[1:, 1:]
+                    differential_linear_uniformity = max(int(corner.max(initial=0)), -int(corner.min(initial=0)))
+        results["boomerang_uniformity"] = boomerang_uniformity
+        results["differential_linear_uniformity"] = differential_linear_uniformity
+
+    # -------------------------------------------------------------------------
+    # 8. Avalanche: SAC / BIC from the derivative bit planes, autocorrelation from the WHT above
+    # -------------------------------------------------------------------------
+    if avalanche:
+        profile = {}
+        absolute_indicator = None
+        sum_of_squares_indicator = None
+        if max_linear_correlation is not None:
+            with phase("avalanche", n_in=num_input_length):
+                profile = avalanche_profile(sbox_list, num_input_length, num_output_length)
+                absolute_indicator, sum_of_squares_indicator = autocorrelation_indicators(
+                    sbox_list, num_input_length, num_output_length, wht
+                )
+        for name in ("sac_max_deviation", "bic_max_correlation", "bic_sac_max_deviation"):
+            results[name] = profile.get(name)
+        results["absolute_indicator"] = absolute_indicator
+        results["sum_of_squares_indicator"] = sum_of_squares_indicator
+
+    return results
+
+
+def s_box_cost(metrics: dict) -> float:
+    """
+    Collapse evaluation metrics into one number to minimize: the max DDT entry as a fraction of the
+    domain size plus the max linear correlation. Boxes that couldn't be scored cost infinity.
+    """
+    if metrics["max_ddt_entry"] is None or metrics["max_linear_correlation"] is None:
+        return math.inf
+    return metrics["max_ddt_entry"] / metrics["domain_size"] + metrics["max_linear_correlation"]
 
+
+def evaluate_s_boxes(
+    batch, n_in: int, n_out: int, max_chunk_cells: int = 2**22, algebraic: bool = False
+) -> dict[str, np.ndarray]:
+    """
+    Evaluate a stack of same-sized bitwise S-boxes with batched array operations.
+
+    This is the columnar counterpart of ``evaluate_s_box`` for already-parsed candidates: row i of
+    every returned array holds the metric ``evaluate_s_box`` would report for ``batch[i]``. Boxes
+    are processed in chunks that share one set of scratch buffers, so memory stays bounded by
+    ``max_chunk_cells`` regardless of the batch size.
+
+    :param batch: (k, 2^n_in) integer array, one flattened S-box per row
+    :param n_in: number of bits in the input
+    :param n_out: number of bits in the output
+    :param max_chunk_cells: upper bound on the cells of the per-chunk Walsh-Hadamard scratch buffer
+    :param algebraic: also report ``algebraic_degree`` and ``min_component_degree``, as
+        ``evaluate_s_box(..., algebraic=True)`` does (-1 when the outputs don't fit in n_out bits)
+    :return: dict of length-k arrays (``pandas.DataFrame(result)`` gives a table). Columns:
+        ``range_consistency``, ``max_ddt_entry``, ``max_linear_correlation`` (NaN when the outputs
+        don't fit in n_out bits) and ``is_bent``.
+    """
+    boxes = np.asarray(batch, dtype=np.int64)
+    size = 2**n_in
+    if boxes.ndim != 2 or boxes.shape[1] != size:
+        raise ValueError(f"Expected a (k, {size}) array of S-boxes, got shape {boxes.shape}")
+    num_boxes = boxes.shape[0]
+    size_out = 2**n_out
+
+    range_consistency = (boxes < size_out).all(axis=1) if num_boxes else np.zeros(0, dtype=bool)
+    max_ddt_entry = np.zeros(num_boxes, dtype=np.int64)
+    max_walsh = np.zeros(num_boxes, dtype=np.int64)
+    algebraic_degree = np.full(num_boxes, -1, dtype=np.int64)
+    min_component_degree = np.full(num_boxes, -1, dtype=np.int64)
+    if num_boxes == 0:
+        results = {
+            "range_consistency": range_consistency,
+            "max_ddt_entry": max_ddt_entry,
+            "max_linear_correlation": np.zeros(0),
+            "is_bent": np.zeros(0, dtype=bool),
+        }
+        if algebraic:
+            results.update(algebraic_degree=algebraic_degree, min_component_degree=min_component_degree)
+        return results
+
+    # Same column sizing as compute_ddt_and_uniformity, shared by the whole batch
+    ddt_out_size = 2 ** max(n_out, int(boxes.max()).bit_length())
+    chunk = max(1, min(num_boxes, max_chunk_cells // (size * size_out)))
+
+    xs = np.arange(size, dtype=np.int64)
+    betas = np.arange(size_out, dtype=np.int64)
+    sign_table = _sign_table(size_out)
+    # Shared scratch buffers, reused by every chunk
+    gathered = np.empty((chunk, size), dtype=np.int64)
+    dys = np.empty((chunk, size), dtype=np.int64)
+    signs = np.empty((chunk, size, size_out), dtype=np.int32)
+
+    for start in range(0, num_boxes, chunk):
+        part = boxes[start : start + chunk]
+        k = len(part)
+        row_offsets = (np.arange(k, dtype=np.int64) * ddt_out_size)[:, None]
+
+        # DDT: one input difference at a time, all boxes of the chunk at once
+        chunk_ddt_max = max_ddt_entry[start : start + k]
+        for dx in range(1, size):
+            np.take(part, xs ^ dx, axis=1, out=gathered[:k])
+            np.bitwise_xor(part, gathered[:k], out=dys[:k])
+            dys[:k] += row_offsets
+            counts = np.bincount(dys[:k].ravel(), minlength=k * ddt_out_size).reshape(k, ddt_out_size)
+            np.maximum(chunk_ddt_max, counts.max(axis=1), out=chunk_ddt_max)
+
+        # WHT: only for boxes whose outputs fit in n_out bits
+        in_range = np.flatnonzero(range_consistency[start : start + k])
+        if len(in_range):
+            spectra = signs[: len(in_range)]
+            np.take(sign_table, part[in_range][:, :, None] & betas, out=spectra)
+            _fast_walsh_hadamard(spectra)
+            # Like walsh_spectrum, ignore output masks above the largest observed output
+            observed = betas[None, :] <= part[in_range].max(axis=1)[:, None]
+            magnitudes = np.abs(spectra[:, :, 1:]).max(axis=1) * observed[:, 1:]
+            max_walsh[start + in_range] = magnitudes.max(axis=1, initial=0)
+
+            if algebraic:
+                degrees = _component_degrees(_fast_mobius(part[in_range].copy()), n_in, n_out)
+                min_component_degree[start + in_range] = degrees[:, 1:].min(axis=1) if size_out > 1 else 0
+                algebraic_degree[start + in_range] = degrees.max(axis=1)
+
+    max_linear_correlation = np.where(range_consistency, max_walsh / size, np.nan)
+    bent = np.broadcast_to(np.asarray(is_bent(n_in, n_out, max_linear_correlation)), (num_boxes,)) & range_consistency
+    results = {
+        "range_consistency": range_consistency,
+        "max_ddt_entry": max_ddt_entry,
+        "max_linear_correlation": max_linear_correlation,
+        "is_bent": bent,
+    }
+    if algebraic:
+        results.update(algebraic_degree=algebraic_degree, min_component_degree=min_component_degree)
     return results
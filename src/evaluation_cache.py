@@ -0,0 +1,177 @@
+"""
+Content-addressed cache in front of ``evaluate_s_box``.
+
+Entries are keyed by a SHA-256 of the canonical integer table (the flattened outputs as little-endian
+uint32) together with everything else that changes the result: the input/output lengths, the q-ary
+radices, the early-exit threshold and ``EVALUATOR_VERSION``, so entries written by an older evaluator are
+never served. So the same box is found again whatever symbols it was written
+in. With ``canonicalize=True`` bitwise boxes that take every output value are keyed by their
+translation canonical form instead, so XOR-masked variants S(x ^ a) ^ b of a box already scored are
+hits too. A bounded LRU dict sits in front
+of an optional SQLite file that persists across runs.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Executor
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.equivalence import has_mask_invariant_metrics, translation_canonical_form
+from src.evaluate_s_box import EVALUATOR_VERSION, evaluate_flat_s_box, flatten_s_box, resolve_radices
+from src.s_box import SBox
+
+
+class EvaluationCache:
+    """
+    Memoizes ``evaluate_s_box`` in an in-memory LRU tier and an optional on-disk SQLite tier.
+
+    ``hits`` counts memory hits, ``disk_hits`` lookups answered by SQLite (which are then promoted to
+    memory), ``misses`` real evaluations and ``evictions`` entries pushed out of the memory tier.
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 4096, path: str | Path | None = None, canonicalize: bool = False):
+        """
+        :param max_entries: capacity of the in-memory LRU tier
+        :param path: SQLite file for the persistent tier; memory only when omitted
+        :param canonicalize: share entries between bitwise boxes that differ only by input / output XOR masks;
+            only boxes that take every output value, whose metrics don't change under the masks
+        """
+        self.max_entries = max_entries
+        self.canonicalize = canonicalize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute("CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, metrics TEXT)")
+
+    @staticmethod
+    def key_for(
+        flat_s_box,
+        num_input_length: int,
+        num_output_length: int,
+        radices: tuple[int, ...] | None = None,
+        max_allowed_uniformity: int | None = None,
+        connectivity_tables: bool = False,
+    ) -> str:
+        """Hash of the canonical integer table plus the evaluation parameters and the evaluator version."""
+        digest = hashlib.sha256()
+        digest.update(f"v{EVALUATOR_VERSION};".encode())
+        digest.update(f"{num_input_length},{num_output_length},{radices},{max_allowed_uniformity}".encode())
+        digest.update(b",connectivity;" if connectivity_tables else b";")
+        digest.update(np.ascontiguousarray(flat_s_box, dtype="<u4").tobytes())
+        return digest.hexdigest()
+
+    def evaluate(
+        self,
+        s_box: "list[list[str]] | SBox",
+        num_input_length: int,
+        num_output_length: int,
+        num_unique_symbols: int,
+        max_allowed_uniformity: int | None = None,
+        radices: tuple[int, ...] | None = None,
+        connectivity_tables: bool = False,
+        executor: Executor | None = None,
+    ) -> dict:
+        """
+        Drop-in replacement for ``evaluate_s_box`` that only evaluates boxes it hasn't seen.
+
+        :param executor: run misses on this executor (e.g. a process pool) instead of the calling thread;
+            the calling thread waits for the result, so concurrent callers evaluate in parallel
+        """
+        flat_s_box = flatten_s_box(s_box)
+        radices = resolve_radices(len(flat_s_box), num_input_length, num_unique_symbols, radices)
+        key_table = flat_s_box
+        if (
+            self.canonicalize
+            and radices is None
+            and len(flat_s_box) == 2**num_input_length
+            and has_mask_invariant_metrics(flat_s_box, num_output_length)
+        ):
+            key_table = translation_canonical_form(flat_s_box)
+        key = self.key_for(
+            key_table, num_input_length, num_output_length, radices, max_allowed_uniformity, connectivity_tables
+        )
+
+        metrics = self._lookup(key)
+        if metrics is None:
+            arguments = (
+                flat_s_box,
+                num_input_length,
+                num_output_length,
+                max_allowed_uniformity,
+                radices,
+                connectivity_tables,
+            )
+            if executor is None:
+                metrics = evaluate_flat_s_box(*arguments)
+            else:
+                metrics = executor.submit(evaluate_flat_s_box, *arguments).result()
+            self._store(key, metrics)
+        return dict(metrics)
+
+    def _lookup(self, key: str) -> dict | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self._connection is not None:
+                row = self._connection.execute("SELECT metrics FROM evaluations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    metrics = self._decode(row[0])
+                    self._remember(key, metrics)
+                    return metrics
+            self.misses += 1
+            return None
+
+    def _store(self, key: str, metrics: dict) -> None:
+        with self._lock:
+            self._remember(key, dict(metrics))
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO evaluations (key, metrics) VALUES (?, ?)", (key, json.dumps(metrics))
+                    )
+
+    def _remember(self, key: str, metrics: dict) -> None:
+        self._memory[key] = metrics
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _decode(encoded: str) -> dict:
+        metrics = json.loads(encoded)
+        # JSON has no tuples
+        if metrics.get("radices") is not None:
+            metrics["radices"] = tuple(metrics["radices"])
+        return metrics
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._memory),
+            }
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,266 @@
+"""
+Algebraic S-box construction over finite fields, the Rijndael recipe adapted to the README targets.
+
+Field elements of GF(p^k) are stored as integers whose base-p digits are the polynomial
+coefficients, so field addition is digit-wise addition modulo p: XOR for GF(2^n), and exactly the
+modular difference ``evaluate_q_ary_s_box`` uses for (p, p, p) boxes. That makes power maps
+x -> x^d (the AES S-box is inversion, d = -1) meaningful candidates for 125 = 5^3, 343 = 7^3 and
+1331 = 11^3 symbols as well as for 2^n-bit boxes. Sizes whose radix is not prime (216, 512, 729,
+1000, the mixed-radix shapes) have no field whose addition matches the evaluator, so they are
+rejected.
+
+Candidates are B(A(x)^d), with A and B random affine bijections of GF(p)^k. Affine layers and the
+Frobenius map x -> x^p leave every metric ``evaluate_s_box`` reports unchanged, so each cyclotomic
+class of exponents is scored once and its layered variants inherit the metrics; they are generated
+in vectorized batches as diverse seeds for ``search_s_box_for`` or few-shot prompts.
+"""
+
+from functools import lru_cache
+from typing import Iterator
+import itertools
+import math
+
+import numpy as np
+
+from src.evaluate_q_ary_s_box import infer_radices, max_character_magnitude
+from src.evaluate_s_box import evaluate_flat_s_box, s_box_cost, walsh_spectrum
+from src.s_box import values_to_table
+
+
+def _is_prime(value: int) -> bool:
+    return value >= 2 and all(value % divisor for divisor in range(2, math.isqrt(value) + 1))
+
+
+class GaloisField:
+    """
+    GF(p^k) with log / antilog tables over a primitive polynomial.
+
+    ``exp[i]`` is the element g^i for the generator g = x, ``log[a]`` its inverse (-1 for 0), and
+    ``digits[a]`` the k coefficients of a (constant term first), so a = digits[a] @ strides.
+    """
+
+    def __init__(self, p: int, k: int):
+        """
+        :param p: the characteristic, a prime
+        :param k: the extension degree
+        """
+        if not _is_prime(p) or k < 1:
+            raise ValueError(f"GF({p}^{k}) needs a prime p and k >= 1")
+        self.p = p
+        self.k = k
+        self.order = p**k
+        self.strides = p ** np.arange(k, dtype=np.int64)
+        self.digits = (np.arange(self.order, dtype=np.int64)[:, None] // self.strides) % p
+        self.polynomial, self.exp = _primitive_polynomial(p, k)
+        self.log = np.full(self.order, -1, dtype=np.int64)
+        self.log[self.exp] = np.arange(self.order - 1, dtype=np.int64)
+
+    def __repr__(self) -> str:
+        return f"GaloisField({self.p}, {self.k})"
+
+    def add(self, a, b) -> np.ndarray:
+        return ((self.digits[a] + self.digits[b]) % self.p) @ self.strides
+
+    def multiply(self, a, b) -> np.ndarray:
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        product = self.exp[(self.log[a] + self.log[b]) % (self.order - 1)]
+        return np.where((a == 0) | (b == 0), 0, product)
+
+    def power_map(self, exponent: int) -> np.ndarray:
+        """The table of x -> x^exponent over every element, with 0 -> 0."""
+        if exponent < 1:
+            raise ValueError("Power maps need a positive exponent")
+        values = np.zeros(self.order, dtype=np.int64)
+        values[1:] = self.exp[(self.log[1:] * exponent) % (self.order - 1)]
+        return values
+
+    def inversion(self) -> np.ndarray:
+        """x -> x^-1 with 0 -> 0, the Rijndael S-box core."""
+        return self.power_map(self.order - 2)
+
+    def permutation_exponents(self) -> list[int]:
+        """One exponent per cyclotomic class {d, d p, d p^2, ...} of exponents giving a permutation."""
+        modulus = self.order - 1
+        seen, representatives = set(), []
+        for exponent in range(1, modulus + (modulus == 1)):
+            if math.gcd(exponent, modulus) != 1 or exponent in seen:
+                continue
+            representatives.append(exponent)
+            seen.update(exponent * self.p**shift % modulus for shift in range(self.k))
+        return representatives
+
+    def random_affine_layers(self, count: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """
+        ``count`` random affine bijections x -> M x + c of GF(p)^k, as (count, order) element tables and
+        the (count, k, k) matrices. M is P L U with a random permutation P, unit lower triangular L and
+        upper triangular U with a nonzero diagonal, which is always invertible.
+        """
+        k, p = self.k, self.p
+        lower = np.tril(rng.integers(p, size=(count, k, k)), -1) + np.eye(k, dtype=np.int64)
+        upper = np.triu(rng.integers(p, size=(count, k, k)), 1)
+        upper[:, np.arange(k), np.arange(k)] = rng.integers(1, p, size=(count, k))
+        permutations = np.argsort(rng.random((count, k)), axis=1)
+        matrices = np.take_along_axis((lower @ upper) % p, permutations[:, :, None], axis=1)
+        constants = rng.integers(p, size=(count, k))
+
+        # Output digit i of every element at once, as an outer sum over the input digits on a (count, p, ..., p)
+        # grid: axis 1 + j holds input digit k - 1 - j, so the grid flattens in element order. Every term is
+        # reduced mod p up front, so the sum stays small and a lookup replaces the slow integer modulo.
+        dtype = np.uint8 if (k + 1) * (p - 1) < 2**8 else np.uint16
+        reduce = (np.arange((k + 1) * (p - 1) + 1) % p).astype(np.int32 if self.order < 2**31 else np.int64)
+        steps = np.arange(p, dtype=np.int64)
+        tables = np.zeros((count,) + (p,) * k, dtype=reduce.dtype)
+        for output_digit in range(k):
+            digit = constants[:, output_digit].astype(dtype).reshape((count,) + (1,) * k)
+            for input_digit in range(k):
+                shape = [count] + [1] * k
+                shape[k - input_digit] = p
+                digit = digit + ((steps * matrices[:, output_digit, input_digit, None]) % p).astype(dtype).reshape(
+                    shape
+                )
+            tables += reduce[digit] * self.strides[output_digit]
+        return tables.reshape(count, self.order), matrices
+
+
+@lru_cache(maxsize=16)
+def _primitive_polynomial(p: int, k: int) -> tuple[tuple[int, ...], np.ndarray]:
+    """
+    The first monic degree-k polynomial (low coefficients, constant first) for which x generates
+    GF(p^k)*, with its antilog table.
+    """
+    order = p**k
+    for low in itertools.product(range(p), repeat=k):
+        if low[0] == 0:
+            continue
+        exp = np.empty(order - 1, dtype=np.int64)
+        coefficients = [1] + [0] * (k - 1)
+        for power in range(order - 1):
+            exp[power] = sum(coefficient * p**index for index, coefficient in enumerate(coefficients))
+            if power and exp[power] == 1:
+                break
+            # Multiply by x and reduce with x^k = -(low)
+            top = coefficients[-1]
+            coefficients = [0] + coefficients[:-1]
+            coefficients = [(value - top * reduce) % p for value, reduce in zip(coefficients, low)]
+        else:
+            exp.flags.writeable = False
+            return low, exp
+    raise ValueError(f"No primitive polynomial for GF({p}^{k})")
+
+
+def field_for(input_length: int, output_length: int, num_unique_symbols: int) -> GaloisField:
+    """
+    The field whose addition matches how ``evaluate_s_box`` scores a box with these parameters:
+    GF(2^n) for 2^n-symbol bitwise n->n boxes, GF(p^input_length) for p^input_length symbols.
+    """
+    if num_unique_symbols == 2**input_length:
+        if output_length != input_length:
+            raise ValueError("Power maps are permutations; bitwise boxes need output_length == input_length")
+        return GaloisField(2, input_length)
+    radices = infer_radices(num_unique_symbols, input_length)
+    if radices is None or not _is_prime(radices[0]):
+        raise ValueError(
+            f"{num_unique_symbols} symbols is not p^{input_length} for a prime p, so no field addition matches"
+            " the evaluator's differences"
+        )
+    return GaloisField(radices[0], input_length)
+
+
+def _power_map_cost(field: GaloisField, exponent: int) -> float:
+    """
+    ``s_box_cost`` of x -> x^d from one DDT row and one spectrum column.
+
+    For a power permutation, x = a y turns (x + a)^d - x^d into a^d ((y + 1)^d - y^d), so every nonzero
+    DDT row is a permutation of row 1; likewise every nonzero output mask is a scaling of one fixed
+    component, so every nonzero LAT column is a permutation of any other. Both maxima need O(order) work.
+    """
+    values = field.power_map(exponent)
+    shifted = values[field.add(np.arange(field.order), 1)]
+    differences = ((field.digits[shifted] - field.digits[values]) % field.p) @ field.strides
+    max_ddt_entry = int(np.bincount(differences).max())
+    if field.p == 2:
+        max_magnitude = float(np.abs(walsh_spectrum(values & 1, field.k, 1)[:, 1]).max())
+    else:
+        max_magnitude = max_character_magnitude(values % field.p, (field.p,) * field.k, (field.p,))
+    return (max_ddt_entry + max_magnitude) / field.order
+
+
+def rank_power_maps(
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    exponents: list[int] | None = None,
+    top_k: int | None = 8,
+) -> list[tuple[int, dict]]:
+    """
+    Score x -> x^d for one exponent per cyclotomic class (or the given ``exponents``).
+
+    Every class is ranked by ``_power_map_cost`` first; only the best ``top_k`` get a full
+    ``evaluate_s_box`` run.
+
+    :param top_k: number of exponents to return (all of them when None)
+    :return: (exponent, evaluate_s_box metrics) pairs, best (lowest s_box_cost) first
+    """
+    field = field_for(input_length, output_length, num_unique_symbols)
+    radices = None if field.p == 2 else (field.p,) * field.k
+    candidates = exponents if exponents is not None else field.permutation_exponents()
+    candidates = sorted(candidates, key=lambda exponent: _power_map_cost(field, exponent))[:top_k]
+    ranked = []
+    for exponent in candidates:
+        metrics = evaluate_flat_s_box(field.power_map(exponent), input_length, output_length, radices=radices)
+        ranked.append((exponent, metrics))
+    ranked.sort(key=lambda result: s_box_cost(result[1]))
+    return ranked
+
+
+def generate_power_map_batches(
+    field: GaloisField,
+    exponents: list[int],
+    count: int,
+    batch_size: int = 1024,
+    random_seed: int = 0,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Generate ``count`` boxes B(A(x)^d) with random affine layers A and B, cycling through ``exponents``.
+
+    :return: iterator of (exponents, values) batches; values is (batch, order), one flattened box per row,
+        and row i is affine equivalent to the power map exponents[i]
+    """
+    rng = np.random.default_rng(random_seed)
+    power_maps = np.stack([field.power_map(exponent) for exponent in exponents])
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        chosen = (np.arange(start, start + size) % len(exponents)).astype(np.int64)
+        inner, _ = field.random_affine_layers(size, rng)
+        outer, _ = field.random_affine_layers(size, rng)
+        rows = np.arange(size)[:, None]
+        yield np.asarray(exponents)[chosen], outer[rows, power_maps[chosen[:, None], inner]]
+
+
+def generate_field_s_boxes_for(
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    count: int = 16,
+    top_exponents: int = 1,
+    random_seed: int = 0,
+) -> list[tuple[list[list[str]], dict]]:
+    """
+    Structured seeds with the same parameters as ``get_s_box_for``: affine variants of the best power maps.
+
+    :param count: number of boxes to return
+    :param top_exponents: spread the boxes over this many of the best-ranked exponent classes
+    :param random_seed: the same arguments always give the same boxes
+    :return: (table, metrics) pairs; every box has the metrics of its power map
+    """
+    field = field_for(input_length, output_length, num_unique_symbols)
+    ranked = rank_power_maps(input_length, output_length, num_unique_symbols, top_k=top_exponents)
+    metrics_by_exponent = dict(ranked)
+    radices = None if field.p == 2 else (field.p,) * field.k
+    results = []
+    for exponents, values in generate_power_map_batches(
+        field, [exponent for exponent, _ in ranked], count, random_seed=random_seed
+    ):
+        for exponent, row in zip(exponents.tolist(), values):
+            results.append((values_to_table(row, radices), dict(metrics_by_exponent[exponent])))
+    return results
@@ -0,0 +1,140 @@
+"""
+Incrementally maintained DDT and Walsh spectrum for swap-based S-box search.
+
+Swapping the outputs of two inputs x1, x2 only changes the DDT cells reached from pairs that contain
+x1 or x2 (at most four inputs per input difference), and only changes W(alpha, beta) where both
+<alpha, x1 ^ x2> and <beta, S(x1) ^ S(x2)> are odd, by the rank-one term u(alpha) * v(beta). Value
+histograms of both tables are kept alongside, so the differential uniformity and the max |W| are
+always available without rescanning.
+"""
+
+import numpy as np
+
+from src.evaluate_s_box import _fast_walsh_hadamard, _parity, compute_ddt
+
+
+class IncrementalSBoxState:
+    """
+    Mutable n_in->n_out bit S-box whose DDT, Walsh spectrum and their max entries track every swap.
+
+    ``swap(x1, x2)`` exchanges two outputs in O(2^n_in) DDT updates plus the affected quarter of the
+    Walsh spectrum; ``undo()`` reverts the most recent swap (a transposition is its own inverse).
+    """
+
+    def __init__(self, sbox, n_in: int, n_out: int):
+        """
+        :param sbox: flat sequence (or SBox) of integer outputs, sbox[x] for x in [0, 2^n_in)
+        :param n_in: number of bits in the input
+        :param n_out: number of bits in the output
+        """
+        self.values = np.array(sbox, dtype=np.int64)
+        self.n_in = n_in
+        self.n_out = n_out
+        self.size = 2**n_in
+        self.out_size = 2**n_out
+        if len(self.values) != self.size:
+            raise ValueError(f"Expected {self.size} outputs, got {len(self.values)}")
+        if self.values.min() < 0 or self.values.max() >= self.out_size:
+            raise ValueError(f"S-box outputs must lie in [0, {self.out_size})")
+
+        self.ddt = compute_ddt(self.values, n_in, n_out).astype(np.int64)
+        betas = np.arange(self.out_size, dtype=np.int64)
+        signs = (1 - 2 * _parity(self.values[:, None] & betas[None, :])).astype(np.int64)
+        self.walsh = _fast_walsh_hadamard(signs)
+
+        # Value histograms over the non-trivial rows (dx != 0) and columns (beta != 0)
+        self.ddt_histogram = np.bincount(self.ddt[1:].ravel(), minlength=self.size + 1)
+        self.walsh_histogram = np.bincount(np.abs(self.walsh[:, 1:]).ravel(), minlength=self.size + 1)
+        self._max_ddt = self._highest_nonzero(self.ddt_histogram, self.size)
+        self._max_walsh = self._highest_nonzero(self.walsh_histogram, self.size)
+
+        self.history: list[tuple[int, int]] = []
+        self._inputs = np.arange(self.size, dtype=np.int64)
+        self._masks = betas
+
+    @staticmethod
+    def _highest_nonzero(histogram: np.ndarray, start: int) -> int:
+        value = start
+        while value > 0 and histogram[value] == 0:
+            value -= 1
+        return value
+
+    @property
+    def differential_uniformity(self) -> int:
+        """Max DDT entry over nonzero input differences (``max_ddt_entry`` in ``evaluate_s_box``)."""
+        return self._max_ddt
+
+    @property
+    def max_walsh(self) -> int:
+        """Max |W(alpha, beta)| over nonzero output masks beta."""
+        return self._max_walsh
+
+    @property
+    def max_linear_correlation(self) -> float:
+        """Max |W| normalized by 2^n_in (``max_linear_correlation`` in ``evaluate_s_box``)."""
+        return self._max_walsh / self.size
+
+    @property
+    def nonlinearity(self) -> int:
+        return (self.size - self._max_walsh) // 2
+
+    def swap(self, x1: int, x2: int) -> None:
+        """Exchange S(x1) and S(x2), updating both tables and their histograms."""
+        self._apply_swap(x1, x2)
+        self.history.append((x1, x2))
+
+    def undo(self) -> tuple[int, int]:
+        """Revert the most recent swap and return it."""
+        x1, x2 = self.history.pop()
+        self._apply_swap(x1, x2)
+        return x1, x2
+
+    def clear_history(self) -> None:
+        """Forget the undo stack, e.g. after accepting a search step."""
+        self.history.clear()
+
+    def _apply_swap(self, x1: int, x2: int) -> None:
+        y1, y2 = int(self.values[x1]), int(self.values[x2])
+        if x1 == x2 or y1 == y2:
+            return
+
+        # ---------------------------------------------------------------------
+        # DDT: for each dx != 0, the pairs (x, x ^ dx) touched by the swap start at
+        # x1, x2, x1 ^ dx and x2 ^ dx. When dx == x1 ^ x2 the last two repeat the first two.
+        # ---------------------------------------------------------------------
+        dxs = self._inputs[1:]
+        repeated = dxs == (x1 ^ x2)
+        distinct_dxs = dxs[~repeated]
+        touched_dx = np.concatenate((dxs, dxs, distinct_dxs, distinct_dxs))
+        touched_x = np.concatenate((np.full(len(dxs), x1), np.full(len(dxs), x2), distinct_dxs ^ x1, distinct_dxs ^ x2))
+
+        flat_ddt = self.ddt.ravel()
+        old_cells = touched_dx * self.out_size + (self.values[touched_x] ^ self.values[touched_x ^ touched_dx])
+        self.values[x1], self.values[x2] = y2, y1
+        new_cells = touched_dx * self.out_size + (self.values[touched_x] ^ self.values[touched_x ^ touched_dx])
+
+        changed = np.unique(np.concatenate((old_cells, new_cells)))
+        before = flat_ddt[changed]
+        np.subtract.at(flat_ddt, old_cells, 1)
+        np.add.at(flat_ddt, new_cells, 1)
+        after = flat_ddt[changed]
+        self.ddt_histogram += np.bincount(after, minlength=self.size + 1) - np.bincount(before, minlength=self.size + 1)
+        self._max_ddt = self._highest_nonzero(self.ddt_histogram, max(self._max_ddt, int(after.max())))
+
+        # ---------------------------------------------------------------------
+        # Walsh spectrum: delta W(alpha, beta) = u(alpha) * v(beta) with
+        #   u(alpha) = (-1)^<alpha,x1> - (-1)^<alpha,x2>, nonzero iff <alpha, x1 ^ x2> is odd
+        #   v(beta)  = (-1)^<beta,y2>  - (-1)^<beta,y1>,  nonzero iff <beta, y1 ^ y2> is odd
+        # ---------------------------------------------------------------------
+        alphas = np.flatnonzero(_parity(self._inputs & (x1 ^ x2)))
+        betas = np.flatnonzero(_parity(self._masks & (y1 ^ y2)))
+        u = 2 * (1 - 2 * _parity(alphas & x1))
+        v = -2 * (1 - 2 * _parity(betas & y1))
+        block = np.ix_(alphas, betas)
+        before = np.abs(self.walsh[block]).ravel()
+        self.walsh[block] += np.outer(u, v)
+        after = np.abs(self.walsh[block]).ravel()
+        self.walsh_histogram += np.bincount(after, minlength=self.size + 1) - np.bincount(
+            before, minlength=self.size + 1
+        )
+        self._max_walsh = self._highest_nonzero(self.walsh_histogram, max(self._max_walsh, int(after.max())))
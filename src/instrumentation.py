@@ -0,0 +1,158 @@
+"""
+Optional timers and counters for the evaluation and LLM hot paths.
+
+Code under measurement marks its phases and counts its work unconditionally::
+
+    with phase("ddt"):
+        ...
+    count("ddt_entries", size * out_size)
+
+Nothing is recorded unless a ``recording()`` block is active: ``phase`` then hands back a shared no-op
+context manager and ``count`` returns straight away, so the hooks cost a global lookup when disabled.
+Inside a ``recording()`` block every phase is timed and aggregated, counters are summed, an optional
+callback sees each finished phase, and the run can be written out as a cProfile/pstats file and as a
+Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev).
+"""
+
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+import cProfile
+import json
+import os
+import threading
+import time
+
+PhaseHook = Callable[[str, float, dict], None]
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class Recorder:
+    """
+    Collects phase timings, counters and trace events for one ``recording()`` block.
+
+    Safe to share between threads (the evaluation pool's threads, or asyncio tasks on one loop).
+    """
+
+    def __init__(self, hook: PhaseHook | None = None, keep_events: bool = True):
+        """
+        :param hook: called as hook(name, seconds, attributes) after every phase
+        :param keep_events: keep one trace event per phase for ``write_chrome_trace``
+        """
+        self.hook = hook
+        self.keep_events = keep_events
+        self.phases: dict[str, PhaseStats] = {}
+        self.counters: dict[str, int | float] = {}
+        self.events: list[dict] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str, **attributes: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self.phases.setdefault(name, PhaseStats())
+                stats.calls += 1
+                stats.seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                if self.keep_events:
+                    self.events.append(
+                        {
+                            "name": name,
+                            "ph": "X",
+                            "ts": (started - self._origin) * 1e6,
+                            "dur": elapsed * 1e6,
+                            "pid": os.getpid(),
+                            "tid": threading.get_ident(),
+                            "args": attributes,
+                        }
+                    )
+            if self.hook is not None:
+                self.hook(name, elapsed, attributes)
+
+    def count(self, name: str, amount: int | float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> dict:
+        """Per-phase calls / total / max seconds, and the counters."""
+        with self._lock:
+            return {
+                "phases": {
+                    name: {"calls": stats.calls, "seconds": stats.seconds, "max_seconds": stats.max_seconds}
+                    for name, stats in self.phases.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def write_chrome_trace(self, path: str | Path) -> None:
+        """Write the phases as Chrome trace "complete" events, with the counters as metadata."""
+        with self._lock:
+            trace = {"traceEvents": list(self.events), "otherData": {"counters": dict(self.counters)}}
+        Path(path).write_text(json.dumps(trace))
+
+
+_active: Recorder | None = None
+_DISABLED = nullcontext()
+
+
+def phase(name: str, **attributes: Any):
+    """Time the enclosed block as ``name`` if a recording is active; a no-op otherwise."""
+    recorder = _active
+    if recorder is None:
+        return _DISABLED
+    return recorder.phase(name, **attributes)
+
+
+def count(name: str, amount: int | float = 1) -> None:
+    """Add ``amount`` to the counter ``name`` if a recording is active."""
+    recorder = _active
+    if recorder is not None:
+        recorder.count(name, amount)
+
+
+@contextmanager
+def recording(
+    hook: PhaseHook | None = None,
+    profile_path: str | Path | None = None,
+    trace_path: str | Path | None = None,
+) -> Iterator[Recorder]:
+    """
+    Record every phase and counter hit while the block runs::
+
+        with recording(profile_path="run.pstats", trace_path="run.trace.json") as recorder:
+            evaluate_s_box(...)
+        print(recorder.summary())
+
+    :param hook: called as hook(name, seconds, attributes) after every phase
+    :param profile_path: also run cProfile over the block and dump its stats here (read with ``pstats``)
+    :param trace_path: write the phases as a Chrome trace here when the block ends
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("A recording is already active")
+    recorder = Recorder(hook=hook, keep_events=trace_path is not None)
+    profiler = cProfile.Profile() if profile_path is not None else None
+    _active = recorder
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(str(profile_path))
+        _active = None
+        if trace_path is not None:
+            recorder.write_chrome_trace(trace_path)
@@ -0,0 +1,188 @@
+from pathlib import Path
+import math
+
+import numpy as np
+
+from src.s_box_io import read_s_box_tsv
+
+ENCODINGS = ("binary", "decimal", "hex", "alphabet", "symbolic")
+
+_BINARY_DIGITS = frozenset("01")
+_DECIMAL_DIGITS = frozenset("0123456789")
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def values_to_table(values, radices: tuple[int, ...] | None = None) -> list[list[str]]:
+    """
+    Format integer outputs as a 2D table that ``SBox`` reads back to the same values.
+
+    Bitwise boxes get fixed-width hex symbols in rows of 16, like the Rijndael tables. Q-ary and
+    mixed-radix boxes get decimal indices, which round-trip without an alphabet, in rows of radices[0].
+
+    :param values: values[x] is the output for input x
+    :param radices: radix of each input character; None for a bitwise box
+    """
+    values = np.asarray(values)
+    if radices is not None:
+        symbols = [str(value) for value in values.tolist()]
+        columns = len(values) // radices[0]
+    else:
+        width = max(1, math.ceil(int(values.max(initial=0)).bit_length() / 4))
+        symbols = [format(value, f"0{width}x") for value in values.tolist()]
+        columns = min(16, len(values))
+    return [symbols[start : start + columns] for start in range(0, len(symbols), columns)]
+
+
+def _digit_lookup(digits: str) -> np.ndarray:
+    """Map every code point below 128 to its digit value in ``digits`` (case-insensitively), or -1."""
+    lookup = np.full(128, -1, dtype=np.int64)
+    for value, digit in enumerate(digits):
+        lookup[ord(digit.lower())] = value
+        lookup[ord(digit.upper())] = value
+    return lookup
+
+
+class SBox:
+    """
+    An S-box table parsed once into a compact integer array.
+
+    ``values[x]`` is the integer output for input x, reading the 2D table row-major
+    (input = row * number_of_columns + column). The encoding is detected once for the whole table:
+
+      * ``binary``: every symbol is a fixed-width string of 0/1 characters, like the DES tables
+      * ``decimal``: every symbol is made of decimal digits
+      * ``hex``: every symbol is made of hex digits, like the Rijndael tables
+      * ``alphabet``: every character is a digit in ``alphabet`` (its base is ``len(alphabet)``). Detected
+        for fixed-width symbols of k characters drawn from q distinct ones with q^k cells, like the
+        README's 125-entry boxes of 3-letter symbols over 5 letters; the digits are the characters in sorted order
+      * ``symbolic``: anything else; each distinct symbol gets the next id in order of first appearance
+
+    Every metric in ``src.evaluate_s_box`` accepts an SBox wherever it accepts a list of integers.
+    """
+
+    __slots__ = ("values", "encoding", "alphabet", "shape", "width", "symbols")
+
+    def __init__(self, table: list[list[str]], encoding: str | None = None, alphabet: str | None = None):
+        """
+        :param table: 2D array of output symbols
+        :param encoding: one of ``ENCODINGS``; detected from the table when omitted
+        :param alphabet: digits of a positional alphabet, used when encoding is "alphabet"
+        """
+        if encoding is not None and encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}, expected one of {ENCODINGS}")
+        if alphabet is not None and encoding is None:
+            encoding = "alphabet"
+        if encoding == "alphabet" and not alphabet:
+            raise ValueError("The 'alphabet' encoding needs an alphabet")
+
+        flat = [symbol for row in table for symbol in row]
+        self.alphabet = alphabet if encoding == "alphabet" else None
+        self.shape = (len(table), len(table[0]) if table else 0)
+        self.symbols: tuple[str, ...] | None = None
+        if not flat:
+            self.values = np.zeros(0, dtype=np.uint16)
+            self.encoding = encoding or "symbolic"
+            self.width = 0
+            return
+
+        # One fixed-width unicode array for the whole table; shorter symbols are NUL-padded on the right
+        symbols = np.array(flat, dtype=str)
+        self.width = symbols.dtype.itemsize // 4
+        codes = symbols.view(np.uint32).reshape(len(flat), self.width)
+
+        if encoding is None:
+            encoding, alphabet = self._detect_encoding(symbols, codes)
+            self.alphabet = alphabet
+        self.encoding = encoding
+
+        if encoding == "symbolic":
+            distinct, first_seen, inverse = np.unique(symbols, return_index=True, return_inverse=True)
+            order = np.argsort(first_seen)
+            ids = np.empty(len(order), dtype=np.int64)
+            ids[order] = np.arange(len(order))
+            self.symbols = tuple(distinct[order].tolist())
+            values = ids[inverse.ravel()]
+        else:
+            digits = {"binary": "01", "decimal": "0123456789", "hex": "0123456789abcdef"}.get(encoding, alphabet)
+            assert digits is not None
+            values = self._decode_positional(codes, digits)
+
+        self.values = values.astype(np.uint16 if int(values.max()) < 2**16 else np.uint32)
+
+    @staticmethod
+    def _detect_encoding(symbols: np.ndarray, codes: np.ndarray) -> tuple[str, str | None]:
+        """The encoding of the table, with the digits of a detected positional alphabet."""
+        characters = {chr(code) for code in np.unique(codes) if code}
+        lengths = np.char.str_len(symbols)
+        fixed_width = bool((lengths == lengths[0]).all())
+        if characters <= _BINARY_DIGITS and fixed_width and lengths[0] > 1:
+            return "binary", None
+        base = len(characters)
+        # q distinct characters in k-character symbols filling exactly q^k cells: base-q digits. The
+        # digits must differ case-insensitively, since the decoder ignores case
+        if fixed_width and base > 1 and base ** int(lengths[0]) == len(symbols):
+            if len({character.lower() for character in characters}) == base:
+                alphabet = "".join(sorted(characters))
+                if alphabet.lower() not in ("0123456789", "0123456789abcdef"):
+                    return "alphabet", alphabet
+        if characters <= _DECIMAL_DIGITS:
+            return "decimal", None
+        if characters <= _HEX_DIGITS:
+            return "hex", None
+        return "symbolic", None
+
+    @staticmethod
+    def _decode_positional(codes: np.ndarray, digits: str) -> np.ndarray:
+        lookup = _digit_lookup(digits)
+        base = len(digits)
+        values = np.zeros(len(codes), dtype=np.int64)
+        for column in codes.T:
+            present = column != 0
+            digit = np.where(column < len(lookup), lookup[np.minimum(column, len(lookup) - 1)], -1)
+            if (present & (digit < 0)).any():
+                bad = chr(int(column[present & (digit < 0)][0]))
+                raise ValueError(f"Symbol character {bad!r} is not a digit of {digits!r}")
+            values = np.where(present, values * base + digit, values)
+        return values
+
+    @classmethod
+    def from_tsv(cls, path: str | Path, encoding: str | None = None, alphabet: str | None = None) -> "SBox":
+        return cls(read_s_box_tsv(path), encoding=encoding, alphabet=alphabet)
+
+    def to_table(self) -> list[list[str]]:
+        """Format the values back into a 2D table of symbols in this S-box's encoding and shape."""
+        if self.encoding == "symbolic":
+            assert self.symbols is not None
+            flat = [self.symbols[value] for value in self.values.tolist()]
+        elif self.encoding == "binary":
+            flat = [format(value, f"0{self.width}b") for value in self.values.tolist()]
+        elif self.encoding == "hex":
+            flat = [format(value, f"0{self.width}x") for value in self.values.tolist()]
+        elif self.encoding == "alphabet":
+            assert self.alphabet is not None
+            flat = [self._format_in_alphabet(value) for value in self.values.tolist()]
+        else:
+            flat = [str(value) for value in self.values.tolist()]
+        rows, columns = self.shape
+        return [flat[row * columns : (row + 1) * columns] for row in range(rows)]
+
+    def _format_in_alphabet(self, value: int) -> str:
+        assert self.alphabet is not None
+        base = len(self.alphabet)
+        digits = []
+        for _ in range(self.width):
+            value, digit = divmod(value, base)
+            digits.append(self.alphabet[digit])
+        return "".join(reversed(digits))
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __repr__(self) -> str:
+        return f"SBox(shape={self.shape}, encoding={self.encoding!r})"
@@ -0,0 +1,14 @@
+from pathlib import Path
+from typing import Iterator
+
+
+def read_s_box_tsv(path: str | Path) -> list[list[str]]:
+    """Read an S-box table (one row per line, symbols separated by tabs or spaces) like those in data/."""
+    with open(path, "r") as s_box_file:
+        return [line.split() for line in s_box_file if line.strip()]
+
+
+def iter_s_box_files(directory: str | Path, pattern: str = "*.tsv") -> Iterator[tuple[Path, list[list[str]]]]:
+    """Yield (path, table) for every S-box file in ``directory`` matching ``pattern``, in name order."""
+    for path in sorted(Path(directory).glob(pattern)):
+        yield path, read_s_box_tsv(path)
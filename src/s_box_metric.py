@@ -0,0 +1,142 @@
+"""
+DSPy-compatible metric for S-box answers.
+
+DSPy optimizers and ``dspy.Evaluate`` call ``metric(example, prediction, trace=None)`` and expect a
+number (or, while bootstrapping demos, something truthy for "keep this trace"). ``SBoxMetric`` parses
+``prediction.answer`` with ``parse_s_box``, scores the table through an ``EvaluationCache`` whose misses
+run on a process pool, and collapses the metrics with ``s_box_cost``. The calling thread only parses
+and waits, so ``dspy.Evaluate(num_threads=...)`` scores several answers at once on separate cores
+instead of serializing on the GIL, and repeated answers are free. Answers that are generator code
+rather than a table (``CryptographicSBoxModule`` asks for a python3 function) are run in a
+``SandboxPool`` when the metric has one, and the table the function returns is scored.
+
+This module does not import dspy; the metric only touches ``example`` and ``prediction`` attributes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+import math
+import re
+import threading
+
+from src.evaluate_s_box import s_box_cost
+from src.evaluation_cache import EvaluationCache
+from src.s_box_parser import parse_s_box
+from src.sandbox_pool import SandboxPool, extract_code
+
+_FUNCTION_DEFINITION = re.compile(r"^\s*def\s+\w+\s*\(", re.MULTILINE)
+
+
+def score_from_metrics(metrics: dict) -> float:
+    """Map ``s_box_cost`` onto (0, 1], higher is better; 0.0 for boxes that couldn't be scored."""
+    if not (metrics["domain_consistency"] and metrics["range_consistency"]):
+        return 0.0
+    cost = s_box_cost(metrics)
+    return 0.0 if math.isinf(cost) else 1 / (1 + cost)
+
+
+class SBoxMetric:
+    """
+    Scores ``prediction.answer`` S-box tables for DSPy.
+
+    The box shape comes from the example's ``input_length``, ``output_length`` and
+    ``num_unique_symbols`` fields when it has them, and from the constructor otherwise. Safe to call
+    from many threads at once; ``close`` (or the context manager) shuts the process pool down.
+    """
+
+    def __init__(
+        self,
+        input_length: int | None = None,
+        output_length: int | None = None,
+        num_unique_symbols: int | None = None,
+        cache: EvaluationCache | None = None,
+        max_workers: int | None = None,
+        bootstrap_threshold: float | None = None,
+        answer_field: str = "answer",
+        sandbox: SandboxPool | None = None,
+    ):
+        """
+        :param input_length: number of bits in the input, for examples that don't say
+        :param output_length: number of bits in the output, for examples that don't say
+        :param num_unique_symbols: number of symbols, for examples that don't say
+        :param cache: evaluation cache to share (a new in-memory one by default)
+        :param max_workers: evaluation processes (defaults to the CPU count); 0 evaluates on the calling thread
+        :param bootstrap_threshold: while bootstrapping (trace given), keep traces scoring at least this;
+            any box that could be scored passes when omitted
+        :param answer_field: prediction attribute holding the response text
+        :param sandbox: runs answers that define a function, called as f(input_length, output_length,
+            num_unique_symbols); without one such answers score 0.0. The caller owns (and closes) the pool
+        """
+        self.input_length = input_length
+        self.output_length = output_length
+        self.num_unique_symbols = num_unique_symbols
+        self.cache = cache if cache is not None else EvaluationCache()
+        self.max_workers = max_workers
+        self.bootstrap_threshold = bootstrap_threshold
+        self.answer_field = answer_field
+        self.sandbox = sandbox
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self, example: Any, prediction: Any, trace: Any = None) -> float | bool:
+        score = self.score(example, prediction)
+        if trace is None:
+            return score
+        if self.bootstrap_threshold is None:
+            return score > 0
+        return score >= self.bootstrap_threshold
+
+    def score(self, example: Any, prediction: Any) -> float:
+        """Score in [0, 1] of the answer to ``example``; 0.0 when no valid table could be read from it."""
+        input_length = getattr(example, "input_length", None) or self.input_length
+        output_length = getattr(example, "output_length", None) or self.output_length
+        num_unique_symbols = getattr(example, "num_unique_symbols", None) or self.num_unique_symbols
+        if input_length is None or output_length is None or num_unique_symbols is None:
+            raise ValueError("the S-box shape must come from the example or the metric")
+
+        text = str(getattr(prediction, self.answer_field, None) or "")
+        table = self._read_table(text, (input_length, output_length, num_unique_symbols))
+        if table is None:
+            self._reject()
+            return 0.0
+        try:
+            metrics = self.cache.evaluate(
+                table, input_length, output_length, num_unique_symbols, executor=self._get_executor()
+            )
+        except (ValueError, IndexError):
+            # Symbols the flattener can't read, or a table of the wrong size for the shape
+            self._reject()
+            return 0.0
+        return score_from_metrics(metrics)
+
+    def _read_table(self, text: str, shape: tuple[int, int, int]) -> list[list[str]] | None:
+        """The table in an answer: the result of running its function in the sandbox, or the parsed text."""
+        if self.sandbox is not None and _FUNCTION_DEFINITION.search(extract_code(text)):
+            return self.sandbox.run(text, args=shape).table
+        table, _ = parse_s_box(text, allow_duplicates=shape[1] < shape[0])
+        return table
+
+    def _reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if self.max_workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self) -> "SBoxMetric":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,212 @@
+"""
+Incremental extraction of S-box tables from LLM response text.
+
+Text can be fed in arbitrary chunks as tokens stream in. Complete lines are classified as they
+arrive: TSV / whitespace / comma separated rows, Python list literal rows (``["63", "7c", ...],``) and
+rows inside fenced code blocks all count; prose before the table is skipped, and the first non-row
+line after it ends the table.
+
+Rows of bare words (symbolic alphabets like "aab aba baa") look like prose made of equal-length words,
+so they only start a table where something else says it is one: their characters are all in the
+``alphabet`` given, they are tab separated, they sit inside a fenced block, or they have exactly
+``expected_columns`` symbols. Once a hex / decimal or quoted table has started, a line of bare words
+ends it rather than joining it. The parser flags the candidate as invalid as soon as a row has the
+wrong width, a symbol repeats (for bijective boxes), or the table grows past the expected size, so a
+streaming caller can stop the generation right there.
+"""
+
+import re
+
+_QUOTED = re.compile(r"""(['"])(.*?)\1""")
+_SEPARATORS = re.compile(r"[\s,;|]+")
+_NUMBER = re.compile(r"^(0[xX])?[0-9A-Fa-f]+$")
+_SYMBOL = re.compile(r"^\w+$")
+
+
+def _row_tokens(line: str, symbolic: bool = False) -> list[str] | None:
+    """
+    Return the symbols of a table row, or None if the line doesn't look like one.
+
+    :param symbolic: also accept rows of fixed-width bare words, which can't be told apart from prose
+        by the line alone
+    """
+    if line.lstrip()[:1] in ("[", "'", '"'):
+        quoted = [match.group(2) for match in _QUOTED.finditer(line)]
+        if quoted:
+            return quoted if len(quoted) >= 2 else None
+
+    stripped = line.strip().strip("[](),")
+    tokens = [token for token in _SEPARATORS.split(stripped) if token]
+    if len(tokens) < 2:
+        return None
+    if all(_NUMBER.match(token) for token in tokens):
+        # 0x63 and 63 are the same hex symbol
+        return [token[2:] if token[:2] in ("0x", "0X") else token for token in tokens]
+    # Symbolic alphabets: fixed-width words
+    if symbolic and all(_SYMBOL.match(token) for token in tokens) and len({len(token) for token in tokens}) == 1:
+        return tokens
+    return None
+
+
+class SBoxStreamParser:
+    """
+    Accumulates S-box rows from streamed text.
+
+    ``feed`` returns False once the candidate is known to be invalid (``error`` says why); ``done`` turns
+    True when the table has ended or reached ``expected_cells``. ``rows`` holds what was parsed so far.
+    """
+
+    def __init__(
+        self,
+        expected_rows: int | None = None,
+        expected_columns: int | None = None,
+        expected_cells: int | None = None,
+        allow_duplicates: bool = False,
+        alphabet: str | None = None,
+    ):
+        """
+        :param expected_rows: number of rows the table must have
+        :param expected_columns: number of symbols every row must have (defaults to the first row's width)
+        :param expected_cells: total number of symbols the table must have
+        :param allow_duplicates: accept repeated symbols (n->m boxes); bijective boxes never repeat one
+        :param alphabet: characters of a symbolic alphabet; rows of bare words made of them count as rows
+        """
+        self.expected_rows = expected_rows
+        self.expected_columns = expected_columns
+        self.expected_cells = expected_cells
+        self.allow_duplicates = allow_duplicates
+        self.alphabet = frozenset(alphabet) if alphabet is not None else None
+        self.rows: list[list[str]] = []
+        self.error: str | None = None
+        self.done = False
+        self._buffer = ""
+        self._seen: set[str] = set()
+        self._cells = 0
+        self._fenced = False
+        # Whether the table started with a row of bare words; None before the first row
+        self._symbolic: bool | None = None
+
+    def feed(self, text: str) -> bool:
+        """Add a chunk of response text; returns False as soon as the candidate is invalid."""
+        if self.error is not None or self.done:
+            return self.error is None
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._parse_line(line)
+            if self.error is not None or self.done:
+                break
+        return self.error is None
+
+    def close(self) -> list[list[str]] | None:
+        """Flush the last partial line and return the table, or None if it is invalid or incomplete."""
+        if self.error is None and not self.done and self._buffer:
+            self._parse_line(self._buffer)
+        self._buffer = ""
+        if self.error is None and not self.rows:
+            self.error = "no table found"
+        if self.error is None and self.expected_rows is not None and len(self.rows) != self.expected_rows:
+            self.error = f"{len(self.rows)} rows, expected {self.expected_rows}"
+        if self.error is None and self.expected_cells is not None and self._cells != self.expected_cells:
+            self.error = f"{self._cells} cells, expected {self.expected_cells}"
+        self.done = True
+        return self.rows if self.error is None else None
+
+    def _parse_line(self, line: str) -> None:
+        if line.strip().startswith("```"):
+            # Fences only delimit the table; a fence after rows closes it
+            if self.rows:
+                self.done = True
+            self._fenced = not self._fenced
+            return
+        tokens = _row_tokens(line)
+        symbolic = False
+        if tokens is None:
+            tokens = _row_tokens(line, symbolic=True)
+            symbolic = tokens is not None
+            if symbolic and not self._starts_or_continues_symbolic_table(line, tokens):
+                tokens = None
+        if tokens is None:
+            # Prose before the table is skipped, prose after it ends the table
+            if self.rows and line.strip() not in ("", "]", "],", "])", "[", "(", ")"):
+                self.done = True
+            return
+
+        columns = self.expected_columns or (len(self.rows[0]) if self.rows else len(tokens))
+        if len(tokens) != columns:
+            self.error = f"row {len(self.rows) + 1} has {len(tokens)} symbols, expected {columns}"
+            return
+        if not self.allow_duplicates:
+            for token in tokens:
+                if token in self._seen:
+                    self.error = f"duplicate symbol {token!r} in row {len(self.rows) + 1}"
+                    return
+                self._seen.add(token)
+        self.rows.append(tokens)
+        self._cells += len(tokens)
+        if self._symbolic is None:
+            self._symbolic = symbolic
+
+        if self.expected_cells is not None and self._cells >= self.expected_cells:
+            if self._cells > self.expected_cells:
+                self.error = f"more than {self.expected_cells} cells"
+            self.done = True
+        elif self.expected_rows is not None and len(self.rows) >= self.expected_rows:
+            self.done = True
+
+    def _starts_or_continues_symbolic_table(self, line: str, tokens: list[str]) -> bool:
+        """Whether a line of bare words is a table row here rather than prose."""
+        if self.alphabet is not None:
+            return all(set(token) <= self.alphabet for token in tokens)
+        if self._symbolic is not None:
+            # Only a table of bare words continues with one, and only at its width
+            return self._symbolic and len(tokens) == len(self.rows[0]) and len(tokens[0]) == len(self.rows[0][0])
+        return "\t" in line.strip() or self._fenced or len(tokens) == self.expected_columns
+
+
+def parse_s_box(text: str, **parser_options) -> tuple[list[list[str]] | None, str | None]:
+    """Parse a complete response; returns (table, None) or (None, reason)."""
+    parser = SBoxStreamParser(**parser_options)
+    parser.feed(text)
+    table = parser.close()
+    return table, parser.error
+
+
+def parse_s_boxes(
+    text: str, max_boxes: int | None = None, **parser_options
+) -> list[tuple[list[list[str]] | None, str | None]]:
+    """
+    Parse every table in a response that holds several boxes; returns (table, None) or (None, reason) per table.
+
+    Tables end where ``SBoxStreamParser`` ends one, and also at a blank line. After an invalid row the
+    rest of that table, bare-word rows included, is skipped, so its remaining rows don't start a bogus
+    table of their own. Prose between tables is skipped like prose before the first one.
+    """
+    results: list[tuple[list[list[str]] | None, str | None]] = []
+    parser = SBoxStreamParser(**parser_options)
+    skipping = False
+
+    def finish() -> None:
+        nonlocal parser
+        table = parser.close()
+        results.append((table, parser.error))
+        parser = SBoxStreamParser(**parser_options)
+
+    for line in text.split("\n"):
+        if max_boxes is not None and len(results) >= max_boxes:
+            break
+        if skipping:
+            skipping = _row_tokens(line, symbolic=True) is not None
+            continue
+        if not line.strip() and parser.rows:
+            finish()
+            continue
+        parser.feed(line + "\n")
+        if parser.error is not None:
+            finish()
+            skipping = True
+        elif parser.done:
+            finish()
+    if parser.rows and (max_boxes is None or len(results) < max_boxes):
+        finish()
+    return results
@@ -0,0 +1,464 @@
+"""
+Pre-started worker pool that runs LLM-generated S-box generator code in a sandbox.
+
+``CryptographicSBoxModule`` asks the model for a python3 function returning the box as a
+``list[list[str]]``. Each worker is a separate, warm interpreter that receives source code over a pipe,
+runs it and sends back the table, so interpreter startup is paid once per worker rather than once
+per candidate. Inside a worker:
+
+  * on Linux the worker first isolates itself at the OS level, as far as its privileges allow: new
+    network and mount namespaces (no network interfaces besides a down loopback), a chroot into an
+    empty directory (no filesystem), and, when started as root, a switch to the unprivileged "nobody"
+    user so the process limit applies. ``SandboxPool.isolation`` reports which layers took effect;
+  * the code is parsed first and rejected if it touches any ``_``-prefixed name or attribute (the
+    usual way out of a restricted namespace), frame / generator / traceback attributes that walk to
+    other frames' globals, ``str.format`` / ``format_map`` (whose fields can read attributes), or
+    imports a module outside ``allowed_modules``. The default modules have no helpers that look up
+    attributes by name (``operator.attrgetter``, ``functools.update_wrapper``, ``string.Formatter``);
+  * it runs with a small set of builtins: no ``open``, ``exec``, ``eval``, ``getattr`` or unrestricted
+    ``__import__``;
+  * POSIX resource limits bound CPU time per candidate, address space and file size, and forbid
+    creating processes; sockets are disabled in Python as well.
+
+The parent enforces a wall-clock timeout on every candidate; a worker that hangs or dies is killed
+and replaced. Workers are started with the "spawn" method, so they share no state with the parent.
+This module only imports the standard library at the top level, to keep the workers light.
+"""
+
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Iterable, Iterator
+import ast
+import math
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+DEFAULT_ALLOWED_MODULES = frozenset({"math", "itertools", "random", "collections", "bisect", "heapq"})
+# Attributes that reach other frames (and their globals) without a leading underscore, and the string
+# methods whose replacement fields ("{0.__class__}") read attributes by name
+_BLOCKED_ATTRIBUTES = frozenset(
+    {
+        "gi_frame",
+        "gi_code",
+        "gi_yieldfrom",
+        "cr_frame",
+        "cr_code",
+        "cr_await",
+        "ag_frame",
+        "ag_code",
+        "ag_await",
+        "f_back",
+        "f_builtins",
+        "f_code",
+        "f_globals",
+        "f_locals",
+        "tb_frame",
+        "tb_next",
+        "format",
+        "format_map",
+    }
+)
+_NOBODY = 65534
+# unshare(2) flags
+_CLONE_NEWNS, _CLONE_NEWUSER, _CLONE_NEWNET = 0x00020000, 0x10000000, 0x40000000
+_SAFE_BUILTINS = (
+    "abs all any bin bool bytes chr dict divmod enumerate filter float format frozenset hash hex int "
+    "isinstance issubclass iter len list map max min next oct ord pow range repr reversed round set "
+    "slice sorted str sum tuple zip ArithmeticError AssertionError Exception IndexError KeyError "
+    "LookupError StopIteration TypeError ValueError ZeroDivisionError"
+).split()
+_FENCED_CODE = re.compile(r"```(?:python3?|py)?\s*\n(.*?)```", re.DOTALL)
+
+
+@dataclass
+class SandboxResult:
+    table: list[list[str]] | None
+    error: str | None
+    seconds: float
+
+
+def extract_code(text: str) -> str:
+    """Return the first fenced code block of an LLM answer, or the text itself if it has none."""
+    match = _FENCED_CODE.search(text)
+    return match.group(1) if match else text
+
+
+def _check_source(source: str, allowed_modules: frozenset[str]) -> ast.Module:
+    tree = ast.parse(source)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and (node.attr.startswith("_") or node.attr in _BLOCKED_ATTRIBUTES):
+            raise PermissionError(f"access to attribute {node.attr!r} is not allowed")
+        if isinstance(node, ast.Name) and node.id.startswith("_"):
+            raise PermissionError(f"access to name {node.id!r} is not allowed")
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            modules = [alias.name for alias in node.names] if isinstance(node, ast.Import) else [node.module or ""]
+            for module in modules:
+                if module.split(".")[0] not in allowed_modules:
+                    raise PermissionError(f"import of {module!r} is not allowed")
+            if isinstance(node, ast.ImportFrom) and any(alias.name.startswith("_") for alias in node.names):
+                raise PermissionError("importing private names is not allowed")
+    return tree
+
+
+def _restricted_builtins(allowed_modules: frozenset[str]) -> dict:
+    import builtins
+
+    def guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name.split(".")[0] not in allowed_modules:
+            raise ImportError(f"import of {name!r} is not allowed")
+        return __import__(name, globals, locals, fromlist, level)
+
+    namespace = {name: getattr(builtins, name) for name in _SAFE_BUILTINS}
+    # print is accepted and discarded, so chatty generated code doesn't flood the worker's stdout
+    namespace.update(__import__=guarded_import, __build_class__=builtins.__build_class__, print=lambda *a, **k: None)
+    return namespace
+
+
+def _run_candidate(
+    source: str, entry_point: str | None, args: tuple, allowed_modules: frozenset[str], max_cells: int
+) -> list[list[str]]:
+    tree = _check_source(source, allowed_modules)
+    namespace: dict[str, Any] = {"__builtins__": _restricted_builtins(allowed_modules), "__name__": "candidate"}
+    exec(compile(tree, "<candidate>", "exec"), namespace)
+
+    if entry_point is None:
+        functions = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+        if not functions:
+            raise ValueError("the code defines no function")
+        entry_point = functions[-1]
+    function = namespace.get(entry_point)
+    if not callable(function):
+        raise ValueError(f"the code defines no function {entry_point!r}")
+
+    table = function(*args)
+    if not isinstance(table, list) or not all(isinstance(row, list) for row in table):
+        raise TypeError("the function must return a list[list[str]]")
+    if sum(len(row) for row in table) > max_cells:
+        raise ValueError(f"the table has more than {max_cells} cells")
+    if not all(isinstance(symbol, str) for row in table for symbol in row):
+        raise TypeError("the function must return a list[list[str]]")
+    return [list(row) for row in table]
+
+
+def _virtual_memory_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _on_cpu_limit(signum, frame):
+    raise TimeoutError("CPU time limit exceeded")
+
+
+def _isolate(empty_directory: str) -> list[str]:
+    """
+    Cut the worker off from the network and the filesystem with Linux namespaces and chroot, and drop
+    root. Each layer is best effort; returns the names of those that took effect.
+    """
+    if not sys.platform.startswith("linux"):
+        return []
+    import ctypes
+
+    layers = []
+    libc = ctypes.CDLL(None, use_errno=True)
+    root = os.geteuid() == 0
+    # Unprivileged processes get the capabilities to unshare and chroot inside a new user namespace
+    if libc.unshare(_CLONE_NEWNS | _CLONE_NEWNET | (0 if root else _CLONE_NEWUSER)) == 0:
+        layers.append("network")
+        try:
+            os.chroot(empty_directory)
+            os.chdir("/")
+            layers.append("filesystem")
+        except OSError:
+            pass
+    if root:
+        try:
+            os.setgroups([])
+            os.setgid(_NOBODY)
+            os.setuid(_NOBODY)
+            layers.append("unprivileged")
+        except OSError:
+            pass
+    return layers
+
+
+def _worker_main(
+    connection: Connection,
+    cpu_seconds: float,
+    memory_bytes: int,
+    allowed_modules: frozenset[str],
+    max_cells: int,
+    empty_directory: str,
+) -> None:
+    import importlib
+    import socket
+
+    # Nothing can be imported from disk after the chroot, so load what the candidates may use first
+    for module in allowed_modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    connection.send(_isolate(empty_directory))
+
+    def no_sockets(*args, **kwargs):
+        raise PermissionError("network access is not allowed")
+
+    socket.socket = no_sockets  # type: ignore[assignment, misc]
+    socket.create_connection = no_sockets  # type: ignore[assignment]
+
+    if resource is not None:
+        # The address-space limit is on top of what the idle interpreter already maps
+        baseline = _virtual_memory_bytes() or 0
+        resource.setrlimit(resource.RLIMIT_AS, (baseline + memory_bytes, baseline + memory_bytes))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        source, entry_point, args = job
+        if resource is not None:
+            # RLIMIT_CPU counts the whole process's CPU time, so move the soft limit past what's been used
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu_hard))
+        try:
+            reply = ("ok", _run_candidate(source, entry_point, args, allowed_modules, max_cells))
+        except BaseException as error:  # the candidate may raise anything, including SystemExit
+            reply = ("error", f"{type(error).__name__}: {error}")
+        try:
+            connection.send(reply)
+        except MemoryError:
+            connection.send(("error", "MemoryError: result too large"))
+
+
+class _Worker:
+    def __init__(self, context, options: tuple):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, *options), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.job: int | None = None
+        self.started = 0.0
+        self.isolation: list[str] | None = None
+        # Held for every send / recv, so close() can't interleave with the thread that checked it out
+        self.lock = threading.Lock()
+
+    def wait_ready(self) -> None:
+        """Receive the isolation layers the worker reports once it is set up."""
+        try:
+            self.isolation = self.connection.recv()
+        except (EOFError, OSError):
+            # Died while starting; its first job reports that and gets it replaced
+            self.isolation = []
+
+    def stop(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class SandboxPool:
+    """
+    Runs generated S-box code in pre-started, reusable sandboxed worker processes.
+
+    ``run`` executes one candidate; ``map`` spreads many over the workers and yields (index, result)
+    in completion order. Use it as a context manager, or call ``close`` when done.
+
+    Both are safe to call from several threads: each call checks workers out of a queue of idle ones
+    and returns them when their job is done, so concurrent calls run side by side on different workers
+    and only wait when every worker is busy.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        cpu_seconds: float = 2.0,
+        memory_bytes: int = 256 * 2**20,
+        timeout: float = 5.0,
+        allowed_modules: Iterable[str] = DEFAULT_ALLOWED_MODULES,
+        max_cells: int = 2**16,
+    ):
+        """
+        :param workers: number of worker processes (defaults to the CPU count)
+        :param cpu_seconds: CPU time one candidate may use before it is interrupted
+        :param memory_bytes: address space a worker may map beyond its idle footprint
+        :param timeout: wall-clock seconds per candidate before its worker is killed and replaced
+        :param allowed_modules: modules the generated code may import
+        :param max_cells: largest table a candidate may return
+        """
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._empty_directory = tempfile.TemporaryDirectory(prefix="sandbox-root-")
+        os.chmod(self._empty_directory.name, 0o555)
+        self._options = (cpu_seconds, memory_bytes, frozenset(allowed_modules), max_cells, self._empty_directory.name)
+        self._workers = [_Worker(self._context, self._options) for _ in range(workers or os.cpu_count() or 1)]
+        for worker in self._workers:
+            worker.wait_ready()
+        self._idle: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for slot in range(len(self._workers)):
+            self._idle.put(slot)
+        self._restart_lock = threading.Lock()
+        self.restarts = 0
+
+    @property
+    def isolation(self) -> frozenset[str]:
+        """OS isolation layers every worker has: "network", "filesystem" and / or "unprivileged"."""
+        if not self._workers:
+            return frozenset()
+        return frozenset.intersection(*(frozenset(worker.isolation or ()) for worker in self._workers))
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            with worker.lock:
+                try:
+                    worker.connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            worker.process.join(timeout=1)
+            worker.stop()
+        self._workers = []
+        self._empty_directory.cleanup()
+
+    def run(self, source: str, entry_point: str | None = None, args: tuple = ()) -> SandboxResult:
+        """Run one candidate; the code may be a bare snippet or an LLM answer with a fenced block."""
+        return next(self.map([source], entry_point, args))[1]
+
+    def map(
+        self, sources: Iterable[str], entry_point: str | None = None, args: tuple = ()
+    ) -> Iterator[tuple[int, SandboxResult]]:
+        """
+        Run every candidate, at most one per worker at a time, yielding (index, result) as they finish.
+
+        :param sources: generated code, bare or inside a fenced block
+        :param entry_point: function to call; defaults to the last top-level function each candidate defines
+        :param args: positional arguments for it, e.g. (input_length, output_length, num_unique_symbols)
+        """
+        if not self._workers:
+            return
+        pending = iter(enumerate(sources))
+        running: dict[int, _Worker] = {}
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted:
+                    # Wait for a worker only when none is running for this call; otherwise take the idle ones
+                    try:
+                        slot = self._idle.get(block=not running)
+                    except queue.Empty:
+                        break
+                    try:
+                        index, source = next(pending)
+                    except StopIteration:
+                        self._idle.put(slot)
+                        exhausted = True
+                        break
+                    worker = self._workers[slot]
+                    with worker.lock:
+                        worker.connection.send((extract_code(source), entry_point, args))
+                    worker.job, worker.started = index, time.perf_counter()
+                    running[slot] = worker
+                if not running:
+                    return
+
+                deadline = min(worker.started for worker in running.values()) + self.timeout
+                ready = wait(
+                    [worker.connection for worker in running.values()], max(0.0, deadline - time.perf_counter())
+                )
+                now = time.perf_counter()
+                for slot, worker in list(running.items()):
+                    assert worker.job is not None
+                    index, elapsed = worker.job, now - worker.started
+                    if worker.connection in ready:
+                        try:
+                            with worker.lock:
+                                status, payload = worker.connection.recv()
+                        except (EOFError, OSError):
+                            status, payload = "error", f"worker died (exit code {worker.process.exitcode})"
+                    elif elapsed >= self.timeout:
+                        status, payload = "error", f"timed out after {self.timeout:g}s"
+                    else:
+                        continue
+
+                    del running[slot]
+                    worker.job = None
+                    if status == "error" and (payload.startswith("worker died") or payload.startswith("timed out")):
+                        self._replace(slot)
+                    self._idle.put(slot)
+                    if status == "ok":
+                        yield index, SandboxResult(payload, None, elapsed)
+                    else:
+                        yield index, SandboxResult(None, payload, elapsed)
+        finally:
+            # Abandoned part-way: the replies still in flight would reach the worker's next caller
+            for slot in running:
+                self._replace(slot)
+                self._idle.put(slot)
+
+    def _replace(self, slot: int) -> None:
+        """Kill the worker in ``slot`` and start a fresh one; the caller has it checked out."""
+        self._workers[slot].stop()
+        self._workers[slot] = _Worker(self._context, self._options)
+        self._workers[slot].wait_ready()
+        with self._restart_lock:
+            self.restarts += 1
+
+
+def evaluate_generated_code(
+    pool: SandboxPool,
+    sources: Iterable[str],
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    entry_point: str | None = None,
+    **evaluate_options: Any,
+) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Run generated generator functions in ``pool`` and score their tables with ``evaluate_s_box``.
+
+    Every function is called as f(input_length, output_length, num_unique_symbols). Yields
+    (index, metrics, None) for scored candidates and (index, None, error) for the rest, in completion order.
+    """
+    from src.evaluate_s_box import evaluate_s_box
+
+    args = (input_length, output_length, num_unique_symbols)
+    for index, result in pool.map(sources, entry_point, args):
+        if result.table is None:
+            yield index, None, result.error
+            continue
+        try:
+            metrics = evaluate_s_box(result.table, input_length, output_length, num_unique_symbols, **evaluate_options)
+        except (ValueError, IndexError) as error:
+            yield index, None, f"unparseable table: {error}"
+            continue
+        yield index, metrics, None
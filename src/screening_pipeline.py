@@ -0,0 +1,173 @@
+"""
+Staged screening of S-box candidates, cheapest checks first.
+
+  1. ``structure``: O(2^n) checks on the parsed table: cell count, output range, bijectivity (or
+     balancedness for n->m boxes) through a bitmap/bincount, fixed points and opposite fixed points.
+  2. ``sampled_ddt``: a handful of random DDT rows. Every row entry is a real DDT entry, so a sampled
+     row over the uniformity threshold rejects the box exactly, without the full table.
+  3. ``full``: ``evaluate_flat_s_box`` with its own early exit, only for the survivors.
+
+Each stage counts what it saw and rejected and how long it took, so thresholds can be tuned against
+where the CPU time actually goes.
+"""
+
+from dataclasses import dataclass
+import math
+import time
+
+import numpy as np
+
+from src.evaluate_s_box import evaluate_flat_s_box, flatten_s_box, resolve_radices
+from src.s_box import SBox
+
+
+@dataclass
+class StageStats:
+    name: str
+    evaluated: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+
+class ScreeningPipeline:
+    """
+    Screen candidates for one S-box shape, keeping per-stage reject counts and timings in ``stats``.
+
+    ``screen`` returns ``(metrics, None)`` for candidates that pass every stage and
+    ``(None, reason)`` for the rest.
+    """
+
+    def __init__(
+        self,
+        num_input_length: int,
+        num_output_length: int,
+        num_unique_symbols: int,
+        require_bijective: bool = True,
+        max_fixed_points: int | None = None,
+        max_opposite_fixed_points: int | None = None,
+        max_allowed_uniformity: int | None = None,
+        max_allowed_correlation: float | None = None,
+        ddt_sample_rows: int = 8,
+        random_seed: int = 0,
+    ):
+        """
+        :param num_input_length: as for ``evaluate_s_box``
+        :param num_output_length: as for ``evaluate_s_box``
+        :param num_unique_symbols: as for ``evaluate_s_box``
+        :param require_bijective: reject repeated outputs (n->m boxes must be balanced instead)
+        :param max_fixed_points: reject boxes with more inputs where S(x) = x
+        :param max_opposite_fixed_points: reject bitwise boxes with more inputs where S(x) = ~x
+        :param max_allowed_uniformity: reject boxes with a larger DDT entry (enables the sampled stage)
+        :param max_allowed_correlation: reject boxes with a larger max linear correlation
+        :param ddt_sample_rows: number of random nonzero input differences the sampled stage checks
+        :param random_seed: seed for the sampled rows
+        """
+        self.num_input_length = num_input_length
+        self.num_output_length = num_output_length
+        self.num_unique_symbols = num_unique_symbols
+        self.require_bijective = require_bijective
+        self.max_fixed_points = max_fixed_points
+        self.max_opposite_fixed_points = max_opposite_fixed_points
+        self.max_allowed_uniformity = max_allowed_uniformity
+        self.max_allowed_correlation = max_allowed_correlation
+        self.ddt_sample_rows = ddt_sample_rows
+        self.stats = {name: StageStats(name) for name in ("structure", "sampled_ddt", "full")}
+        self._rng = np.random.default_rng(random_seed)
+
+    def screen(self, s_box: "list[list[str]] | SBox") -> tuple[dict | None, str | None]:
+        """Run the stages in order, stopping at the first one that rejects the candidate."""
+        started = time.perf_counter()
+        values, radices, reason = self._check_structure(s_box)
+        self._record("structure", started, reason)
+        if reason is not None:
+            return None, reason
+        assert values is not None
+
+        if self.max_allowed_uniformity is not None and radices is None and self.ddt_sample_rows:
+            started = time.perf_counter()
+            reason = self._check_sampled_ddt(values)
+            self._record("sampled_ddt", started, reason)
+            if reason is not None:
+                return None, reason
+
+        started = time.perf_counter()
+        metrics = evaluate_flat_s_box(
+            values, self.num_input_length, self.num_output_length, self.max_allowed_uniformity, radices
+        )
+        reason = None
+        if metrics["uniformity_exceeded"]:
+            reason = f"differential uniformity above {self.max_allowed_uniformity}"
+        elif self.max_allowed_correlation is not None and (
+            metrics["max_linear_correlation"] is None
+            or metrics["max_linear_correlation"] > self.max_allowed_correlation
+        ):
+            reason = f"linear correlation above {self.max_allowed_correlation}"
+        self._record("full", started, reason)
+        return (None, reason) if reason is not None else (metrics, None)
+
+    def _record(self, stage: str, started: float, reason: str | None) -> None:
+        stats = self.stats[stage]
+        stats.evaluated += 1
+        stats.rejected += reason is not None
+        stats.seconds += time.perf_counter() - started
+
+    def _check_structure(
+        self, s_box: "list[list[str]] | SBox"
+    ) -> tuple[np.ndarray | None, tuple[int, ...] | None, str | None]:
+        try:
+            values = np.asarray(flatten_s_box(s_box), dtype=np.int64)
+        except (ValueError, IndexError) as error:
+            return None, None, f"unparseable table: {error}"
+
+        radices = resolve_radices(len(values), self.num_input_length, self.num_unique_symbols)
+        if radices is not None:
+            domain_size = out_size = math.prod(radices)
+        else:
+            domain_size, out_size = 2**self.num_input_length, 2**self.num_output_length
+        if len(values) != domain_size:
+            return None, None, f"{len(values)} cells, expected {domain_size}"
+        if values.min() < 0 or values.max() >= out_size:
+            return None, None, f"outputs outside [0, {out_size})"
+
+        if self.require_bijective:
+            # One bincount is both the bitmap of seen outputs and, for n->m boxes, the balance check
+            counts = np.bincount(values, minlength=out_size)
+            if domain_size >= out_size and (counts != domain_size // out_size).any():
+                return None, None, "not bijective" if domain_size == out_size else "not balanced"
+            if domain_size < out_size and counts.max() > 1:
+                return None, None, "repeated outputs"
+
+        inputs = np.arange(domain_size, dtype=np.int64)
+        if self.max_fixed_points is not None:
+            fixed_points = int((values == inputs).sum())
+            if fixed_points > self.max_fixed_points:
+                return None, None, f"{fixed_points} fixed points"
+        if self.max_opposite_fixed_points is not None and radices is None:
+            opposite_fixed_points = int((values == (~inputs & (out_size - 1))).sum())
+            if opposite_fixed_points > self.max_opposite_fixed_points:
+                return None, None, f"{opposite_fixed_points} opposite fixed points"
+        return values, radices, None
+
+    def _check_sampled_ddt(self, values: np.ndarray) -> str | None:
+        assert self.max_allowed_uniformity is not None
+        size = len(values)
+        rows = self._rng.choice(np.arange(1, size), size=min(self.ddt_sample_rows, size - 1), replace=False)
+        out_size = 2**self.num_output_length
+        dys = values[None, :] ^ values[np.arange(size)[None, :] ^ rows[:, None]]
+        cells = dys + (np.arange(len(rows)) * out_size)[:, None]
+        sampled_max = int(np.bincount(cells.ravel(), minlength=len(rows) * out_size).max(initial=0))
+        if sampled_max > self.max_allowed_uniformity:
+            return f"sampled DDT entry {sampled_max} above {self.max_allowed_uniformity}"
+        return None
+
+    def report(self) -> list[dict]:
+        """Per-stage counts and timings, in pipeline order."""
+        return [
+            {
+                "stage": stats.name,
+                "evaluated": stats.evaluated,
+                "rejected": stats.rejected,
+                "seconds": stats.seconds,
+            }
+            for stats in self.stats.values()
+        ]
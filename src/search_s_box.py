@@ -0,0 +1,181 @@
+"""
+Offline heuristic S-box search, a local alternative to ``get_s_box_for`` in src/utils.py.
+
+Every restart starts from a random box (or an LLM-supplied seed) and improves it by swapping two
+outputs at a time, so a bijective seed stays bijective. Bitwise boxes are annealed on top of
+``IncrementalSBoxState``; q-ary / mixed-radix boxes are hill-climbed with the modular DDT's early
+exit, which rejects most worse neighbours before the linear table is computed. Restarts run in
+parallel processes and are seeded deterministically from ``random_seed``.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+
+import numpy as np
+
+from src.evaluate_q_ary_s_box import evaluate_q_ary_s_box, infer_radices
+from src.evaluate_s_box import evaluate_s_box, flatten_s_box, s_box_cost
+from src.incremental_s_box import IncrementalSBoxState
+from src.s_box import SBox, values_to_table
+
+
+def _resolve_domain(
+    input_length: int, output_length: int, num_unique_symbols: int, radices: tuple[int, ...] | None = None
+) -> tuple[int, int | None, tuple[int, ...] | None]:
+    """
+    Read the ``get_s_box_for`` parameters the same way ``evaluate_s_box`` scores the result: a box with
+    num_unique_symbols entries over the given radices, else bitwise when that is 2^input_length, otherwise
+    over (q,) * input_length with q^input_length = num_unique_symbols.
+    """
+    if radices is not None:
+        if len(radices) != input_length or math.prod(radices) != num_unique_symbols:
+            raise ValueError(
+                f"Radices {radices} don't describe {input_length} characters and {num_unique_symbols} symbols"
+            )
+        return num_unique_symbols, None, radices
+    if num_unique_symbols == 2**input_length:
+        return num_unique_symbols, output_length, None
+    radices = infer_radices(num_unique_symbols, input_length)
+    if radices is None:
+        raise ValueError(
+            f"{num_unique_symbols} symbols is neither 2^{input_length} nor q^{input_length} for an integer q"
+        )
+    return num_unique_symbols, None, radices
+
+
+def _binary_cost(state: IncrementalSBoxState) -> float:
+    # s_box_cost, plus a tie-breaker below one step of either term: the share of table cells that sit at
+    # the current maximum, so the search can make progress on plateaus
+    ddt_ties = state.ddt_histogram[state.differential_uniformity] / state.ddt_histogram.sum()
+    walsh_ties = state.walsh_histogram[state.max_walsh] / state.walsh_histogram.sum()
+    return (
+        state.differential_uniformity / state.size
+        + state.max_linear_correlation
+        + (ddt_ties + walsh_ties) / (4 * state.size)
+    )
+
+
+def _anneal_binary(start: np.ndarray, n_in: int, n_out: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    state = IncrementalSBoxState(start, n_in, n_out)
+    cost = _binary_cost(state)
+    best_cost, best_values = cost, state.values.copy()
+    # Geometric cooling from about one DDT step down to a hundredth of it
+    initial_temperature = 1 / state.size
+    cooling = 0.01 ** (1 / max(1, iterations))
+    temperature = initial_temperature
+
+    for x1, x2 in rng.integers(state.size, size=(iterations, 2)):
+        state.swap(int(x1), int(x2))
+        candidate_cost = _binary_cost(state)
+        if candidate_cost <= cost or rng.random() < math.exp((cost - candidate_cost) / temperature):
+            cost = candidate_cost
+            state.clear_history()
+            if cost < best_cost:
+                best_cost, best_values = cost, state.values.copy()
+        else:
+            state.undo()
+        temperature *= cooling
+
+    return best_values
+
+
+def _climb_q_ary(start: np.ndarray, radices: tuple[int, ...], iterations: int, rng: np.random.Generator) -> np.ndarray:
+    values = start.copy()
+    metrics = evaluate_q_ary_s_box(values, radices)
+    cost = s_box_cost(metrics)
+
+    for x1, x2 in rng.integers(len(values), size=(iterations, 2)):
+        values[[x1, x2]] = values[[x2, x1]]
+        # Anything over the current uniformity is worse, so let the DDT bail out early
+        candidate = evaluate_q_ary_s_box(values, radices, max_allowed_uniformity=metrics["max_ddt_entry"])
+        candidate_cost = math.inf if candidate["uniformity_exceeded"] else s_box_cost(candidate)
+        if candidate_cost <= cost:
+            metrics, cost = candidate, candidate_cost
+        else:
+            values[[x1, x2]] = values[[x2, x1]]
+
+    return values
+
+
+def _run_restart(
+    start: np.ndarray,
+    n_out: int | None,
+    radices: tuple[int, ...] | None,
+    iterations: int,
+    seed: int,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    if radices is not None:
+        return _climb_q_ary(start, radices, iterations, rng)
+    assert n_out is not None
+    return _anneal_binary(start, int(math.log2(len(start))), n_out, iterations, rng)
+
+
+def search_s_box_for(
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    seeds: "list[list[list[str]] | SBox] | None" = None,
+    restarts: int = 4,
+    iterations: int = 5000,
+    top_k: int = 1,
+    max_workers: int | None = None,
+    random_seed: int = 0,
+    radices: tuple[int, ...] | None = None,
+) -> list[tuple[list[list[str]], dict]]:
+    """
+    Search for good S-boxes locally, with the same parameters as ``get_s_box_for``.
+
+    :param input_length: number of characters in the input (bits, for 2^input_length-symbol boxes)
+    :param output_length: number of characters in the output
+    :param num_unique_symbols: number of entries in the box, e.g. 125 for 5^3
+    :param seeds: starting boxes (e.g. LLM output); restart i starts from seeds[i % len(seeds)].
+        Random permutations are used when omitted.
+    :param restarts: number of independent searches
+    :param iterations: swaps tried per restart
+    :param top_k: number of boxes to return
+    :param max_workers: worker processes for the restarts (defaults to the CPU count)
+    :param random_seed: base seed; the same arguments always give the same boxes
+    :param radices: radix of each character, for mixed-radix boxes like (5, 5, 6); inferred when omitted
+    :return: up to top_k distinct (table, evaluate_s_box metrics) pairs, best (lowest s_box_cost) first
+    """
+    size, n_out, radices = _resolve_domain(input_length, output_length, num_unique_symbols, radices)
+    rng = np.random.default_rng(random_seed)
+
+    starts = []
+    for restart in range(restarts):
+        if seeds:
+            start = np.asarray(flatten_s_box(seeds[restart % len(seeds)]), dtype=np.int64)
+            if len(start) != size:
+                raise ValueError(f"Seed {restart % len(seeds)} has {len(start)} entries, expected {size}")
+        elif radices is None and n_out is not None and n_out < input_length:
+            # Balanced n->m box: every output appears 2^(n-m) times
+            start = rng.permutation(np.arange(size, dtype=np.int64) % 2**n_out)
+        else:
+            start = rng.permutation(size).astype(np.int64)
+        starts.append(start)
+    restart_seeds = rng.integers(2**32, size=restarts).tolist()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        found = list(
+            executor.map(
+                _run_restart,
+                starts,
+                [n_out] * restarts,
+                [radices] * restarts,
+                [iterations] * restarts,
+                restart_seeds,
+            )
+        )
+
+    results = []
+    seen = set()
+    for values in found:
+        key = values.tobytes()
+        if key in seen:
+            continue
+        seen.add(key)
+        table = values_to_table(values, radices)
+        results.append((table, evaluate_s_box(table, input_length, output_length, num_unique_symbols, radices=radices)))
+    results.sort(key=lambda result: s_box_cost(result[1]))
+    return results[:top_k]
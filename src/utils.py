@@ -1,16 +1,26 @@
 from dotenv import load_dotenv
-from typing import Any
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator
+import asyncio
 import os
 
 import ollama
 
+from src.instrumentation import count, phase
+from src.s_box_parser import SBoxStreamParser, parse_s_boxes
 
+DATA_DIRECTORY = Path(__file__).resolve().parent.parent / "data"
+
+
+@lru_cache(maxsize=1)
 def create_system_prompt():
-    with open("../data/rijndael-8-forward.tsv", "r") as known_s_box_1_file:
+    # The prompt files never change during a run, so they're read once and reused by every call
+    with open(DATA_DIRECTORY / "rijndael-forward.tsv", "r") as known_s_box_1_file:
         known_s_box_1 = known_s_box_1_file.readlines()
-    with open("../data/rijndael-8-reverse.tsv", "r") as known_s_box_2_file:
+    with open(DATA_DIRECTORY / "rijndael-reverse.tsv", "r") as known_s_box_2_file:
         known_s_box_2 = known_s_box_2_file.readlines()
-    with open("../data/system_prompt.txt", "r") as system_prompt_file:
+    with open(DATA_DIRECTORY / "system_prompt.txt", "r") as system_prompt_file:
         raw_system_prompt = system_prompt_file.read()
 
     system_prompt = raw_system_prompt.format(example_sbox_1=known_s_box_1, example_sbox_2=known_s_box_2)
@@ -25,26 +35,47 @@ def create_user_prompt(input_length: int, output_length: int, num_unique_symbols
 * number_of_possible_symbols: {num_unique_symbols}"""
 
 
+def create_multi_box_user_prompt(input_length: int, output_length: int, num_unique_symbols: int, num_boxes: int) -> str:
+    """``create_user_prompt`` asking for ``num_boxes`` different boxes in one response."""
+    user_prompt = create_user_prompt(input_length, output_length, num_unique_symbols)
+    if num_boxes == 1:
+        return user_prompt
+    return f"""{user_prompt}
+* number_of_s_boxes: {num_boxes}
+
+Write each s-box as its own table, with a blank line between the tables. Every s-box must be different."""
+
+
 def get_llm_response_for_prompt(system_prompt: str, user_prompt: str, model: Any = "mistral") -> Any:
     # response = ollama.chat(model=model, messages=[
     #     { "role": "user", "content": prompt }
     # ])
     # return response
-    response = ollama.chat(
-        # model="bge-base",
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": system_prompt,
-            },
-            {"role": "user", "content": user_prompt},
-        ],
-    )
+    with phase("llm_call", model=str(model)):
+        response = ollama.chat(
+            # model="bge-base",
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt,
+                },
+                {"role": "user", "content": user_prompt},
+            ],
+        )
+    _count_llm_usage(response)
     response_text = response["message"]["content"]
     return response_text
 
 
+def _count_llm_usage(response: Any) -> None:
+    """Add a finished chat response's token counts to the instrumentation counters."""
+    count("llm_calls")
+    # Stubbed / older servers may leave the counts out
+    count("llm_prompt_tokens", response.get("prompt_eval_count") or 0)
+    count("llm_completion_tokens", response.get("eval_count") or 0)
+
+
 def get_open_ai_api_key() -> str:
     load_dotenv()  # Load environment variables from the .env file
     api_key = os.getenv("OPEN_AI_API_KEY", None)
@@ -60,3 +91,188 @@ def get_s_box_for(input_length: int, output_length: int, num_unique_symbols: int
     # output = run_text_bedrock_llm(prompt=query, system_prompt=system_prompt, model_id=model_id_sonnet)
     output = get_llm_response_for_prompt(system_prompt=system_prompt, user_prompt=user_query, model=model_id)
     return output
+
+
+async def agenerate_s_boxes(
+    params: tuple[int, int, int],
+    n: int,
+    concurrency: int = 4,
+    model: Any = "mistral",
+    client: ollama.AsyncClient | None = None,
+    host: str | None = None,
+) -> AsyncIterator[str]:
+    """
+    Request ``n`` S-boxes concurrently and yield each response text as soon as it arrives.
+
+    All requests share one ``ollama.AsyncClient`` (and so one HTTP connection pool), and at most
+    ``concurrency`` of them are in flight at once. Responses come back in completion order, so the
+    caller can start evaluating the first candidates while the rest are still being generated::
+
+        async for response_text in agenerate_s_boxes((3, 3, 125), n=200, concurrency=8):
+            ...
+
+    :param params: (input_length, output_length, num_unique_symbols), as for ``get_s_box_for``
+    :param n: number of candidates to request
+    :param concurrency: maximum number of requests in flight
+    :param model: ollama model name
+    :param client: client to reuse across calls; one is created for ``host`` when omitted
+    :param host: ollama server URL (e.g. a local stub server in tests)
+    """
+    client = client or ollama.AsyncClient(host=host)
+    system_prompt = create_system_prompt()
+    user_prompt = create_user_prompt(*params)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate_one() -> str:
+        async with semaphore:
+            with phase("llm_call", model=str(model)):
+                response = await client.chat(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                )
+        _count_llm_usage(response)
+        return response["message"]["content"]
+
+    tasks = [asyncio.create_task(generate_one()) for _ in range(n)]
+    try:
+        for next_response in asyncio.as_completed(tasks):
+            yield await next_response
+    finally:
+        # The consumer may stop early; don't leave requests running behind it
+        for task in tasks:
+            task.cancel()
+
+
+def stream_s_box_for(
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    model_id: Any = "mistral",
+    expected_cells: int | None = None,
+    allow_duplicates: bool = False,
+    client: "ollama.Client | None" = None,
+    host: str | None = None,
+) -> tuple[list[list[str]] | None, str | None]:
+    """
+    Like ``get_s_box_for``, but parses the response while it streams and stops the generation early.
+
+    The stream is closed (which ends the generation on the ollama server) as soon as the parser sees a
+    malformed row or a repeated symbol, or once the table is complete, so no tokens are spent on a box
+    that is already invalid or on prose after it.
+
+    :param expected_cells: total number of symbols the box must have (e.g. num_unique_symbols)
+    :param allow_duplicates: accept repeated outputs, for n->m boxes
+    :param client: client to use; one is created for ``host`` when omitted
+    :param host: ollama server URL (defaults to OLLAMA_HOST / localhost)
+    :return: (table, None) for a valid box, (None, reason) otherwise
+    """
+    parser = SBoxStreamParser(expected_cells=expected_cells, allow_duplicates=allow_duplicates)
+    client = client or ollama.Client(host=host)
+    stream = client.chat(
+        model=model_id,
+        messages=[
+            {"role": "system", "content": create_system_prompt()},
+            {"role": "user", "content": create_user_prompt(input_length, output_length, num_unique_symbols)},
+        ],
+        stream=True,
+    )
+    try:
+        with phase("llm_stream", model=str(model_id)):
+            for chunk in stream:
+                if chunk.get("done"):
+                    _count_llm_usage(chunk)
+                if not parser.feed(chunk["message"]["content"]) or parser.done:
+                    break
+    finally:
+        stream.close()
+
+    table = parser.close()
+    return table, parser.error
+
+
+def generate_s_boxes_per_response(
+    input_length: int,
+    output_length: int,
+    num_unique_symbols: int,
+    boxes_per_response: int = 4,
+    responses: int = 1,
+    model_id: Any = "mistral",
+    keep_alive: float | str | None = "10m",
+    expected_cells: int | None = None,
+    allow_duplicates: bool = False,
+    client: "ollama.Client | None" = None,
+    host: str | None = None,
+) -> tuple[list[list[list[str]]], dict]:
+    """
+    Ask for ``boxes_per_response`` boxes in each of ``responses`` chat calls and parse all of them.
+
+    The system prompt (with its two 256-entry example tables) is the bulk of every request. It is sent
+    byte-for-byte the same on every call with the varying part in the user message, and ``keep_alive``
+    keeps the model loaded between calls, so ollama reuses the cached prefix instead of prefilling it
+    again. Asking for several boxes per response spreads what is left of that cost over more boxes.
+
+    :param boxes_per_response: boxes requested per response (N)
+    :param responses: number of chat calls
+    :param keep_alive: how long the server keeps the model loaded after each call (ollama duration)
+    :param expected_cells: total number of symbols every box must have (e.g. num_unique_symbols)
+    :param allow_duplicates: accept repeated outputs, for n->m boxes
+    :param client: client to reuse across calls; one is created for ``host`` when omitted
+    :param host: ollama server URL (defaults to OLLAMA_HOST / localhost)
+    :return: (valid tables, report); the report has the token counts and server timings in total and per
+        accepted box, to tune ``boxes_per_response`` for the most boxes per GPU-second
+    """
+    client = client or ollama.Client(host=host)
+    messages = [
+        {"role": "system", "content": create_system_prompt()},
+        {
+            "role": "user",
+            "content": create_multi_box_user_prompt(
+                input_length, output_length, num_unique_symbols, boxes_per_response
+            ),
+        },
+    ]
+    tables: list[list[list[str]]] = []
+    totals = {"prompt_tokens": 0, "completion_tokens": 0, "load": 0, "prefill": 0, "decode": 0}
+    parsed = 0
+    for _ in range(responses):
+        with phase("llm_call", model=str(model_id), boxes=boxes_per_response):
+            response = client.chat(model=model_id, messages=messages, keep_alive=keep_alive)
+        _count_llm_usage(response)
+        totals["prompt_tokens"] += response.get("prompt_eval_count") or 0
+        totals["completion_tokens"] += response.get("eval_count") or 0
+        # Durations are in nanoseconds
+        totals["load"] += response.get("load_duration") or 0
+        totals["prefill"] += response.get("prompt_eval_duration") or 0
+        totals["decode"] += response.get("eval_duration") or 0
+
+        results = parse_s_boxes(
+            response["message"]["content"],
+            max_boxes=boxes_per_response,
+            expected_cells=expected_cells,
+            allow_duplicates=allow_duplicates,
+        )
+        parsed += len(results)
+        tables.extend(table for table, _ in results if table is not None)
+    count("llm_boxes_accepted", len(tables))
+
+    accepted = len(tables)
+    gpu_seconds = (totals["prefill"] + totals["decode"]) / 1e9
+    report = {
+        "responses": responses,
+        "boxes_per_response": boxes_per_response,
+        "boxes_parsed": parsed,
+        "boxes_accepted": accepted,
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "load_seconds": totals["load"] / 1e9,
+        "prefill_seconds": totals["prefill"] / 1e9,
+        "decode_seconds": totals["decode"] / 1e9,
+        "prompt_tokens_per_box": totals["prompt_tokens"] / accepted if accepted else None,
+        "completion_tokens_per_box": totals["completion_tokens"] / accepted if accepted else None,
+        "prefill_seconds_per_box": totals["prefill"] / 1e9 / accepted if accepted else None,
+        "boxes_per_gpu_second": accepted / gpu_seconds if gpu_seconds else None,
+    }
+    return tables, report
@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+
+from src.candidate_store import CandidateStore
+from src.evaluate_s_box import evaluate_s_box, s_box_cost
+from src.s_box_io import read_s_box_tsv
+
+
+def test_store_persists_candidates_and_answers_top_k(tmp_path):
+    rng = random.Random(4)
+    aes = read_s_box_tsv("data/rijndael-forward.tsv")
+    random_boxes = [[[f"{value:02x}" for value in rng.sample(range(256), 256)]] for _ in range(20)]
+
+    with CandidateStore(tmp_path, flush_every=8) as store:
+        for seed, table in enumerate(random_boxes):
+            store.add(table, 8, 8, 256, model="mistral", prompt="make an S-box", seed=seed)
+        aes_row = store.add(aes, 8, 8, 256, model="rijndael", source="data/rijndael-forward.tsv")
+        # Not a bijection of the right size: stored, but never ranked on the DDT
+        store.add(np.zeros(256, dtype=np.int64), 8, 8, 256, metrics={"max_ddt_entry": None})
+        q_ary = np.arange(125)
+        store.add(q_ary, 3, 3, 125, seed=7)
+        assert store.count(8, 8, 256) == 22
+
+    reopened = CandidateStore(tmp_path)
+    assert reopened.count(8, 8, 256) == 22
+    best = reopened.top_k(8, 8, 256, k=5)
+    assert [candidate["row"] for candidate in best][0] == aes_row
+    assert best[0]["provenance"]["source"] == "data/rijndael-forward.tsv"
+    assert best[0]["values"].tolist() == [int(symbol, 16) for row in aes for symbol in row]
+    assert best[0]["max_ddt_entry"] == 4 and best[0]["algebraic_degree"] == 7
+    assert [candidate["cost"] for candidate in best] == sorted(candidate["cost"] for candidate in best)
+
+    expected = sorted(s_box_cost(evaluate_s_box(table, 8, 8, 256)) for table in random_boxes + [aes])
+    assert [candidate["cost"] for candidate in reopened.top_k(8, 8, 256, k=100)] == expected
+    by_ddt = reopened.top_k(8, 8, 256, k=100, by="max_ddt_entry")
+    assert len(by_ddt) == 21 and by_ddt[0]["row"] == aes_row
+    assert [candidate["max_ddt_entry"] for candidate in by_ddt] == sorted(c["max_ddt_entry"] for c in by_ddt)
+
+    # Appending after reopening extends the indexes
+    reopened.add(aes, 8, 8, 256, seed=99)
+    assert [candidate["row"] for candidate in reopened.top_k(8, 8, 256, k=2)] == [aes_row, 22]
+    reopened.close()
+
+    (q_ary_box,) = CandidateStore(tmp_path).top_k(3, 3, 125)
+    assert q_ary_box["provenance"]["seed"] == 7 and q_ary_box["values"].tolist() == q_ary.tolist()
+    assert CandidateStore(tmp_path).top_k(3, 3, 343) == []
+
+
+def _metrics(linear_correlation: float) -> dict:
+    return {"max_ddt_entry": 2, "max_linear_correlation": linear_correlation, "domain_size": 16}
+
+
+def test_flushes_write_sorted_runs_that_merge_logarithmically(tmp_path):
+    rng = np.random.default_rng(3)
+    costs = rng.integers(0, 50, 1000).astype(float)
+    with CandidateStore(tmp_path, flush_every=10) as store:
+        for cost in costs:
+            store.add(np.arange(16), 4, 4, 16, metrics=_metrics(cost))
+        shape = store._shape(4, 4, 16)
+        shape.flush()
+        runs = shape.runs("cost")
+        # 100 equal flushes leave one run per set bit of 100 (64 + 32 + 4 flushes)
+        assert [stop - start for start, stop, _ in runs] == [640, 320, 40]
+        assert len(list(tmp_path.glob("16_4x4/run_cost_*.npy"))) == 3
+
+        best = store.top_k(4, 4, 16, k=25)
+        expected = np.lexsort((np.arange(1000), costs))[:25]
+        assert [candidate["row"] for candidate in best] == expected.tolist()
+
+    # A run left behind by a flush that never committed is ignored and cleaned up
+    np.save(tmp_path / "16_4x4" / "run_cost_1000_1010.npy", np.zeros(0))
+    with CandidateStore(tmp_path, flush_every=10) as store:
+        assert [candidate["row"] for candidate in store.top_k(4, 4, 16, k=25)] == expected.tolist()
+        store.add(np.arange(16), 4, 4, 16, metrics=_metrics(-1.0))
+        assert store.top_k(4, 4, 16, k=1)[0]["row"] == 1000
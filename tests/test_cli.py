@@ -0,0 +1,99 @@
+import io
+import json
+import subprocess
+import sys
+
+from src.candidate_store import CandidateStore
+from src.cli import main
+from src.evaluate_s_box import evaluate_s_box
+from src.s_box_io import read_s_box_tsv
+
+
+def _records(output: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_evaluate_directory_and_stdin_stream():
+    output = io.StringIO()
+    assert main(["evaluate", "data"], stdout=output) == 0
+    records = _records(output)
+    assert [record["source"] for record in records] == [
+        "data/des-forward.tsv",
+        "data/rijndael-forward.tsv",
+        "data/rijndael-reverse.tsv",
+    ]
+    aes = read_s_box_tsv("data/rijndael-forward.tsv")
+    assert {key: records[1][key] for key in evaluate_s_box(aes, 8, 8, 256)} == evaluate_s_box(aes, 8, 8, 256)
+
+    # Blank-line separated boxes on stdin, with explicit shape flags and an unreadable block
+    des = read_s_box_tsv("data/des-forward.tsv")
+    text = "\n".join("\t".join(row) for row in des) + "\n\nnot a box\n"
+    output = io.StringIO()
+    status = main(
+        ["evaluate", "-", "--input-length", "6", "--output-length", "4"], stdin=io.StringIO(text), stdout=output
+    )
+    first, second = _records(output)
+    assert status == 1
+    assert first["source"] == "<stdin>:1" and first["output_length"] == 4
+    assert first["max_ddt_entry"] == evaluate_s_box(des, 6, 4, 64)["max_ddt_entry"]
+    assert second == {"source": "<stdin>:2", "error": "no table found"}
+
+
+def test_search_stores_results(tmp_path):
+    output = io.StringIO()
+    arguments = ["search", "--input-length", "3", "--symbols", "125", "--algebraic", "--restarts", "2"]
+    arguments += ["--iterations", "50", "--workers", "1", "--top-k", "2", "--store", str(tmp_path)]
+    assert main(arguments, stdout=output) == 0
+    records = _records(output)
+    assert len(records) == 2 and all(record["domain_consistency"] for record in records)
+    with CandidateStore(tmp_path) as store:
+        assert store.count(3, 3, 125) == 2
+
+
+def test_evaluate_does_not_import_llm_libraries():
+    script = (
+        "import sys, io\n"
+        "import src.cli\n"
+        "assert 'numpy' not in sys.modules\n"
+        "src.cli.main(['evaluate', 'data/rijndael-forward.tsv'], stdout=io.StringIO())\n"
+        "print(sorted({'ollama', 'dotenv', 'dspy', 'torch', 'textgrad'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_evaluate_mixed_radix_box_and_workers_match_serial():
+    # 150 entries are 3 characters of radices 5, 5 and 6; without --radices the domain doesn't match
+    table = [
+        [f"{value // 30}{value // 6 % 5}{value % 6}" for value in range(row * 15, row * 15 + 15)] for row in range(10)
+    ]
+    text = "\n".join("\t".join(row) for row in table) + "\n"
+    arguments = ["evaluate", "-", "--input-length", "3", "--symbols", "150"]
+    output = io.StringIO()
+    main(arguments, stdin=io.StringIO(text), stdout=output)
+    assert not _records(output)[0]["domain_consistency"]
+    output = io.StringIO()
+    assert main(arguments + ["--radices", "5,5,6"], stdin=io.StringIO(text), stdout=output) == 0
+    assert _records(output)[0]["domain_consistency"]
+
+    serial = io.StringIO()
+    assert main(["evaluate", "data", "--connectivity"], stdout=serial) == 0
+    parallel = io.StringIO()
+    assert main(["evaluate", "data", "--connectivity", "--workers", "2"], stdout=parallel) == 0
+    assert _records(parallel) == _records(serial)
+
+
+def test_evaluate_infers_the_output_length_and_search_takes_radices():
+    # DES boxes map 6 bits to 4; without --output-length that comes from the largest output
+    des = read_s_box_tsv("data/des-forward.tsv")
+    output = io.StringIO()
+    assert main(["evaluate", "data/des-forward.tsv"], stdout=output) == 0
+    (record,) = _records(output)
+    assert record["output_length"] == 4
+    assert {key: record[key] for key in evaluate_s_box(des, 6, 4, 64)} == evaluate_s_box(des, 6, 4, 64)
+
+    output = io.StringIO()
+    arguments = ["search", "--input-length", "3", "--symbols", "150", "--radices", "5,5,6", "--restarts", "1"]
+    assert main(arguments + ["--iterations", "20", "--workers", "1"], stdout=output) == 0
+    (record,) = _records(output)
+    assert record["domain_consistency"] and len(record["table"]) * len(record["table"][0]) == 150
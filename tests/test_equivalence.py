@@ -0,0 +1,77 @@
+import numpy as np
+
+from src.equivalence import (
+    CandidateDeduplicator,
+    equivalence_key,
+    has_mask_invariant_metrics,
+    invariant_fingerprint,
+    translation_canonical_form,
+)
+from src.evaluate_s_box import evaluate_flat_s_box
+from src.evaluation_cache import EvaluationCache
+
+
+def _linear_map(matrix: np.ndarray, values: np.ndarray) -> np.ndarray:
+    bits = (values[:, None] >> np.arange(matrix.shape[1])) & 1
+    return (((bits @ matrix.T) % 2) << np.arange(matrix.shape[0])).sum(axis=1)
+
+
+def test_xor_masked_variants_share_a_canonical_form():
+    rng = np.random.default_rng(0)
+    s_box = rng.permutation(64)
+    masked = s_box[np.arange(64) ^ 0b101101] ^ 0b010011
+    assert (translation_canonical_form(masked) == translation_canonical_form(s_box)).all()
+    assert translation_canonical_form(s_box)[0] == 0
+    assert equivalence_key(masked) == equivalence_key(s_box)
+    assert equivalence_key(rng.permutation(64)) != equivalence_key(s_box)
+
+
+def test_affine_equivalent_boxes_share_fingerprint_and_metrics():
+    rng = np.random.default_rng(1)
+    s_box = rng.permutation(64)
+    # Unit upper-triangular matrices are always invertible over GF(2)
+    a = np.triu(rng.integers(0, 2, (6, 6)), 1) + np.eye(6, dtype=np.int64)
+    b = np.triu(rng.integers(0, 2, (6, 6)), 1).T + np.eye(6, dtype=np.int64)
+    equivalent = _linear_map(a, s_box[_linear_map(b, np.arange(64)) ^ 9]) ^ 17
+
+    assert invariant_fingerprint(equivalent, 6, 6) == invariant_fingerprint(s_box, 6, 6)
+    assert invariant_fingerprint(rng.permutation(64), 6, 6) != invariant_fingerprint(s_box, 6, 6)
+    assert evaluate_flat_s_box(equivalent, 6, 6) == evaluate_flat_s_box(s_box, 6, 6)
+
+
+def test_fingerprint_of_non_surjective_box_survives_output_linear_map():
+    # A 4-bit -> 3-bit box that never sets its top output bit; swapping output bits 0 and 2 moves its largest output
+    s_box = np.random.default_rng(3).integers(0, 4, 16)
+    swap = np.array([[0, 0, 1], [0, 1, 0], [1, 0, 0]])
+    swapped = _linear_map(swap, s_box)
+    assert swapped.max() != s_box.max() and len(set(s_box.tolist())) < 8
+    assert invariant_fingerprint(swapped, 4, 3) == invariant_fingerprint(s_box, 4, 3)
+
+
+def test_deduplicator_and_canonical_cache():
+    rng = np.random.default_rng(2)
+    s_box = rng.permutation(16)
+    variants = [s_box[np.arange(16) ^ mask] ^ mask * 3 % 16 for mask in range(4)]
+    deduplicator = CandidateDeduplicator(4, 4, fingerprints=True)
+    assert [deduplicator.add(variant) for variant in variants] == [True, False, False, False]
+    assert deduplicator.add([[f"{value:x}" for value in rng.permutation(16)]])
+    assert deduplicator.report() == {"seen": 5, "distinct": 2, "duplicates": 3, "fingerprint_classes": 2}
+
+    cache = EvaluationCache(canonicalize=True)
+    tables = [[[f"{value:x}" for value in variant]] for variant in variants]
+    assert [cache.evaluate(table, 4, 4, 16) for table in tables] == [evaluate_flat_s_box(s_box, 4, 4)] * 4
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_canonical_cache_keeps_non_surjective_boxes_apart():
+    # A 4-bit box with 3-bit outputs: masking with 8 widens the output masks walsh_spectrum keeps
+    s_box = np.random.default_rng(2).integers(0, 8, 16)
+    masked = s_box ^ 8
+    assert evaluate_flat_s_box(s_box, 4, 4)["max_linear_correlation"] == 0.625
+    assert evaluate_flat_s_box(masked, 4, 4)["max_linear_correlation"] == 1.0
+    assert not has_mask_invariant_metrics(s_box, 4)
+
+    cache = EvaluationCache(canonicalize=True)
+    tables = [[[f"{value:x}" for value in box]] for box in (s_box, masked)]
+    assert [cache.evaluate(table, 4, 4, 16)["max_linear_correlation"] for table in tables] == [0.625, 1.0]
+    assert cache.misses == 2
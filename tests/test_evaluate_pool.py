@@ -0,0 +1,27 @@
+import random
+
+from src.evaluate_pool import evaluate_s_boxes_in_parallel
+from src.evaluate_s_box import evaluate_s_box
+
+
+def test_evaluate_s_boxes_in_parallel_matches_serial():
+    rng = random.Random(7)
+    s_boxes = [[[f"{value:x}" for value in rng.sample(range(64), 64)]] for _ in range(9)]
+    s_boxes.append([["0", "1", "2"]])  # wrong domain size, still gets a result
+
+    results = dict(evaluate_s_boxes_in_parallel(s_boxes, 6, 6, max_workers=2))
+
+    assert sorted(results) == list(range(len(s_boxes)))
+    for index, s_box in enumerate(s_boxes):
+        assert results[index] == evaluate_s_box(s_box, 6, 6, 64)
+
+
+def test_evaluate_s_boxes_in_parallel_infers_q_ary_radices():
+    rng = random.Random(11)
+    s_boxes = [[[str(value) for value in rng.sample(range(125), 125)]] for _ in range(3)]
+
+    results = dict(evaluate_s_boxes_in_parallel(s_boxes, 3, 3, 125, max_workers=2))
+
+    for index, s_box in enumerate(s_boxes):
+        assert results[index] == evaluate_s_box(s_box, 3, 3, 125)
+        assert results[index]["radices"] == (5, 5, 5)
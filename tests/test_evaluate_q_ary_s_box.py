@@ -0,0 +1,84 @@
+import cmath
+import math
+import random
+
+import numpy as np
+
+from src.evaluate_q_ary_s_box import (
+    compute_character_lat,
+    compute_modular_ddt_and_uniformity,
+    evaluate_q_ary_s_box,
+    infer_radices,
+    modular_differential_spectrum,
+)
+from src.evaluate_s_box import compute_ddt, evaluate_s_box, walsh_spectrum
+
+
+def test_radix_two_matches_binary_metrics():
+    s_box = random.Random(1).sample(range(16), 16)
+    ddt, _ = compute_modular_ddt_and_uniformity(s_box, (2, 2, 2, 2))
+    assert (ddt == compute_ddt(s_box, 4, 4)).all()
+    lat = compute_character_lat(s_box, (2, 2, 2, 2))
+    assert np.allclose(np.abs(lat), np.abs(walsh_spectrum(s_box, 4, 4)))
+
+
+def test_mixed_radix_tables_match_definition():
+    radices, output_radices = (2, 3), (3, 2)
+    s_box = random.Random(2).sample(range(6), 6)
+
+    def digits(value, shape):
+        return [int(digit) for digit in np.unravel_index(value, shape)]
+
+    def index(digit_values, shape):
+        return int(np.ravel_multi_index(digit_values, shape))
+
+    expected_ddt = np.zeros((6, 6), dtype=int)
+    expected_lat = np.zeros((6, 6), dtype=complex)
+    for x in range(6):
+        for a in range(6):
+            shifted = index([(i + j) % r for i, j, r in zip(digits(x, radices), digits(a, radices), radices)], radices)
+            y1, y2 = digits(s_box[x], output_radices), digits(s_box[shifted], output_radices)
+            expected_ddt[a, index([(j - i) % r for i, j, r in zip(y1, y2, output_radices)], output_radices)] += 1
+    for u in range(6):
+        for v in range(6):
+            for x in range(6):
+                phase = sum(
+                    d * y / r
+                    for d, y, r in zip(digits(v, output_radices), digits(s_box[x], output_radices), output_radices)
+                )
+                phase -= sum(d * i / r for d, i, r in zip(digits(u, radices), digits(x, radices), radices))
+                expected_lat[u, v] += cmath.exp(2j * math.pi * phase)
+
+    ddt, max_ddt_entry = compute_modular_ddt_and_uniformity(s_box, radices, output_radices)
+    assert (ddt == expected_ddt).all()
+    assert max_ddt_entry == expected_ddt[1:].max()
+    assert np.allclose(compute_character_lat(s_box, radices, output_radices), expected_lat)
+
+
+def test_evaluate_s_box_scores_readme_targets():
+    assert infer_radices(125, 3) == (5, 5, 5)
+    assert infer_radices(1331, 3) == (11, 11, 11)
+    assert infer_radices(150, 3) is None
+
+    permutation = random.Random(3).sample(range(125), 125)
+    table = [[str(value) for value in permutation[row * 25 : (row + 1) * 25]] for row in range(5)]
+    metrics = evaluate_s_box(table, 3, 3, 125)
+    assert metrics["radices"] == (5, 5, 5)
+    assert metrics["domain_consistency"]
+    assert metrics == evaluate_q_ary_s_box(permutation, (5, 5, 5))
+    assert 1 <= metrics["max_ddt_entry"] <= 125
+    assert 0 < metrics["max_linear_correlation"] < 1
+
+
+def test_streaming_mode_scores_like_the_full_tables():
+    rng = random.Random(5)
+    for radices in ((5, 5, 5), (5, 6, 6), (11, 11, 11)):
+        size = math.prod(radices)
+        permutation = rng.sample(range(size), size)
+        streamed = evaluate_q_ary_s_box(permutation, radices, streaming=True)
+        histogram = streamed.pop("differential_spectrum")
+        assert streamed == evaluate_q_ary_s_box(permutation, radices)
+
+        ddt, max_ddt_entry = compute_modular_ddt_and_uniformity(permutation, radices)
+        assert histogram == np.bincount(ddt[1:].ravel(), minlength=size + 1).tolist()
+        assert modular_differential_spectrum(permutation, radices)[1] == max_ddt_entry
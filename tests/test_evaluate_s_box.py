@@ -1,4 +1,34 @@
-from src.evaluate_s_box import evaluate_s_box
+import random
+
+from src.evaluate_s_box import (
+    algebraic_profile,
+    autocorrelation_indicators,
+    avalanche_profile,
+    compute_autocorrelation,
+    compute_bct_and_uniformity,
+    compute_ddt,
+    compute_ddt_and_uniformity,
+    compute_dlct,
+    compute_walsh_hadamard,
+    differential_spectrum,
+    evaluate_flat_s_box,
+    evaluate_s_box,
+    evaluate_s_boxes,
+    linear_spectrum,
+    walsh_spectrum,
+)
+
+AES_S_BOX_HEX = (
+    "637c777bf26b6fc53001672bfed7ab76ca82c97dfa5947f0add4a2af9ca472c0"
+    "b7fd9326363ff7cc34a5e5f171d8311504c723c31896059a071280e2eb27b275"
+    "09832c1a1b6e5aa0523bd6b329e32f8453d100ed20fcb15b6acbbe394a4c58cf"
+    "d0efaafb434d338545f9027f503c9fa851a3408f929d38f5bcb6da2110fff3d2"
+    "cd0c13ec5f974417c4a77e3d645d197360814fdc222a908846eeb814de5e0bdb"
+    "e0323a0a4906245cc2d3ac629195e479e7c8376d8dd54ea96c56f4ea657aae08"
+    "ba78252e1ca6b4c6e8dd741f4bbd8b8a703eb5664803f60e613557b986c11d9e"
+    "e1f8981169d98e949b1e87e9ce5528df8ca1890dbfe6426841992d0fb054bb16"
+)
+AES_S_BOX = [int(AES_S_BOX_HEX[i : i + 2], 16) for i in range(0, 512, 2)]
 
 
 def test_evaluate_s_box_with_aes():
@@ -122,3 +152,175 @@ def test_evaluate_s_box_with_aes():
     print("DES S-box evaluation:")
     for k, v in des_metrics.items():
         print(f"  {k}: {v}")
+
+
+def test_walsh_spectrum_matches_definition():
+    # PRESENT's 4-bit S-box
+    present_s_box = [0xC, 0x5, 0x6, 0xB, 0x9, 0x0, 0xA, 0xD, 0x3, 0xE, 0xF, 0x8, 0x4, 0x7, 0x1, 0x2]
+    spectrum = walsh_spectrum(present_s_box, 4, 4)
+    wht = compute_walsh_hadamard(present_s_box, 4, 4)
+    assert spectrum.shape == (16, 16)
+    assert len(wht) == 256
+    for alpha in range(16):
+        for beta in range(16):
+            expected = sum(
+                (-1) ** (bin(alpha & x).count("1") + bin(beta & present_s_box[x]).count("1")) for x in range(16)
+            )
+            assert spectrum[alpha, beta] == expected
+            assert wht[(alpha, beta)] == expected
+    # PRESENT is an optimal 4-bit S-box: every non-trivial component has |W| <= 8
+    assert abs(spectrum[:, 1:]).max() == 8
+
+
+def test_compute_ddt_matches_definition_and_exits_early():
+    present_s_box = [0xC, 0x5, 0x6, 0xB, 0x9, 0x0, 0xA, 0xD, 0x3, 0xE, 0xF, 0x8, 0x4, 0x7, 0x1, 0x2]
+    expected = [[0] * 16 for _ in range(16)]
+    for x in range(16):
+        for dx in range(16):
+            expected[dx][present_s_box[x] ^ present_s_box[x ^ dx]] += 1
+
+    ddt, max_ddt_entry = compute_ddt_and_uniformity(present_s_box, 4, 4)
+    assert ddt.dtype == "uint16"
+    assert ddt.tolist() == expected
+    assert compute_ddt(present_s_box, 4, 4).tolist() == expected
+    assert max_ddt_entry == 4
+
+    # The identity map has DDT[dx][dx] = 16 for every dx, far over any sane threshold
+    _, max_ddt_entry = compute_ddt_and_uniformity(list(range(16)), 4, 4, max_allowed_uniformity=4)
+    assert max_ddt_entry == 16
+    metrics = evaluate_s_box([[f"{v:x}" for v in range(16)]], 4, 4, 16, max_allowed_uniformity=4)
+    assert metrics["uniformity_exceeded"]
+    assert metrics["max_linear_correlation"] is None
+
+
+def test_evaluate_s_boxes_matches_evaluate_s_box():
+    rng = random.Random(3)
+    batch = [rng.sample(range(64), 64) for _ in range(5)] + [[rng.randrange(16) for _ in range(64)]]
+    results = evaluate_s_boxes(batch, 6, 6, max_chunk_cells=2**13)
+    assert set(results) == {"range_consistency", "max_ddt_entry", "max_linear_correlation", "is_bent"}
+    algebraic = evaluate_s_boxes(batch, 6, 6, max_chunk_cells=2**13, algebraic=True)
+    for i, flat in enumerate(batch):
+        metrics = evaluate_s_box([[f"{value:x}" for value in flat]], 6, 6, 64, algebraic=True)
+        assert results["range_consistency"][i] == metrics["range_consistency"]
+        assert results["max_ddt_entry"][i] == metrics["max_ddt_entry"]
+        assert results["max_linear_correlation"][i] == metrics["max_linear_correlation"]
+        assert results["is_bent"][i] == metrics["is_bent"]
+        assert algebraic["algebraic_degree"][i] == metrics["algebraic_degree"]
+        assert algebraic["min_component_degree"][i] == metrics["min_component_degree"]
+
+
+def test_algebraic_profile_matches_anf_definition():
+    rng = random.Random(5)
+    s_box = rng.sample(range(16), 16)
+
+    def anf(truth_table):
+        # Coefficient of x^u is the XOR of f(x) over the x covered by u
+        return [sum(truth_table[x] for x in range(16) if x & u == x) % 2 for u in range(16)]
+
+    def degree(coefficients):
+        return max((bin(u).count("1") for u in range(16) if coefficients[u]), default=0)
+
+    coordinates = [anf([(s_box[x] >> i) & 1 for x in range(16)]) for i in range(4)]
+    components = [anf([bin(beta & s_box[x]).count("1") % 2 for x in range(16)]) for beta in range(1, 16)]
+
+    profile = algebraic_profile(s_box, 4, 4)
+    assert profile["coordinate_degrees"] == [degree(c) for c in coordinates]
+    assert profile["anf_terms"] == [sum(c) for c in coordinates]
+    assert profile["min_component_degree"] == min(degree(c) for c in components)
+    assert profile["algebraic_degree"] == max(degree(c) for c in coordinates)
+
+    # Affine maps have degree 1; the AES S-box (inversion in GF(2^8)) has every component at degree 7
+    assert algebraic_profile([x ^ 0b1010 for x in range(16)], 4, 4)["min_component_degree"] == 1
+    profile = algebraic_profile(AES_S_BOX, 8, 8)
+    assert profile["algebraic_degree"] == profile["min_component_degree"] == 7
+
+    # Opt-in, like the connectivity and avalanche metrics
+    table = [[f"{value:02x}" for value in AES_S_BOX]]
+    assert "algebraic_degree" not in evaluate_s_box(table, 8, 8, 256)
+    assert evaluate_s_box(table, 8, 8, 256, algebraic=True)["min_component_degree"] == 7
+
+
+def test_bct_and_dlct_match_definitions():
+    rng = random.Random(7)
+    present_s_box = [0xC, 0x5, 0x6, 0xB, 0x9, 0x0, 0xA, 0xD, 0x3, 0xE, 0xF, 0x8, 0x4, 0x7, 0x1, 0x2]
+    for s_box in [present_s_box] + [rng.sample(range(16), 16) for _ in range(5)]:
+        inverse = [s_box.index(y) for y in range(16)]
+        expected_bct = [
+            [
+                sum(inverse[s_box[x] ^ nabla] ^ inverse[s_box[x ^ dx] ^ nabla] == dx for x in range(16))
+                for nabla in range(16)
+            ]
+            for dx in range(16)
+        ]
+        expected_dlct = [
+            [
+                sum(bin(beta & (s_box[x] ^ s_box[x ^ dx])).count("1") % 2 == 0 for x in range(16)) - 8
+                for beta in range(16)
+            ]
+            for dx in range(16)
+        ]
+        bct, boomerang_uniformity = compute_bct_and_uniformity(s_box, 4)
+        assert bct.tolist() == expected_bct
+        assert boomerang_uniformity == max(max(row[1:]) for row in expected_bct[1:])
+        assert compute_dlct(s_box, 4, 4).tolist() == expected_dlct
+
+    # Cid et al.: the AES S-box has boomerang uniformity 6
+    metrics = evaluate_s_box([[f"{value:02x}" for value in AES_S_BOX]], 8, 8, 256, connectivity_tables=True)
+    assert metrics["boomerang_uniformity"] == 6
+    assert metrics["differential_linear_uniformity"] == 16
+    assert "boomerang_uniformity" not in evaluate_s_box([[f"{value:02x}" for value in AES_S_BOX]], 8, 8, 256)
+
+
+def test_streaming_mode_scores_like_the_full_tables():
+    rng = random.Random(11)
+    cases = [(AES_S_BOX, 8, 8), (rng.sample(range(64), 64), 6, 6), ([rng.randrange(16) for _ in range(64)], 6, 4)]
+    for s_box, n_in, n_out in cases:
+        for max_allowed_uniformity in (None, 4):
+            full = evaluate_flat_s_box(s_box, n_in, n_out, max_allowed_uniformity, connectivity_tables=True)
+            streamed = evaluate_flat_s_box(
+                s_box, n_in, n_out, max_allowed_uniformity, connectivity_tables=True, streaming=True
+            )
+            differential = streamed.pop("differential_spectrum")
+            linear = streamed.pop("linear_spectrum")
+            assert streamed == full
+            if not full["uniformity_exceeded"]:
+                ddt = compute_ddt(s_box, n_in, n_out)
+                spectrum = walsh_spectrum(s_box, n_in, n_out)
+                assert differential == [int((ddt[1:] == value).sum()) for value in range(2**n_in + 1)]
+                assert linear == [int((abs(spectrum[:, 1:]) == value).sum()) for value in range(2**n_in + 1)]
+                assert differential_spectrum(s_box, n_in, n_out)[1] == full["max_ddt_entry"]
+                assert linear_spectrum(s_box, n_in, n_out)[1] / 2**n_in == full["max_linear_correlation"]
+
+
+def test_avalanche_metrics_match_definitions():
+    rng = random.Random(13)
+    for s_box in [rng.sample(range(16), 16) for _ in range(4)] + [[value ^ 3 for value in range(16)]]:
+        derivatives = [[s_box[x] ^ s_box[x ^ (1 << i)] for x in range(16)] for i in range(4)]
+        expected_sac = [[sum((d >> j) & 1 for d in row) / 16 for j in range(4)] for row in derivatives]
+        expected_bic_sac = max(
+            abs(sum(((d >> j) ^ (d >> k)) & 1 for d in row) / 16 - 0.5)
+            for row in derivatives
+            for j in range(4)
+            for k in range(j + 1, 4)
+        )
+        profile = avalanche_profile(s_box, 4, 4)
+        assert profile["sac_matrix"] == expected_sac
+        assert profile["sac_max_deviation"] == max(abs(p - 0.5) for row in expected_sac for p in row)
+        assert profile["bic_sac_max_deviation"] == expected_bic_sac
+
+        expected_autocorrelation = [
+            [sum((-1) ** bin(beta & (s_box[x] ^ s_box[x ^ dx])).count("1") for x in range(16)) for beta in range(16)]
+            for dx in range(16)
+        ]
+        assert compute_autocorrelation(s_box, 4, 4).tolist() == expected_autocorrelation
+        assert autocorrelation_indicators(s_box, 4, 4) == (
+            max(abs(value) for row in expected_autocorrelation[1:] for value in row[1:]),
+            max(sum(row[beta] ** 2 for row in expected_autocorrelation) for beta in range(1, 16)),
+        )
+
+    # Known AES values: absolute indicator 32, sum-of-squares indicator 133120, SAC within 1/2 +- 1/16
+    metrics = evaluate_s_box([[f"{value:02x}" for value in AES_S_BOX]], 8, 8, 256, avalanche=True)
+    assert (metrics["absolute_indicator"], metrics["sum_of_squares_indicator"]) == (32, 133120)
+    assert metrics["sac_max_deviation"] == 0.0625
+    streamed = evaluate_s_box([[f"{value:02x}" for value in AES_S_BOX]], 8, 8, 256, avalanche=True, streaming=True)
+    assert {name: streamed[name] for name in metrics} == metrics
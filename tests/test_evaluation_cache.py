@@ -0,0 +1,51 @@
+from src import evaluation_cache
+from src.evaluate_s_box import evaluate_s_box
+from src.evaluation_cache import EvaluationCache
+from src.s_box import SBox
+from src.s_box_io import read_s_box_tsv
+
+
+def test_cache_hits_on_same_table_in_any_encoding(tmp_path):
+    aes = read_s_box_tsv("data/rijndael-forward.tsv")
+    aes_upper = [[symbol.upper() for symbol in row] for row in aes]
+    cache = EvaluationCache(max_entries=1, path=tmp_path / "evaluations.sqlite")
+
+    first = cache.evaluate(aes, 8, 8, 16)
+    assert first == evaluate_s_box(aes, 8, 8, 16)
+    assert cache.evaluate(aes_upper, 8, 8, 16) == first
+    assert cache.evaluate(SBox(aes), 8, 8, 16) == first
+    assert cache.stats() == {"hits": 2, "disk_hits": 0, "misses": 1, "evictions": 0, "entries": 1}
+
+    # A different box pushes AES out of memory, but SQLite still has it
+    inverse = read_s_box_tsv("data/rijndael-reverse.tsv")
+    cache.evaluate(inverse, 8, 8, 16)
+    assert cache.evictions == 1
+    assert cache.evaluate(aes, 8, 8, 16) == first
+    assert cache.disk_hits == 1
+    # Different evaluation parameters are different entries
+    cache.evaluate(aes, 8, 8, 16, max_allowed_uniformity=2)
+    assert cache.misses == 3
+    cache.close()
+
+    reopened = EvaluationCache(path=tmp_path / "evaluations.sqlite")
+    q_ary = [[str(value) for value in range(125)]]
+    assert reopened.evaluate(aes, 8, 8, 16) == first
+    assert reopened.evaluate(q_ary, 3, 3, 125) == evaluate_s_box(q_ary, 3, 3, 125)
+    reopened.close()
+    reopened = EvaluationCache(path=tmp_path / "evaluations.sqlite")
+    assert reopened.evaluate(q_ary, 3, 3, 125)["radices"] == (5, 5, 5)
+    assert reopened.stats()["misses"] == 0
+    reopened.close()
+
+
+def test_persistent_entries_expire_with_the_evaluator_version(tmp_path, monkeypatch):
+    aes = read_s_box_tsv("data/rijndael-forward.tsv")
+    cache = EvaluationCache(path=tmp_path / "evaluations.sqlite")
+    cache.evaluate(aes, 8, 8, 16)
+    cache.close()
+
+    monkeypatch.setattr("src.evaluation_cache.EVALUATOR_VERSION", evaluation_cache.EVALUATOR_VERSION + 1)
+    reopened = EvaluationCache(path=tmp_path / "evaluations.sqlite")
+    assert reopened.evaluate(aes, 8, 8, 16) == evaluate_s_box(aes, 8, 8, 16)
+    assert reopened.stats()["misses"] == 1 and reopened.disk_hits == 0
+    reopened.close()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.evaluate_s_box import evaluate_flat_s_box, evaluate_s_box
+from src.finite_field import GaloisField, field_for, generate_field_s_boxes_for, rank_power_maps
+
+
+def test_field_arithmetic_and_power_maps():
+    for p, k in ((2, 8), (5, 3), (11, 3)):
+        field = GaloisField(p, k)
+        rng = np.random.default_rng(p)
+        a, b, c = rng.integers(field.order, size=(3, 500))
+        assert (field.multiply(a, field.add(b, c)) == field.add(field.multiply(a, b), field.multiply(a, c))).all()
+        nonzero = np.arange(1, field.order)
+        assert (field.multiply(nonzero, field.inversion()[1:]) == 1).all()
+        assert sorted(field.power_map(field.permutation_exponents()[-1]).tolist()) == list(range(field.order))
+
+        tables, _ = field.random_affine_layers(64, rng)
+        assert all(sorted(row) == list(range(field.order)) for row in tables.tolist())
+        # x -> M x + c: the differences of the image only depend on the difference of the inputs
+        differences = field.add(
+            tables[:, field.add(nonzero, 1)], (-field.digits[tables[:, nonzero]] % p) @ field.strides
+        )
+        assert (differences == differences[:, :1]).all()
+
+    # Inversion in GF(2^8) is the AES S-box up to the affine layer, so it scores the same
+    aes_core = evaluate_flat_s_box(GaloisField(2, 8).inversion(), 8, 8, algebraic=True)
+    assert (aes_core["max_ddt_entry"], aes_core["max_linear_correlation"], aes_core["algebraic_degree"]) == (
+        4,
+        0.125,
+        7,
+    )
+
+
+def test_generated_boxes_share_their_power_maps_metrics():
+    ranked = rank_power_maps(3, 3, 125, top_k=None)
+    assert len(ranked) == len(GaloisField(5, 3).permutation_exponents())
+    # The best power maps of GF(5^3) are almost perfect nonlinear
+    assert ranked[0][1]["max_ddt_entry"] == 2
+
+    boxes = generate_field_s_boxes_for(3, 3, 125, count=6, top_exponents=2, random_seed=1)
+    assert len({str(table) for table, _ in boxes}) == 6
+    for table, metrics in boxes:
+        evaluated = evaluate_s_box(table, 3, 3, 125)
+        assert evaluated["max_ddt_entry"] == metrics["max_ddt_entry"]
+        assert evaluated["max_linear_correlation"] == pytest.approx(metrics["max_linear_correlation"])
+
+    for table, metrics in generate_field_s_boxes_for(6, 6, 64, count=4):
+        assert evaluate_s_box(table, 6, 6, 64) == metrics
+
+    with pytest.raises(ValueError):
+        field_for(3, 3, 216)
+    with pytest.raises(ValueError):
+        field_for(3, 3, 150)
@@ -0,0 +1,35 @@
+import random
+
+import numpy as np
+
+from src.evaluate_s_box import compute_ddt_and_uniformity, walsh_spectrum
+from src.incremental_s_box import IncrementalSBoxState
+
+
+def test_swaps_and_undo_match_full_recomputation():
+    rng = random.Random(5)
+    state = IncrementalSBoxState(rng.sample(range(32), 32), 5, 5)
+    for _ in range(100):
+        state.swap(rng.randrange(32), rng.randrange(32))
+        if rng.random() < 0.3:
+            state.undo()
+
+        ddt, max_ddt_entry = compute_ddt_and_uniformity(state.values, 5, 5)
+        spectrum = walsh_spectrum(state.values, 5, 5)
+        assert (state.ddt == ddt).all()
+        assert state.differential_uniformity == max_ddt_entry
+        assert (state.walsh == spectrum).all()
+        assert state.max_walsh == np.abs(spectrum[:, 1:]).max()
+        assert state.nonlinearity == (32 - state.max_walsh) // 2
+
+
+def test_undo_restores_original_box():
+    original = list(range(16))
+    state = IncrementalSBoxState(original, 4, 4)
+    assert state.differential_uniformity == 16
+    state.swap(0, 5)
+    state.swap(3, 9)
+    assert state.undo() == (3, 9)
+    assert state.undo() == (0, 5)
+    assert state.values.tolist() == original
+    assert state.differential_uniformity == 16
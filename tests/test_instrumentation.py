@@ -0,0 +1,46 @@
+import json
+import pstats
+
+import pytest
+
+from src.evaluate_s_box import evaluate_s_box
+from src.instrumentation import count, phase, recording
+
+PRESENT_S_BOX = [["c", "5", "6", "b", "9", "0", "a", "d", "3", "e", "f", "8", "4", "7", "1", "2"]]
+
+
+def test_hooks_do_nothing_without_a_recording():
+    with phase("anything"):
+        count("anything")
+    with recording() as recorder:
+        pass
+    assert recorder.summary() == {"phases": {}, "counters": {}}
+
+
+def test_recording_times_phases_and_writes_profile_and_trace(tmp_path):
+    seen = []
+    profile_path = tmp_path / "run.pstats"
+    trace_path = tmp_path / "run.trace.json"
+    with recording(
+        hook=lambda name, seconds, attributes: seen.append(name), profile_path=profile_path, trace_path=trace_path
+    ) as recorder:
+        evaluate_s_box(PRESENT_S_BOX, 4, 4, 16, algebraic=True)
+        evaluate_s_box(PRESENT_S_BOX, 4, 4, 16, algebraic=True)
+        with pytest.raises(RuntimeError):
+            with recording():
+                pass
+
+    summary = recorder.summary()
+    assert summary["phases"]["ddt"]["calls"] == 2
+    assert set(summary["phases"]) == {"parse", "ddt", "wht", "algebraic"}
+    assert summary["counters"] == {"cells_parsed": 32, "boxes_evaluated": 2, "ddt_entries": 512, "walsh_entries": 512}
+    assert seen == ["parse", "ddt", "wht", "algebraic"] * 2
+
+    assert any("compute_ddt_and_uniformity" in function for _, _, function in pstats.Stats(str(profile_path)).stats)
+    trace = json.loads(trace_path.read_text())
+    assert [event["name"] for event in trace["traceEvents"]] == seen
+    assert trace["otherData"]["counters"]["boxes_evaluated"] == 2
+
+    # Finished recordings stop collecting
+    evaluate_s_box(PRESENT_S_BOX, 4, 4, 16)
+    assert recorder.summary() == summary
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.evaluate_s_box import compute_ddt, evaluate_s_box
+from src.s_box import SBox, values_to_table
+from src.s_box_io import read_s_box_tsv
+
+
+def test_s_box_detects_encoding_once_per_table():
+    des = SBox.from_tsv("data/des-forward.tsv")
+    assert des.encoding == "binary"
+    assert des.shape == (4, 16)
+    # "0010" is binary 2, not hex 0x10
+    assert des.values[:4].tolist() == [2, 12, 4, 1]
+
+    aes = SBox.from_tsv("data/rijndael-forward.tsv")
+    assert aes.encoding == "hex"
+    assert aes.values.dtype == np.uint16
+    assert aes.values[:2].tolist() == [0x63, 0x7C]
+    assert aes.to_table() == read_s_box_tsv("data/rijndael-forward.tsv")
+
+    assert SBox([["3", "10", "7"]]).encoding == "decimal"
+    assert SBox([["3", "10", "7"]]).values.tolist() == [3, 10, 7]
+
+    emoji = SBox([["🐱", "🐶"], ["🐶", "x"]])
+    assert emoji.encoding == "symbolic"
+    assert emoji.values.tolist() == [0, 1, 1, 2]
+    assert emoji.to_table() == [["🐱", "🐶"], ["🐶", "x"]]
+
+    digits = SBox([["aab", "cba"]], alphabet="abcde")
+    assert digits.values.tolist() == [1, 2 * 25 + 1 * 5]
+    assert digits.to_table() == [["aab", "cba"]]
+    with pytest.raises(ValueError):
+        SBox([["aaz"]], alphabet="abcde")
+
+
+def test_metrics_accept_parsed_s_box():
+    aes = SBox.from_tsv("data/rijndael-forward.tsv")
+    assert compute_ddt(aes, 8, 8).max(initial=0, where=np.arange(256)[:, None] > 0) == 4
+    metrics = evaluate_s_box(aes, 8, 8, 16)
+    assert metrics == evaluate_s_box(read_s_box_tsv("data/rijndael-forward.tsv"), 8, 8, 16)
+    assert metrics["max_ddt_entry"] == 4
+    assert metrics["max_linear_correlation"] == 0.125
+
+
+def test_detects_q_ary_alphabet_of_readme_boxes():
+    rng = np.random.default_rng(5)
+    permutation = rng.permutation(125)
+    expected = evaluate_s_box([[str(value) for value in permutation]], 3, 3, 125)
+    assert expected["range_consistency"] and expected["radices"] == (5, 5, 5)
+
+    for alphabet in ("01234", "abcde", "vwxyz"):
+        # 25 rows of 5 three-letter symbols, the most significant digit first
+        flat = ["".join(alphabet[(value // 5**power) % 5] for power in (2, 1, 0)) for value in permutation]
+        table = [flat[row * 5 : (row + 1) * 5] for row in range(25)]
+        s_box = SBox(table)
+        assert (s_box.encoding, s_box.alphabet) == ("alphabet", alphabet)
+        assert s_box.values.tolist() == permutation.tolist()
+        assert s_box.to_table() == table
+        assert evaluate_s_box(table, 3, 3, 125) == expected
+        assert evaluate_s_box(table, 3, 3, 125, alphabet=alphabet) == expected
+
+
+def test_values_to_table_round_trips_through_s_box():
+    values = np.random.default_rng(0).permutation(256)
+    table = values_to_table(values)
+    assert len(table) == 16 and table[0][0] == format(values[0], "02x")
+    assert np.array_equal(SBox(table).values, values)
+
+    mixed = np.random.default_rng(1).permutation(150)
+    table = values_to_table(mixed, (5, 5, 6))
+    assert len(table[0]) == 30 and np.array_equal(SBox(table).values, mixed)
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import time
+
+from src.evaluate_s_box import evaluate_s_box, s_box_cost
+from src.s_box_io import read_s_box_tsv
+from src.s_box_metric import SBoxMetric
+from src.sandbox_pool import SandboxPool
+
+
+def _answer(table: list[list[str]]) -> SimpleNamespace:
+    rows = "\n".join("\t".join(row) for row in table)
+    return SimpleNamespace(answer=f"Here is the S-box:\n\n{rows}\n\nIt is bijective.")
+
+
+def test_metric_scores_answers_like_evaluate_s_box():
+    aes = read_s_box_tsv("data/rijndael-forward.tsv")
+    example = SimpleNamespace(question="8, 8, 256", input_length=8, output_length=8, num_unique_symbols=256)
+    repeated = [row[:] for row in aes]
+    repeated[0][1] = repeated[0][0]
+
+    with SBoxMetric(max_workers=2, bootstrap_threshold=0.9) as metric:
+        expected = 1 / (1 + s_box_cost(evaluate_s_box(aes, 8, 8, 256)))
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            scores = list(threads.map(lambda _: metric(example, _answer(aes)), range(8)))
+        assert scores == [expected] * 8
+        # Only the first call evaluated; concurrent callers that raced it may have too
+        assert 1 <= metric.cache.misses <= 4
+
+        # Bootstrapping wants a pass / fail
+        assert metric(example, _answer(aes), trace=[]) is False
+        metric.bootstrap_threshold = 0.8
+        assert metric(example, _answer(aes), trace=[]) is True
+
+        assert metric(example, _answer(repeated)) == 0.0
+        assert metric(example, SimpleNamespace(answer="I can't do that.")) == 0.0
+        assert metric.rejected == 2
+
+
+def test_metric_takes_the_shape_from_the_constructor():
+    table = [["0", "1", "3", "2"]]
+    metric = SBoxMetric(2, 2, 4, max_workers=0)
+    metrics = evaluate_s_box(table, 2, 2, 4)
+    assert metric(SimpleNamespace(question="2, 2, 4"), _answer(table)) == 1 / (1 + s_box_cost(metrics))
+
+
+def test_metric_runs_code_answers_in_the_sandbox():
+    code = SimpleNamespace(
+        answer="```python\ndef make(input_length, output_length, num_unique_symbols):\n"
+        "    values = [(7 * x + 3) % 16 for x in range(2 ** input_length)]\n"
+        "    return [[format(value, 'x') for value in values]]\n```"
+    )
+    table = [[format((7 * x + 3) % 16, "x") for x in range(16)]]
+    example = SimpleNamespace(question="4, 4, 16")
+
+    with SandboxPool(workers=1) as sandbox, SBoxMetric(4, 4, 16, max_workers=0, sandbox=sandbox) as metric:
+        assert metric(example, code) == metric(example, _answer(table)) > 0
+    # Without a sandbox the code can't be scored
+    assert SBoxMetric(4, 4, 16, max_workers=0)(example, code) == 0.0
+
+
+def test_concurrent_code_answers_run_side_by_side():
+    # Each answer sleeps for a second in its worker; two workers run both in about one
+    code = SimpleNamespace(
+        answer="```python\nimport time\n\ndef make(input_length, output_length, num_unique_symbols):\n"
+        "    time.sleep(1)\n"
+        "    return [[format(x, 'x') for x in range(2 ** input_length)]]\n```"
+    )
+    example = SimpleNamespace(question="4, 4, 16")
+
+    with (
+        SandboxPool(workers=2, allowed_modules={"time"}) as sandbox,
+        SBoxMetric(4, 4, 16, max_workers=0, sandbox=sandbox) as metric,
+        ThreadPoolExecutor(max_workers=2) as threads,
+    ):
+        started = time.perf_counter()
+        scores = list(threads.map(lambda _: metric(example, code), range(2)))
+        elapsed = time.perf_counter() - started
+    assert scores[0] == scores[1] > 0
+    assert elapsed < 1.8
@@ -0,0 +1,110 @@
+from src.s_box_parser import SBoxStreamParser, parse_s_box, parse_s_boxes
+
+RESPONSE = """Sure! Here is a 4-bit S-box:
+
+```python
+s_box = [
+    ["c", "5", "6", "b"],
+    ["9", "0", "a", "d"],
+    ["3", "e", "f", "8"],
+    ["4", "7", "1", "2"],
+]
+```
+
+It has differential uniformity 4.
+"""
+
+
+def test_parses_list_literal_tsv_and_hex_rows():
+    table, error = parse_s_box(RESPONSE)
+    assert error is None
+    assert table == [["c", "5", "6", "b"], ["9", "0", "a", "d"], ["3", "e", "f", "8"], ["4", "7", "1", "2"]]
+
+    assert parse_s_box("63\t7c\t77\n7b\tf2\t6b\n")[0] == [["63", "7c", "77"], ["7b", "f2", "6b"]]
+    assert parse_s_box("[0x63, 0x7c],\n[0x77, 0x7b]")[0] == [["63", "7c"], ["77", "7b"]]
+    assert parse_s_box("no table in here")[1] == "no table found"
+
+
+def test_stream_stops_at_first_invalid_row():
+    parser = SBoxStreamParser(expected_cells=16)
+    chunks = ["63\t7c\t7", "7\t7b\n", "f2\t63\t", "6b\t6f\n", "c5\t30\t01\t67\n"]
+    accepted = [parser.feed(chunk) for chunk in chunks]
+    # "63" repeats in the second row, so everything after it is ignored
+    assert accepted == [True, True, True, False, False]
+    assert parser.error == "duplicate symbol '63' in row 2"
+    assert parser.rows == [["63", "7c", "77", "7b"]]
+
+    ragged = SBoxStreamParser()
+    assert ragged.feed("1 2 3 4\n5 6 7\n") is False
+    assert ragged.error == "row 2 has 3 symbols, expected 4"
+
+
+def test_stream_is_done_once_expected_cells_arrive():
+    parser = SBoxStreamParser(expected_cells=4)
+    parser.feed("0 1\n2 3\n")
+    assert parser.done
+    assert parser.close() == [["0", "1"], ["2", "3"]]
+    assert parse_s_box("0 1\n2 3\n", expected_cells=6)[1] == "4 cells, expected 6"
+    assert parse_s_box("0010 1100\n0010 0100\n", allow_duplicates=True)[0] == [["0010", "1100"], ["0010", "0100"]]
+
+
+def test_parse_s_boxes_splits_multi_box_responses():
+    response = """Here are three boxes:
+
+```
+0 1 2 3
+4 5 6 7
+```
+
+S-box 2:
+0 1 2 3
+4 5 6 0
+9 8 a b
+
+3 2 1 0
+7 6 5 4
+Done."""
+    results = parse_s_boxes(response, expected_cells=8)
+    assert results == [
+        ([["0", "1", "2", "3"], ["4", "5", "6", "7"]], None),
+        (None, "duplicate symbol '0' in row 2"),
+        ([["3", "2", "1", "0"], ["7", "6", "5", "4"]], None),
+    ]
+    assert parse_s_boxes(response, max_boxes=1) == results[:1]
+
+
+def test_prose_of_equal_length_words_is_not_a_row():
+    text = "and the box you ask for\n0 1 2 3\n4 5 6 7\n8 9 a b\nc d e f\nnow you see all of it\n"
+    assert parse_s_box(text) == (
+        [["0", "1", "2", "3"], ["4", "5", "6", "7"], ["8", "9", "a", "b"], ["c", "d", "e", "f"]],
+        None,
+    )
+    # After a hex table, a line of words as wide as it ends the table instead of joining it
+    assert parse_s_box("0 1 2 3\n4 5 6 7\nall the way out\n")[0] == [["0", "1", "2", "3"], ["4", "5", "6", "7"]]
+
+    # Bare words only count once something says they are symbols
+    symbolic = "Here it is:\nyxy xyx xyy\nyxx xxy yyy\n"
+    assert parse_s_box(symbolic) == (None, "no table found")
+    expected = [["yxy", "xyx", "xyy"], ["yxx", "xxy", "yyy"]]
+    assert parse_s_box(symbolic, alphabet="xy")[0] == expected
+    assert parse_s_box(symbolic, expected_columns=3)[0] == expected
+    assert parse_s_box(symbolic.replace(" ", "\t"))[0] == expected
+    assert parse_s_box("Here it is:\n```\nyxy xyx xyy\nyxx xxy yyy\n```\nthe end\n")[0] == expected
+
+
+def test_parse_s_boxes_skips_prose_and_bad_rows_between_boxes():
+    # A line of words as wide as the boxes sits between them, without a blank line
+    response = "0 1 2 3\n4 5 6 7\nnow the new one\n3 2 1 0\n7 6 5 4\n"
+    assert parse_s_boxes(response, expected_cells=8) == [
+        ([["0", "1", "2", "3"], ["4", "5", "6", "7"]], None),
+        ([["3", "2", "1", "0"], ["7", "6", "5", "4"]], None),
+    ]
+
+    # Tab-separated bare words: every row after the repeated symbol belongs to the rejected box
+    first = "xxx\txxy\nxxx\tyyy\nxyx\txyy\nyxx\tyxy"
+    second = "yyy\tyyx\nyxy\tyxx\nxyy\txyx\nxxy\txxx"
+    results = parse_s_boxes(f"Two boxes:\n{first}\n\nand the next:\n{second}\n", expected_cells=8)
+    assert results == [
+        (None, "duplicate symbol 'xxx' in row 2"),
+        ([row.split("\t") for row in second.split("\n")], None),
+    ]
@@ -0,0 +1,68 @@
+import sys
+
+import pytest
+
+from src.sandbox_pool import SandboxPool, evaluate_generated_code
+
+GOOD = """Here is the function:
+
+```python
+import random
+
+def make_s_box(input_length, output_length, num_unique_symbols):
+    values = list(range(2 ** input_length))
+    random.Random(1).shuffle(values)
+    return [[format(value, "x") for value in values[start : start + 4]] for start in range(0, len(values), 4)]
+```
+"""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="resource limits are POSIX only")
+def test_sandbox_runs_generated_code_and_contains_bad_candidates():
+    candidates = [
+        GOOD,
+        "import os\ndef f(*args):\n    return os.listdir('/')",
+        "def f(*args):\n    return open('/etc/passwd').read()",
+        "def f(*args):\n    return ().__class__.__base__",
+        "def f(*args):\n    return [[1, 2]]",
+        "def f(*args):\n    return [0] * 10**9",
+        "def f(*args):\n    while True:\n        pass",
+        GOOD,
+        "import operator\ndef f(*args):\n    return operator.attrgetter('__class__.__base__.__subclasses__')(())()",
+        "def f(*args):\n    return [['{0.__class__}'.format(())]]",
+        "def f(*args):\n    def g():\n        yield frames.gi_frame.f_back.f_back\n"
+        "    frames = g()\n    return next(frames)",
+    ]
+    with SandboxPool(workers=2, cpu_seconds=1, timeout=1.5) as pool:
+        results = {
+            index: (metrics, error) for index, metrics, error in evaluate_generated_code(pool, candidates, 4, 4, 16)
+        }
+
+        assert results[0][1] is None and results[0][0]["max_ddt_entry"] == results[7][0]["max_ddt_entry"]
+        assert results[1][1] == "PermissionError: import of 'os' is not allowed"
+        assert results[2][1] == "NameError: name 'open' is not defined"
+        assert results[3][1].startswith("PermissionError: access to attribute")
+        assert results[4][1] == "TypeError: the function must return a list[list[str]]"
+        assert results[5][1].startswith("MemoryError")
+        # Either the CPU limit or the wall-clock timeout stops the endless loop, depending on load
+        assert results[6][1] in ("TimeoutError: CPU time limit exceeded", "timed out after 1.5s")
+        # Attribute lookups by name, through helpers, format fields or frames, are all refused
+        assert results[8][1] == "PermissionError: import of 'operator' is not allowed"
+        assert results[9][1] == "PermissionError: access to attribute 'format' is not allowed"
+        assert results[10][1] == "PermissionError: access to attribute 'f_back' is not allowed"
+
+        # The workers are still usable afterwards
+        assert pool.run(GOOD, args=(4, 4, 16)).table == pool.run(GOOD, args=(4, 4, 16)).table
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="namespaces and chroot are Linux only")
+def test_workers_are_isolated_from_the_filesystem():
+    # os is let through the source checks here, so only the OS isolation stands in the way
+    probe = "import os\ndef f(*args):\n    return [[str(len(os.listdir('/'))), str(os.getuid())]]"
+    with SandboxPool(workers=1, allowed_modules={"os"}) as pool:
+        if "filesystem" not in pool.isolation:
+            pytest.skip("this host doesn't allow unprivileged namespaces")
+        table = pool.run(probe).table
+        assert table is not None and table[0][0] == "0"
+        if "unprivileged" in pool.isolation:
+            assert table[0][1] == "65534"
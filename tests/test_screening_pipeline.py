@@ -0,0 +1,33 @@
+import random
+
+from src.evaluate_s_box import evaluate_s_box
+from src.s_box_io import read_s_box_tsv
+from src.screening_pipeline import ScreeningPipeline
+
+
+def test_pipeline_rejects_at_the_cheapest_stage():
+    pipeline = ScreeningPipeline(8, 8, 16, max_fixed_points=0, max_allowed_uniformity=6)
+    aes = read_s_box_tsv("data/rijndael-forward.tsv")
+    rng = random.Random(0)
+
+    duplicate = [row[:] for row in aes]
+    duplicate[0][1] = duplicate[0][0]
+    identity_like = [[f"{row * 16 + column:02x}" for column in range(16)] for row in range(16)]
+    linear = [[f"{(row * 16 + column) ^ 0x5a:02x}" for column in range(16)] for row in range(16)]
+
+    assert pipeline.screen(aes) == (evaluate_s_box(aes, 8, 8, 16, max_allowed_uniformity=6), None)
+    assert pipeline.screen(aes[:8]) == (None, "128 cells, expected 256")
+    assert pipeline.screen(duplicate) == (None, "not bijective")
+    assert pipeline.screen(identity_like) == (None, "256 fixed points")
+    # x ^ 0x5a has DDT[dx][dx] = 256 on every row, so any sampled row rejects it
+    metrics, reason = pipeline.screen(linear)
+    assert metrics is None and reason.startswith("sampled DDT entry 256")
+
+    stats = {row["stage"]: row for row in pipeline.report()}
+    assert (stats["structure"]["evaluated"], stats["structure"]["rejected"]) == (5, 3)
+    assert (stats["sampled_ddt"]["evaluated"], stats["sampled_ddt"]["rejected"]) == (2, 1)
+    assert (stats["full"]["evaluated"], stats["full"]["rejected"]) == (1, 0)
+
+    random_permutation = [[f"{value:02x}" for value in rng.sample(range(256), 256)]]
+    metrics, reason = ScreeningPipeline(8, 8, 16, max_allowed_uniformity=4).screen(random_permutation)
+    assert metrics is None and "above 4" in reason
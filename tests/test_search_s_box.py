@@ -0,0 +1,22 @@
+from src.evaluate_s_box import evaluate_s_box, s_box_cost
+from src.search_s_box import search_s_box_for
+
+
+def test_search_finds_optimal_4_bit_s_box_deterministically():
+    results = search_s_box_for(4, 4, 16, restarts=2, iterations=2000, top_k=2, max_workers=2, random_seed=1)
+    assert results == search_s_box_for(4, 4, 16, restarts=2, iterations=2000, top_k=2, max_workers=2, random_seed=1)
+
+    table, metrics = results[0]
+    assert metrics == evaluate_s_box(table, 4, 4, 16)
+    assert sorted(int(symbol, 16) for row in table for symbol in row) == list(range(16))
+    # Optimal 4-bit S-boxes have differential uniformity 4 and max |W| = 8
+    assert metrics["max_ddt_entry"] == 4
+    assert metrics["max_linear_correlation"] == 0.5
+    assert [s_box_cost(result[1]) for result in results] == sorted(s_box_cost(result[1]) for result in results)
+
+
+def test_search_improves_q_ary_seed():
+    seed = [[str(value) for value in range(125)]]  # the identity: every difference maps to itself
+    ((table, metrics),) = search_s_box_for(3, 3, 125, seeds=[seed], restarts=1, iterations=200, max_workers=1)
+    assert metrics["radices"] == (5, 5, 5)
+    assert s_box_cost(metrics) < s_box_cost(evaluate_s_box(seed, 3, 3, 125))
@@ -0,0 +1,189 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from src.instrumentation import recording  # noqa: E402
+from src.utils import (  # noqa: E402
+    agenerate_s_boxes,
+    create_system_prompt,
+    generate_s_boxes_per_response,
+    stream_s_box_for,
+)
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/chat with a numbered reply, like a local ollama server would."""
+
+    counter = 0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with StubOllamaHandler.lock:
+            StubOllamaHandler.counter += 1
+            StubOllamaHandler.in_flight += 1
+            StubOllamaHandler.max_in_flight = max(StubOllamaHandler.max_in_flight, StubOllamaHandler.in_flight)
+            number = StubOllamaHandler.counter
+        time.sleep(0.05)
+        with StubOllamaHandler.lock:
+            StubOllamaHandler.in_flight -= 1
+
+        body = json.dumps(
+            {
+                "model": request["model"],
+                "created_at": "2025-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": f"box {number}"},
+                "done": True,
+                "prompt_eval_count": 100,
+                "eval_count": 20,
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_agenerate_s_boxes_against_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    async def collect():
+        return [text async for text in agenerate_s_boxes((3, 3, 125), n=6, concurrency=2, host=host)]
+
+    try:
+        with recording() as recorder:
+            responses = asyncio.run(collect())
+    finally:
+        server.shutdown()
+
+    assert sorted(responses) == sorted(f"box {number}" for number in range(1, 7))
+    assert StubOllamaHandler.max_in_flight <= 2
+    summary = recorder.summary()
+    assert summary["phases"]["llm_call"]["calls"] == 6
+    assert summary["counters"] == {"llm_calls": 6, "llm_prompt_tokens": 600, "llm_completion_tokens": 120}
+    assert "cryptographic" in create_system_prompt()
+
+
+class StreamingStubHandler(BaseHTTPRequestHandler):
+    """Streams a reply whose second row repeats a symbol, one NDJSON line per row."""
+
+    protocol_version = "HTTP/1.1"
+    chunks = ["Here you go:\n", "0 1 2 3\n", "4 5 6 0\n", "8 9 a b\n", "c d e f\n"] + ["Some notes.\n"] * 8
+    sent = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for index, content in enumerate(self.chunks):
+                done = index == len(self.chunks) - 1
+                line = json.dumps(
+                    {
+                        "model": "stub",
+                        "created_at": "2025-01-01T00:00:00Z",
+                        "message": {"role": "assistant", "content": content},
+                        "done": done,
+                    }
+                ).encode()
+                line += b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+                StreamingStubHandler.sent += 1
+                time.sleep(0.05)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_stream_s_box_for_stops_on_invalid_row():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StreamingStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        table, error = stream_s_box_for(4, 4, 16, expected_cells=16, host=host)
+    finally:
+        server.shutdown()
+
+    assert table is None
+    assert error == "duplicate symbol '0' in row 2"
+    assert StreamingStubHandler.sent < len(StreamingStubHandler.chunks)
+
+
+class MultiBoxStubHandler(BaseHTTPRequestHandler):
+    """Answers /api/chat with two 4-bit boxes and an invalid one, plus ollama's token counts and timings."""
+
+    requests: list[dict] = []
+
+    def do_POST(self):
+        MultiBoxStubHandler.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        content = "0 1 2 3\n4 5 6 7\n8 9 a b\nc d e f\n\nf e d c\nb a 9 8\n7 6 5 4\n3 2 1 0\n\n0 0 1 2\n"
+        body = json.dumps(
+            {
+                "model": "stub",
+                "created_at": "2025-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "prompt_eval_count": 1000,
+                "prompt_eval_duration": 500_000_000,
+                "eval_count": 200,
+                "eval_duration": 1_500_000_000,
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_generate_s_boxes_per_response_reports_cost_per_box():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MultiBoxStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        tables, report = generate_s_boxes_per_response(
+            4, 4, 16, boxes_per_response=3, responses=2, expected_cells=16, keep_alive="5m", host=host
+        )
+    finally:
+        server.shutdown()
+
+    assert len(tables) == 4 and tables[1][0] == ["f", "e", "d", "c"]
+    assert report["boxes_parsed"] == 6 and report["boxes_accepted"] == 4
+    assert report["prompt_tokens_per_box"] == 500 and report["completion_tokens_per_box"] == 100
+    assert report["prefill_seconds_per_box"] == 0.25
+    assert report["boxes_per_gpu_second"] == 1.0
+
+    # Same system prefix on every call, with the model kept loaded in between
+    first, second = MultiBoxStubHandler.requests
+    assert first["messages"] == second["messages"]
+    assert first["messages"][0]["content"] == create_system_prompt()
+    assert "number_of_s_boxes: 3" in first["messages"][1]["content"]
+    assert first["keep_alive"] == "5m"